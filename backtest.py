@@ -0,0 +1,194 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from covariance import price_files
+
+TRADING_DAYS = 252
+
+
+def variant_grid(thresholds=(0.0, 0.02, 0.05, 0.1), long_only=(True, False), cost_bps=(0, 5, 10),
+                 lags=(1,), executions=("close",)):
+    """Every combination of strategy settings, as a list of variant dicts"""
+    _check_lags(lags)
+    keys = ["threshold", "long_only", "cost_bps", "lag", "execution"]
+    return [dict(zip(keys, values))
+            for values in itertools.product(thresholds, long_only, cost_bps, lags, executions)]
+
+
+def _check_lags(lags):
+    # A lag of 0 would trade on the bar the signal was computed from
+    bad = [lag for lag in lags if int(lag) != lag or lag < 1]
+    if bad:
+        raise ValueError(f"Signal lags must be whole days >= 1, got {bad}")
+
+
+def load_prices(tickers, data_root="."):
+    """Aligned dates x tickers Open and Close frames from the saved price histories"""
+    files = price_files(data_root)
+    frames = {"Open": {}, "Close": {}}
+    for ticker in tickers:
+        if ticker not in files:
+            continue
+        df = pd.read_csv(files[ticker], usecols=["Date", "Open", "Close"])
+        df.index = pd.to_datetime(df["Date"].astype(str).str[:10])
+        df = df[~df.index.duplicated(keep="last")]
+        for field in frames:
+            frames[field][ticker] = df[field]
+    return {field: pd.DataFrame(columns).sort_index() for field, columns in frames.items()}
+
+
+def model_signals(tickers, model_name="LogisticRegression", n_folds=5, features=None):
+    """dates x tickers signal matrix from Model.predict_signals, centred so positive means long"""
+    from model import Model
+    columns = {}
+    for ticker in tickers:
+        try:
+            columns[ticker] = Model(ticker, features).predict_signals(model_name, n_folds=n_folds) - 0.5
+        except Exception as e:
+            print(f"   ✗ {ticker} signals failed: {e}")
+    return pd.DataFrame(columns).sort_index()
+
+
+class Backtester:
+    """
+    Vectorized long/short backtest of a signal matrix against stored prices.
+
+    signals is a dates x tickers frame where a positive value is a long
+    view and a negative value a short view (NaN means no view). Every
+    variant is evaluated in the same pass: positions for all variants are
+    one (variants x days x tickers) array, built per block of tickers so
+    memory stays under ram_budget_mb.
+
+    A variant holds +1 when the signal is above its threshold and -1 when
+    below minus the threshold (0 if long_only), lag days after the signal.
+    Positions are equal-weighted by gross exposure each day. With
+    execution="close" trades fill at the close; with "open" they fill at
+    the next open, so the old position earns the overnight move and the
+    new one the intraday move. Costs are cost_bps per unit of turnover.
+    """
+
+    def __init__(self, signals, prices, ram_budget_mb=512):
+        if isinstance(prices, pd.DataFrame):
+            prices = {"Close": prices}
+        tickers = [t for t in signals.columns if t in prices["Close"].columns]
+        self.dates = prices["Close"].index
+        self.tickers = tickers
+        self.close = prices["Close"][tickers].to_numpy(dtype=float)
+        self.open = prices["Open"][tickers].to_numpy(dtype=float) if "Open" in prices else None
+        self.signals = signals[tickers].reindex(self.dates).to_numpy(dtype=float)
+        self.ram_budget = ram_budget_mb * 1024 * 1024
+
+    def _blocks(self, n_variants):
+        # Positions, weights and their lagged copy: about 4 floats per (variant, day, ticker)
+        width = max(1, int(self.ram_budget / (8 * 4 * n_variants * max(1, len(self.dates)))))
+        return [slice(lo, lo + width) for lo in range(0, len(self.tickers), width)]
+
+    def _positions(self, block, lag, thresholds, long_only):
+        """(variants, days, tickers) positions in {-1, 0, 1} for one block of tickers"""
+        signal = np.full(self.signals[:, block].shape, np.nan)
+        signal[lag:] = self.signals[:len(self.dates) - lag, block]
+        # No position without a price to trade at
+        signal[np.isnan(self.close[:, block])] = np.nan
+        signal = signal[None]
+        longs = signal > thresholds
+        shorts = (signal < -thresholds) & ~long_only
+        return longs.astype(np.float64) - shorts
+
+    def _returns(self, block, execution):
+        close = self.close[:, block]
+        previous = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+        if execution == "open":
+            if self.open is None:
+                raise ValueError("execution='open' needs Open prices")
+            overnight = self.open[:, block] / previous - 1
+            intraday = close / self.open[:, block] - 1
+            return np.nan_to_num(overnight), np.nan_to_num(intraday)
+        return np.zeros_like(close), np.nan_to_num(close / previous - 1)
+
+    def run(self, variants=None):
+        """
+        Evaluate variants (default: variant_grid()).
+
+        Returns (summary, daily): summary has one row of performance
+        statistics per variant, daily is the dates x variants frame of net
+        portfolio returns. Statistics start on the variant's first day
+        with a tradable signal (its "start" column), so the warm-up before
+        the model has any view does not dilute them.
+        """
+        variants = variants or variant_grid()
+        n_days = len(self.dates)
+        gross = np.zeros((len(variants), n_days))
+        turnover = np.zeros((len(variants), n_days))
+        starts = np.full(len(variants), n_days)
+
+        _check_lags([variant.get("lag", 1) for variant in variants])
+        groups = {}
+        for i, variant in enumerate(variants):
+            groups.setdefault((variant.get("lag", 1), variant.get("execution", "close")), []).append(i)
+
+        for (lag, execution), members in groups.items():
+            thresholds = np.array([variants[i].get("threshold", 0.0) for i in members])[:, None, None]
+            long_only = np.array([variants[i].get("long_only", False) for i in members])[:, None, None]
+            blocks = self._blocks(len(members))
+            starts[members] = self._first_signal_day(lag)
+
+            # Pass 1: gross exposure per day, to equal-weight positions across every block
+            exposure = np.zeros((len(members), n_days))
+            for block in blocks:
+                exposure += np.abs(self._positions(block, lag, thresholds, long_only)).sum(axis=2)
+            scale = 1.0 / np.maximum(exposure, 1.0)
+
+            # Pass 2: weights, P&L and turnover
+            for block in blocks:
+                weights = self._positions(block, lag, thresholds, long_only) * scale[:, :, None]
+                held = np.concatenate([np.zeros_like(weights[:, :1]), weights[:, :-1]], axis=1)
+                overnight, intraday = self._returns(block, execution)
+                if execution == "open":
+                    pnl = held * overnight + weights * intraday
+                else:
+                    pnl = weights * intraday
+                gross[members] += pnl.sum(axis=2)
+                turnover[members] += np.abs(weights - held).sum(axis=2)
+
+        costs = np.array([v.get("cost_bps", 0) for v in variants])[:, None] / 1e4 * turnover
+        net = gross - costs
+        names = [self.variant_name(v) for v in variants]
+        daily = pd.DataFrame(net.T, index=self.dates, columns=names)
+        summary = pd.DataFrame([self._stats(net[i, s:], gross[i, s:], turnover[i, s:])
+                                for i, s in enumerate(starts)], index=names)
+        summary.insert(0, "start", [self.dates[s] if s < n_days else pd.NaT for s in starts])
+        summary = pd.concat([pd.DataFrame(variants, index=names), summary], axis=1)
+        return summary.sort_values("sharpe", ascending=False), daily
+
+    def _first_signal_day(self, lag):
+        """Index of the first day a signal lagged by lag days meets a price, or len(dates) if none does"""
+        n_days = len(self.dates)
+        tradable = ~np.isnan(self.signals[:max(0, n_days - lag)]) & ~np.isnan(self.close[lag:])
+        days = np.flatnonzero(tradable.any(axis=1))
+        return days[0] + lag if len(days) else n_days
+
+    @staticmethod
+    def variant_name(variant):
+        side = "long" if variant.get("long_only", False) else "long/short"
+        return (f"{side} th={variant.get('threshold', 0.0):g} cost={variant.get('cost_bps', 0):g}bp "
+                f"lag={variant.get('lag', 1)} {variant.get('execution', 'close')}")
+
+    @staticmethod
+    def _stats(net, gross, turnover):
+        equity = np.cumprod(1 + net)
+        years = len(net) / TRADING_DAYS
+        drawdown = equity / np.maximum.accumulate(equity) - 1 if len(equity) else np.zeros(1)
+        vol = net.std() * np.sqrt(TRADING_DAYS) if len(net) else np.nan
+        active = net[turnover + np.abs(gross) > 0]
+        return {
+            "total_return": equity[-1] - 1 if len(equity) else 0.0,
+            "cagr": equity[-1] ** (1 / years) - 1 if years > 0 and equity[-1] > 0 else np.nan,
+            "volatility": vol,
+            "sharpe": net.mean() * TRADING_DAYS / vol if vol > 0 else np.nan,
+            "max_drawdown": drawdown.min(),
+            "avg_daily_turnover": turnover.mean() if len(turnover) else np.nan,
+            "cost_drag": (gross - net).sum(),
+            "hit_rate": (active > 0).mean() if len(active) else np.nan
+        }
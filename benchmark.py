@@ -0,0 +1,128 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from instrumentation import TRACER
+from replay import Cassette, FIXTURE_DIR
+
+# Reference filers: small, mid and mega cap
+REFERENCE_TICKERS = {"small": "CLFD", "mid": "DECK", "mega": "AAPL"}
+
+BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+
+# Trace stage name prefix -> benchmark stage
+STAGE_GROUPS = {
+    "sec.": "fetch",
+    "yahoo.": "fetch",
+    "parse.": "parse",
+    "calc.": "calc",
+    "save.": "save",
+    "charts.": "charts",
+    "excel.": "excel"
+}
+
+
+def group_stages(trace):
+    """Collapse a ticker trace into fetch/parse/calc/save/charts/excel/total seconds"""
+    groups = {}
+    for name, record in trace["stages"].items():
+        for prefix, group in STAGE_GROUPS.items():
+            if name.startswith(prefix):
+                groups[group] = groups.get(group, 0.0) + record["s"]
+                break
+    groups["total"] = trace["total_s"]
+    return groups
+
+
+def run_ticker(ticker, mode="replay", fixture_dir=FIXTURE_DIR):
+    """Run the full pipeline for one ticker in a scratch directory and return its stage timings"""
+    from main import ComprehensiveDataFetcher
+
+    fixture_dir = os.path.abspath(fixture_dir)
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix=f"bench_{ticker}_")
+    try:
+        os.chdir(workdir)
+        with Cassette(ticker, mode=mode, fixture_dir=fixture_dir):
+            fetcher = ComprehensiveDataFetcher()
+            fetcher.run_all(ticker)
+        if fetcher.last_trace["errors"]:
+            raise RuntimeError(f"{ticker} failed: {fetcher.last_trace['errors']}")
+        return group_stages(fetcher.last_trace)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_suite(tickers, repeat=3):
+    """Best-of-repeat stage timings per ticker, replayed from fixtures"""
+    results = {}
+    for ticker in tickers:
+        best = {}
+        for _ in range(repeat):
+            for stage, seconds in run_ticker(ticker).items():
+                best[stage] = min(best.get(stage, float("inf")), seconds)
+        results[ticker] = best
+    return results
+
+
+def compare(results, baseline, tolerance=0.25, min_seconds=0.05):
+    """Return a list of regressions beyond tolerance, ignoring stages under min_seconds"""
+    regressions = []
+    print(f"\n{'Ticker':<8}{'Stage':<10}{'baseline s':>12}{'current s':>12}{'change':>10}")
+    print("-" * 52)
+    for ticker, stages in results.items():
+        for stage, seconds in sorted(stages.items()):
+            previous = baseline.get(ticker, {}).get(stage)
+            if previous is None:
+                print(f"{ticker:<8}{stage:<10}{'-':>12}{seconds:>12.3f}{'new':>10}")
+                continue
+            change = (seconds - previous) / previous if previous else 0.0
+            flag = ""
+            if seconds > min_seconds and change > tolerance:
+                regressions.append((ticker, stage, previous, seconds))
+                flag = "  ✗"
+            print(f"{ticker:<8}{stage:<10}{previous:>12.3f}{seconds:>12.3f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark")
+    parser.add_argument("command", choices=["record", "run"])
+    parser.add_argument("--tickers", nargs="*", default=list(REFERENCE_TICKERS.values()))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        for ticker in args.tickers:
+            print(f"⏺ Recording {ticker}...")
+            run_ticker(ticker, mode="record")
+        return 0
+
+    results = run_suite(args.tickers, repeat=args.repeat)
+    TRACER.reset()
+
+    if args.update_baseline or not os.path.exists(BASELINE_PATH):
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Baseline written to {BASELINE_PATH}")
+        return 0
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, tolerance=args.tolerance)
+    if regressions:
+        print(f"\n✗ {len(regressions)} stage(s) regressed more than {args.tolerance:.0%}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,399 @@
+import glob
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+COVARIANCE_CACHE = "covariance_cache"
+
+# Pair statistics kept per (i, j), summed over days where both i and j have a return:
+#   count  number of common days
+#   sum    sum of i's returns            (sum[j, i] is the sum of j's returns)
+#   sumsq  sum of i's squared returns
+#   cross  sum of i's return times j's return
+STATS = ("count", "sum", "sumsq", "cross")
+
+
+def price_files(data_root="."):
+    """ticker -> saved Price_History.csv for every *_COMPLETE_DATA directory"""
+    files = {}
+    for path in glob.glob(os.path.join(data_root, "*_COMPLETE_DATA", "04_Market_Data", "Price_History.csv")):
+        ticker = os.path.basename(os.path.dirname(os.path.dirname(path))).replace("_COMPLETE_DATA", "")
+        files[ticker] = path
+    return dict(sorted(files.items()))
+
+
+def _read_dates(path):
+    # Yahoo writes exchange-local timestamps; the calendar day is the first 10 characters
+    dates = pd.read_csv(path, usecols=["Date"])["Date"].astype(str).str[:10]
+    return pd.to_datetime(dates).to_numpy().astype("datetime64[D]")
+
+
+def _read_returns(path):
+    df = pd.read_csv(path, usecols=["Date", "Close"])
+    dates = pd.to_datetime(df["Date"].astype(str).str[:10]).to_numpy().astype("datetime64[D]")
+    returns = df["Close"].pct_change(fill_method=None).to_numpy(dtype=float, copy=True)
+    returns[~np.isfinite(returns)] = np.nan
+    return dates, returns
+
+
+class CovarianceEngine:
+    """
+    Pairwise correlations, covariances and betas across every saved ticker.
+
+    Daily returns are aligned into one (days x tickers) matrix on disk and
+    reduced to per-pair sums (see STATS), computed tile by tile so no step
+    holds more than ram_budget_mb. Tiles run on a thread pool; NumPy's
+    matrix products release the GIL. The sums are additive over days, so
+    update() only folds in bars newer than the cache unless history was
+    revised or the ticker set changed, which triggers a rebuild.
+
+    Pairs with fewer than min_periods common days come back as NaN.
+    """
+
+    def __init__(self, data_root=".", cache_dir=COVARIANCE_CACHE, ram_budget_mb=512,
+                 workers=None, min_periods=60):
+        self.data_root = data_root
+        self.cache_dir = cache_dir
+        self.ram_budget = ram_budget_mb * 1024 * 1024
+        self.workers = workers or os.cpu_count() or 1
+        self.min_periods = min_periods
+        os.makedirs(cache_dir, exist_ok=True)
+        self.meta = self._read_meta()
+
+    # =====================================
+    # CACHE
+    # =====================================
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.npy")
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.cache_dir, "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        # A unique temp file per writer, so two updates never swap in each other's partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix="meta.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, os.path.join(self.cache_dir, "meta.json"))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.meta = meta
+
+    @property
+    def tickers(self):
+        return self.meta["tickers"] if self.meta else []
+
+    def _stats(self, mode="r"):
+        return {name: np.load(self._path(name), mmap_mode=mode) for name in STATS}
+
+    def _index(self, tickers):
+        if tickers is None:
+            return np.arange(len(self.tickers)), list(self.tickers)
+        position = {ticker: i for i, ticker in enumerate(self.tickers)}
+        missing = [t for t in tickers if t not in position]
+        if missing:
+            raise KeyError(f"Not in the covariance cache: {', '.join(missing)}")
+        return np.array([position[t] for t in tickers]), list(tickers)
+
+    # =====================================
+    # BUILDING
+    # =====================================
+
+    def _tile_shape(self, n_rows, n_cols):
+        """
+        (row chunk, column block) sizes so one tile fits its share of the budget.
+
+        A tile holds two column blocks of values, masks and squares for a
+        chunk of rows (6 * rows * block floats) plus six block x block
+        accumulators.
+        """
+        per_worker = self.ram_budget / self.workers / 8
+        rows = max(1, min(n_rows, 1024, int(per_worker / 64)))
+        block = (-6 * rows + np.sqrt(36 * rows ** 2 + 24 * per_worker)) / 12
+        return rows, int(max(1, min(n_cols, block)))
+
+    def _write_returns(self, files, path):
+        """Align every ticker's daily returns into a (days x tickers) .npy on disk, one column at a time"""
+        dates = np.unique(np.concatenate([_read_dates(p) for p in files.values()] or
+                                         [np.array([], dtype="datetime64[D]")]))
+        matrix = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64,
+                                           shape=(len(dates), len(files)))
+        matrix[:] = np.nan
+        for j, file in enumerate(files.values()):
+            ticker_dates, returns = _read_returns(file)
+            matrix[np.searchsorted(dates, ticker_dates), j] = returns
+        matrix.flush()
+        return dates, matrix
+
+    def _same_history(self, old, new):
+        """True when the first len(old) rows of new match old exactly, compared in column blocks"""
+        _, block = self._tile_shape(len(old), old.shape[1])
+        for lo in range(0, old.shape[1], block):
+            if not np.array_equal(old[:, lo:lo + block], new[:len(old), lo:lo + block], equal_nan=True):
+                return False
+        return True
+
+    def _accumulate_tile(self, returns, stats, start, stop, rows, cols_i, cols_j):
+        (i0, i1), (j0, j1) = cols_i, cols_j
+        acc = {
+            "count": np.zeros((i1 - i0, j1 - j0)), "cross": np.zeros((i1 - i0, j1 - j0)),
+            "sum_ij": np.zeros((i1 - i0, j1 - j0)), "sum_ji": np.zeros((j1 - j0, i1 - i0)),
+            "sumsq_ij": np.zeros((i1 - i0, j1 - j0)), "sumsq_ji": np.zeros((j1 - j0, i1 - i0))
+        }
+        for r0 in range(start, stop, rows):
+            x = np.asarray(returns[r0:min(r0 + rows, stop), i0:i1])
+            y = np.asarray(returns[r0:min(r0 + rows, stop), j0:j1])
+            mx = (~np.isnan(x)).astype(np.float64)
+            my = (~np.isnan(y)).astype(np.float64)
+            x = np.nan_to_num(x, nan=0.0)
+            y = np.nan_to_num(y, nan=0.0)
+            acc["count"] += mx.T @ my
+            acc["cross"] += x.T @ y
+            acc["sum_ij"] += x.T @ my
+            acc["sum_ji"] += y.T @ mx
+            acc["sumsq_ij"] += (x * x).T @ my
+            acc["sumsq_ji"] += (y * y).T @ mx
+
+        # Tiles are disjoint, so threads never write the same cells
+        for name in ("count", "cross"):
+            stats[name][i0:i1, j0:j1] += acc[name]
+            if i0 != j0:
+                stats[name][j0:j1, i0:i1] += acc[name].T
+        for name in ("sum", "sumsq"):
+            stats[name][i0:i1, j0:j1] += acc[f"{name}_ij"]
+            if i0 != j0:
+                stats[name][j0:j1, i0:i1] += acc[f"{name}_ji"]
+
+    def _accumulate(self, returns, stats, start, stop):
+        """Add rows [start, stop) of returns into the pair statistics; returns the tile count"""
+        n = returns.shape[1]
+        rows, block = self._tile_shape(stop - start, n)
+        blocks = [(lo, min(lo + block, n)) for lo in range(0, n, block)]
+        tiles = [(a, b) for k, a in enumerate(blocks) for b in blocks[k:]]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self._accumulate_tile, returns, stats, start, stop, rows, a, b)
+                       for a, b in tiles]
+            for future in futures:
+                future.result()
+        for matrix in stats.values():
+            matrix.flush()
+        return len(tiles)
+
+    def update(self, rebuild=False):
+        """
+        Bring the cache up to date with the saved price histories.
+
+        Returns a summary with the mode used (full, incremental or
+        unchanged), rows processed, tiles and seconds.
+        """
+        start_time = time.perf_counter()
+        files = price_files(self.data_root)
+        tickers = list(files)
+        new_path = self._path("returns.new")
+        dates, returns = self._write_returns(files, new_path)
+
+        meta = self.meta
+        incremental = (
+            not rebuild and meta is not None and meta.get("state") == "ready"
+            and meta["tickers"] == tickers and meta["rows"] <= len(dates)
+            and [str(d) for d in dates[:meta["rows"]]] == meta["dates"]
+            and self._same_history(np.load(self._path("returns"), mmap_mode="r"), returns)
+        )
+        if incremental:
+            first_row = meta["rows"]
+            if first_row == len(dates):
+                os.remove(new_path)
+                return {"mode": "unchanged", "tickers": len(tickers), "rows": 0, "tiles": 0,
+                        "seconds": time.perf_counter() - start_time}
+            stats = self._stats("r+")
+        else:
+            first_row = 0
+            stats = {name: np.lib.format.open_memmap(self._path(name), mode="w+", dtype=np.float64,
+                                                     shape=(len(tickers), len(tickers)))
+                     for name in STATS}
+
+        # A run killed between here and "ready" leaves half-added sums; the next update rebuilds
+        self._write_meta({"state": "updating", "tickers": tickers, "rows": first_row, "dates": []})
+        tiles = self._accumulate(returns, stats, first_row, len(dates))
+        del returns, stats
+        os.replace(new_path, self._path("returns"))
+        self._write_meta({"state": "ready", "tickers": tickers, "rows": len(dates),
+                          "dates": [str(d) for d in dates], "updated_at": time.time()})
+
+        summary = {"mode": "incremental" if incremental else "full", "tickers": len(tickers),
+                   "rows": len(dates) - first_row, "tiles": tiles,
+                   "seconds": time.perf_counter() - start_time}
+        print(f"📈 Covariance cache {summary['mode']}: {summary['tickers']} tickers, "
+              f"{summary['rows']} days in {summary['tiles']} tiles ({summary['seconds']:.1f}s)")
+        return summary
+
+    # =====================================
+    # QUERIES
+    # =====================================
+
+    def _moments(self, rows, cols):
+        """Pairwise (cov, var of row ticker, var of col ticker) for index arrays rows x cols"""
+        stats = self._stats()
+        block = np.ix_(rows, cols)
+        flipped = np.ix_(cols, rows)
+        n = stats["count"][block]
+        sx, sy = stats["sum"][block], stats["sum"][flipped].T
+        sxx, syy = stats["sumsq"][block], stats["sumsq"][flipped].T
+        sxy = stats["cross"][block]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (sxy - sx * sy / n) / (n - 1)
+            var_x = (sxx - sx * sx / n) / (n - 1)
+            var_y = (syy - sy * sy / n) / (n - 1)
+        short = n < max(2, self.min_periods)
+        for matrix in (cov, var_x, var_y):
+            matrix[short] = np.nan
+        return cov, var_x, var_y
+
+    def returns(self, tickers=None):
+        """Cached daily returns for tickers (default: all) as a dates x tickers DataFrame"""
+        index, names = self._index(tickers)
+        matrix = np.load(self._path("returns"), mmap_mode="r")
+        return pd.DataFrame(np.asarray(matrix[:, index]), columns=names,
+                            index=pd.DatetimeIndex(np.array(self.meta["dates"], dtype="datetime64[D]")))
+
+    def _pairwise(self, index, kind):
+        """
+        Dense covariance or correlation for index x index, built one tile of rows at a time.
+
+        The result may take half of ram_budget_mb and the tiles the other
+        half; a matrix too large for that raises MemoryError instead of
+        exceeding the budget (export() streams any size to disk).
+        """
+        p = len(index)
+        need = p * p * 8
+        if need > self.ram_budget / 2:
+            raise MemoryError(f"A {p} x {p} {kind} matrix needs {need / 2 ** 20:.0f} MB, over half of "
+                              f"ram_budget_mb={self.ram_budget / 2 ** 20:.0f}; pass tickers or use export()")
+        out = np.empty((p, p))
+        # _moments holds about a dozen rows x p float arrays at once
+        rows = max(1, int(self.ram_budget / 2 / (12 * 8 * max(p, 1))))
+        for lo in range(0, p, rows):
+            cov, var_x, var_y = self._moments(index[lo:lo + rows], index)
+            if kind == "correlation":
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    cov = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+            out[lo:lo + rows] = cov
+        return out
+
+    def covariance(self, tickers=None):
+        """Pairwise daily covariance for tickers (default: all, within ram_budget_mb) as a DataFrame"""
+        index, names = self._index(tickers)
+        return pd.DataFrame(self._pairwise(index, "covariance"), index=names, columns=names)
+
+    def correlation(self, tickers=None):
+        """Pairwise correlation for tickers (default: all, within ram_budget_mb) as a DataFrame"""
+        index, names = self._index(tickers)
+        return pd.DataFrame(self._pairwise(index, "correlation"), index=names, columns=names)
+
+    def most_correlated(self, ticker, n=10):
+        """The n tickers most correlated with ticker, from one row of the cache"""
+        row, _ = self._index([ticker])
+        cov, var_x, var_y = self._moments(row, np.arange(len(self.tickers)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = pd.Series((cov / np.sqrt(var_x * var_y))[0], index=self.tickers)
+        return corr.drop(ticker).dropna().sort_values(ascending=False).head(n)
+
+    def beta(self, benchmark, tickers=None):
+        """
+        Beta of each ticker against benchmark.
+
+        benchmark is a cached ticker (e.g. "SPY"), using the pair sums, or
+        a Series of daily returns indexed by date, which is regressed
+        against the cached returns matrix in column blocks.
+        """
+        index, names = self._index(tickers)
+        if isinstance(benchmark, str):
+            column, _ = self._index([benchmark])
+            cov, _, var_bench = self._moments(index, column)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return pd.Series((cov / var_bench)[:, 0], index=names, name=f"beta_{benchmark}")
+
+        dates = np.array(self.meta["dates"], dtype="datetime64[D]")
+        bench = pd.Series(benchmark.to_numpy(dtype=float),
+                          index=pd.to_datetime(benchmark.index).to_numpy().astype("datetime64[D]"))
+        bench = bench[~bench.index.duplicated()].reindex(dates).to_numpy()
+        returns = np.load(self._path("returns"), mmap_mode="r")
+        _, block = self._tile_shape(len(dates), len(index))
+        betas = np.empty(len(index))
+        for lo in range(0, len(index), block):
+            x = np.asarray(returns[:, index[lo:lo + block]])
+            both = ~np.isnan(x) & ~np.isnan(bench)[:, None]
+            n = both.sum(axis=0)
+            xb = np.where(both, x, 0.0)
+            bb = np.where(both, bench[:, None], 0.0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean_x, mean_b = xb.sum(axis=0) / n, bb.sum(axis=0) / n
+                cov = (xb * bb).sum(axis=0) / n - mean_x * mean_b
+                var_b = (bb * bb).sum(axis=0) / n - mean_b ** 2
+                betas[lo:lo + block] = np.where(n >= self.min_periods, cov / var_b, np.nan)
+        return pd.Series(betas, index=names, name="beta")
+
+    def shrunk_covariance(self, tickers=None):
+        """
+        Ledoit-Wolf covariance shrunk toward a scaled identity.
+
+        Returns (DataFrame, shrinkage intensity). The sample matrix is the
+        pairwise covariance (pairs without enough overlap count as 0); the
+        intensity uses demeaned returns with missing days treated as 0.
+        """
+        index, names = self._index(tickers)
+        sample = np.nan_to_num(self._pairwise(index, "covariance"), nan=0.0, copy=False)
+        p = len(index)
+        if p == 0:
+            return pd.DataFrame(sample, index=names, columns=names), 0.0
+
+        # Per-day squared norm of the demeaned return vector, streamed over column blocks
+        returns = np.load(self._path("returns"), mmap_mode="r")
+        _, block = self._tile_shape(len(returns), p)
+        day_norms = np.zeros(len(returns))
+        for lo in range(0, p, block):
+            x = np.asarray(returns[:, index[lo:lo + block]])
+            y = np.nan_to_num(x - np.nanmean(x, axis=0), nan=0.0)
+            day_norms += (y * y).sum(axis=1)
+        t = int((day_norms > 0).sum()) or 1  # days with any data
+
+        # Sums over the p x p matrix in row blocks, with no p x p temporaries
+        mu = np.trace(sample) / p
+        squares = sum(float(np.einsum("ij,ij->", sample[lo:lo + block], sample[lo:lo + block]))
+                      for lo in range(0, p, block))
+        d2 = (squares - 2 * mu * np.trace(sample) + mu * mu * p) / p
+        b2_bar = max(0.0, ((day_norms ** 2).sum() / t ** 2 - squares / t) / p)
+        shrinkage = min(b2_bar, d2) / d2 if d2 > 0 else 1.0
+        # shrinkage * mu * I + (1 - shrinkage) * sample, in place
+        sample *= 1 - shrinkage
+        sample[np.diag_indices(p)] += shrinkage * mu
+        return pd.DataFrame(sample, index=names, columns=names), shrinkage
+
+    def export(self, kind="correlation", path=None):
+        """Write the full tickers x tickers matrix to a .npy file one tile of rows at a time"""
+        path = path or self._path(kind)
+        n = len(self.tickers)
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n, n))
+        _, block = self._tile_shape(n, n)
+        every = np.arange(n)
+        for lo in range(0, n, block):
+            rows = every[lo:lo + block]
+            cov, var_x, var_y = self._moments(rows, every)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out[lo:lo + block] = cov / np.sqrt(var_x * var_y) if kind == "correlation" else cov
+        out.flush()
+        with open(os.path.splitext(path)[0] + ".tickers.json", "w") as f:
+            json.dump(self.tickers, f)
+        return path
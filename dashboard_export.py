@@ -0,0 +1,224 @@
+import json
+import math
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from peer_ranks import METRIC_FILES, read_classification
+from serializer import read_json, write_json
+
+DASHBOARD_DIR = "dashboard_data"
+
+# Maximum bars per price zoom level; each level aggregates days into OHLC buckets
+ZOOM_LEVELS = (256, 1024, 4096)
+
+SEC_INFO_KEYS = ("name", "cik", "sicDescription", "fiscalYearEnd", "tickers", "exchanges")
+
+
+def _column(values, decimals=4):
+    """JSON-ready list with NaN as null"""
+    values = np.round(np.asarray(values, dtype=float), decimals)
+    return [None if v != v else v for v in values.tolist()]
+
+
+def ohlc_levels(price_history, levels=ZOOM_LEVELS):
+    """
+    Columnar OHLCV series per zoom level.
+
+    Each level has at most its number of bars: consecutive days are
+    grouped into equal buckets with first open, max high, min low, last
+    close and summed volume, so candles at every zoom keep the true
+    range. A level that would hold every day is the daily series itself.
+    """
+    df = price_history
+    day = pd.to_datetime(df["Date"].astype(str).str[:10]).to_numpy().astype("datetime64[D]").astype(np.int64)
+    o, h, l, c = (df[col].to_numpy(dtype=float) for col in ("Open", "High", "Low", "Close"))
+    v = df["Volume"].to_numpy(dtype=float) if "Volume" in df else np.zeros(len(df))
+    n = len(df)
+    if n == 0:
+        return {}
+
+    out = {}
+    for bars in sorted(levels):
+        if n <= bars:
+            starts = np.arange(n)
+        else:
+            bucket = (np.arange(n) * bars) // n
+            starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        ends = np.r_[starts[1:], n] - 1
+        out[str(bars)] = {
+            "t": day[starts].tolist(),  # days since 1970-01-01
+            "o": _column(o[starts]),
+            "h": _column(np.fmax.reduceat(h, starts)),
+            "l": _column(np.fmin.reduceat(l, starts)),
+            "c": _column(c[ends]),
+            "v": _column(np.add.reduceat(np.nan_to_num(v), starts), 0)
+        }
+        if n <= bars:
+            break
+    return out
+
+
+def statement_series(csv_dir):
+    """Per line item: columnar end/value/form series, one value per (end, form), latest filing wins"""
+    series = {}
+    if not os.path.isdir(csv_dir):
+        return series
+    for file in sorted(os.listdir(csv_dir)):
+        if not file.endswith(".csv"):
+            continue
+        df = pd.read_csv(os.path.join(csv_dir, file))
+        if not {"end", "val", "form"} <= set(df.columns):
+            continue
+        df = df[df["form"].isin(["10-K", "10-Q"])]
+        if "filed" in df:
+            df = df.sort_values("filed")
+        df = df.drop_duplicates(["end", "form"], keep="last").sort_values("end")
+        series[file[:-4]] = {"end": df["end"].astype(str).tolist(), "val": _column(df["val"], 2),
+                             "form": df["form"].tolist()}
+    return series
+
+
+def _finite(value):
+    """NaN and infinities become null: JSON.parse rejects them"""
+    if isinstance(value, dict):
+        return {key: _finite(v) for key, v in value.items()}
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _read_metrics_files(metrics_dir):
+    out = {}
+    for name in METRIC_FILES + ("Peer_Ranks",):
+        path = os.path.join(metrics_dir, f"{name}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                out[name] = _finite(json.load(f))
+    return out
+
+
+def _sec_info(json_dir):
+    for name in ("SEC_Company_Info.json", "SEC_Company_Info.json.gz"):
+        path = os.path.join(json_dir, name)
+        if os.path.exists(path):
+            data = read_json(path)
+            return {key: data.get(key) for key in SEC_INFO_KEYS}
+    return {}
+
+
+def export_ticker(ticker, data_dir=None, out_dir=DASHBOARD_DIR, levels=ZOOM_LEVELS):
+    """
+    Write one ticker's dashboard bundle and return its manifest entry.
+
+    Files under <out_dir>/tickers/<TICKER>/, all gzip JSON:
+      summary.json.gz     company info, ratios, growth, risk, peer ranks
+      statements.json.gz  statement line items as columnar series
+      prices_<N>.json.gz  OHLCV with at most N bars, one file per zoom level
+    The dashboard reads summary first and price levels as it zooms.
+    """
+    data_dir = data_dir or f"{ticker}_COMPLETE_DATA"
+    ticker_dir = os.path.join(out_dir, "tickers", ticker)
+    os.makedirs(ticker_dir, exist_ok=True)
+
+    metrics = _read_metrics_files(os.path.join(data_dir, "03_Calculated_Metrics"))
+    sector, industry = read_classification(data_dir)
+    summary = {
+        "ticker": ticker,
+        "SEC_Company_Info": _sec_info(os.path.join(data_dir, "01_Raw_JSON")),
+        "sector": sector,
+        "industry": industry,
+        **metrics
+    }
+    files = {"summary": os.path.basename(write_json(summary, os.path.join(ticker_dir, "summary.json"),
+                                                    compress=True))}
+    files["statements"] = os.path.basename(write_json(
+        statement_series(os.path.join(data_dir, "02_Financial_Statements")),
+        os.path.join(ticker_dir, "statements.json"), compress=True))
+
+    price_path = os.path.join(data_dir, "04_Market_Data", "Price_History.csv")
+    price_levels = {}
+    last_close = None
+    if os.path.exists(price_path):
+        history = pd.read_csv(price_path)
+        for bars, series in ohlc_levels(history, levels).items():
+            name = os.path.basename(write_json(series, os.path.join(ticker_dir, f"prices_{bars}.json"),
+                                               compress=True))
+            price_levels[bars] = {"file": name, "points": len(series["t"])}
+        if len(history):
+            last_close = _finite(float(history["Close"].iloc[-1]))
+
+    ratios = metrics.get("Financial_Ratios", {})
+    return {
+        "name": summary["SEC_Company_Info"].get("name"),
+        "sector": sector,
+        "industry": industry,
+        "last_close": last_close,
+        "pe_ratio": ratios.get("PE_Ratio"),
+        "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": files,
+        "prices": price_levels
+    }
+
+
+def _write_manifest(out_dir, entries):
+    manifest = {"generated": time.strftime("%Y-%m-%dT%H:%M:%S"), "zoom_levels": list(ZOOM_LEVELS),
+                "tickers": dict(sorted(entries.items()))}
+    # A unique temp file per writer, so concurrent exports never swap in each other's partial file
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix="manifest.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        # mkstemp creates the file owner-only; the dashboard is served to other users
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, os.path.join(out_dir, "manifest.json"))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def update_manifest(ticker, entry, out_dir=DASHBOARD_DIR):
+    """
+    Replace one ticker's entry in manifest.json.
+
+    The read-modify-write is not locked across processes; after a run
+    with several workers, build_manifest() reconciles it.
+    """
+    path = os.path.join(out_dir, "manifest.json")
+    entries = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            entries = json.load(f).get("tickers", {})
+    entries[ticker] = entry
+    _write_manifest(out_dir, entries)
+
+
+def build_manifest(data_root=".", out_dir=DASHBOARD_DIR, export=False):
+    """
+    Rewrite manifest.json from every exported ticker.
+
+    With export=True every *_COMPLETE_DATA directory under data_root is
+    exported first; otherwise existing entries are kept and tickers
+    exported without a manifest entry are re-exported.
+    """
+    path = os.path.join(out_dir, "manifest.json")
+    entries = {}
+    if os.path.exists(path) and not export:
+        with open(path) as f:
+            entries = json.load(f).get("tickers", {})
+    tickers_dir = os.path.join(out_dir, "tickers")
+    exported = set(os.listdir(tickers_dir)) if os.path.isdir(tickers_dir) else set()
+
+    for name in sorted(os.listdir(data_root)):
+        if not name.endswith("_COMPLETE_DATA"):
+            continue
+        ticker = name.replace("_COMPLETE_DATA", "")
+        if export or (ticker in exported and ticker not in entries):
+            entries[ticker] = export_ticker(ticker, os.path.join(data_root, name), out_dir)
+    entries = {ticker: entry for ticker, entry in entries.items() if ticker in exported or export}
+    os.makedirs(out_dir, exist_ok=True)
+    _write_manifest(out_dir, entries)
+    return len(entries)
@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 import pandas as pd
 from openpyxl import Workbook, load_workbook
+from instrumentation import TRACER
 
 
 class EXCEL_WALKER:
@@ -36,7 +37,9 @@ class EXCEL_WALKER:
             print(f"No CSV files found in {self.start_path}")
             return
             
-        self._add_csv_to_excel_sheet(csv_files)
+        with TRACER.stage("excel.walk"):
+            self._add_csv_to_excel_sheet(csv_files)
+        TRACER.count("excel.sheets", len(csv_files))
         
 
     def _add_csv_to_excel_sheet(self, csv_files):
@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+# Missing start/end/filed dates
+NO_DATE = np.iinfo(np.int32).min
+NO_YEAR = np.iinfo(np.int16).min
+
+COLUMNS = ["start", "end", "val", "accn", "fy", "fp", "form", "filed", "frame"]
+
+
+class FactTable:
+    """
+    Columnar, typed table of XBRL facts for one ticker or a whole universe.
+
+    Rows are sorted by (ticker, tag, end, filed) so every (ticker, tag)
+    pair is one contiguous slice. Dates are int32 days since 1970-01-01,
+    values float64, fiscal year int16, and tag/form/fp/frame/accession
+    are small integer codes into per-table dictionaries instead of
+    Python strings.
+    """
+
+    def __init__(self, columns, tags, forms, fps, frames, accessions, tickers=None):
+        self.columns = columns
+        self.tags = tags
+        self.forms = forms
+        self.fps = fps
+        self.frames = frames
+        self.accessions = accessions
+        self.tickers = tickers or [""]
+        self._build_offsets()
+
+    def _build_offsets(self):
+        """(ticker, tag) -> (start, stop) row range"""
+        keys = self.columns["ticker"].astype(np.int64) * len(self.tags) + self.columns["tag"]
+        if len(keys):
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            stops = np.r_[starts[1:], len(keys)]
+        else:
+            starts = stops = np.array([], dtype=np.int64)
+        self.offsets = {
+            (self.tickers[keys[s] // len(self.tags)], self.tags[keys[s] % len(self.tags)]): (s, e)
+            for s, e in zip(starts, stops)
+        }
+
+    # =====================================
+    # BUILDING
+    # =====================================
+
+    @classmethod
+    def from_xbrl(cls, xbrl, tags, unit="USD", ticker=""):
+        """
+        Build from a companyfacts payload in one pass over the facts.
+
+        tags maps our metric name to the us-gaap tag (e.g. FINANCIAL_TAGS);
+        the table is then sliced by metric name.
+        """
+        facts = xbrl.get("facts", {}).get("us-gaap", {})
+        names = [name for name, tag in tags.items() if tag in facts]
+
+        codes = {"form": {}, "fp": {}, "frame": {}, "accn": {}}
+        tag_col, vals, fys = [], [], []
+        starts, ends, fileds = [], [], []
+        coded = {key: [] for key in codes}
+
+        for code, name in enumerate(names):
+            for row in facts[tags[name]].get("units", {}).get(unit, []):
+                tag_col.append(code)
+                vals.append(row.get("val", np.nan))
+                fy = row.get("fy")
+                fys.append(NO_YEAR if fy is None else fy)
+                starts.append(row.get("start") or "NaT")
+                ends.append(row.get("end") or "NaT")
+                fileds.append(row.get("filed") or "NaT")
+                for key in codes:
+                    value = row.get(key)
+                    coded[key].append(codes[key].setdefault(value, len(codes[key])))
+
+        columns = {
+            "ticker": np.zeros(len(tag_col), dtype=np.int32),
+            "tag": np.array(tag_col, dtype=np.int16),
+            "start": _days(starts),
+            "end": _days(ends),
+            "filed": _days(fileds),
+            "val": np.array(vals, dtype=np.float64),
+            "fy": np.array(fys, dtype=np.int16),
+            "form": np.array(coded["form"], dtype=np.int16),
+            "fp": np.array(coded["fp"], dtype=np.int16),
+            "frame": np.array(coded["frame"], dtype=np.int32),
+            "accn": np.array(coded["accn"], dtype=np.int32)
+        }
+        order = np.lexsort((columns["filed"], columns["end"], columns["tag"]))
+        columns = {key: col[order] for key, col in columns.items()}
+        return cls(columns, names, list(codes["form"]), list(codes["fp"]),
+                   list(codes["frame"]), list(codes["accn"]), tickers=[ticker])
+
+    @classmethod
+    def concat(cls, tables):
+        """Merge per-ticker tables into one universe table, remapping every dictionary"""
+        merged = {"tags": {}, "forms": {}, "fps": {}, "frames": {}, "accessions": {}, "tickers": {}}
+        column_dict = {"tag": "tags", "form": "forms", "fp": "fps", "frame": "frames",
+                       "accn": "accessions", "ticker": "tickers"}
+        parts = {key: [] for key in tables[0].columns} if tables else {}
+
+        for table in tables:
+            for column, attr in column_dict.items():
+                lookup = merged[attr]
+                remap = np.array([lookup.setdefault(v, len(lookup)) for v in getattr(table, attr)],
+                                 dtype=table.columns[column].dtype)
+                parts[column].append(remap[table.columns[column]] if len(remap) else table.columns[column])
+            for column in table.columns:
+                if column not in column_dict:
+                    parts[column].append(table.columns[column])
+
+        columns = {key: np.concatenate(values) for key, values in parts.items()}
+        order = np.lexsort((columns["filed"], columns["end"], columns["tag"], columns["ticker"]))
+        columns = {key: col[order] for key, col in columns.items()}
+        return cls(columns, list(merged["tags"]), list(merged["forms"]), list(merged["fps"]),
+                   list(merged["frames"]), list(merged["accessions"]), tickers=list(merged["tickers"]))
+
+    # =====================================
+    # SLICING
+    # =====================================
+
+    def __len__(self):
+        return len(self.columns["val"])
+
+    def rows(self, tag, ticker=None, start=None, end=None, form=None):
+        """
+        Row indices for one tag, optionally limited to an end-date range and form.
+
+        The (ticker, tag) slice is found by offset lookup and the period by
+        binary search on the sorted end dates, so no full scan happens.
+        """
+        ticker = self.tickers[0] if ticker is None else ticker
+        lo, hi = self.offsets.get((ticker, tag), (0, 0))
+        if start is not None or end is not None:
+            ends = self.columns["end"][lo:hi]
+            if start is not None:
+                lo += int(np.searchsorted(ends, _day(start), side="left"))
+            if end is not None:
+                hi = lo + int(np.searchsorted(self.columns["end"][lo:hi], _day(end), side="right"))
+        index = np.arange(lo, hi)
+        if form is not None:
+            if form not in self.forms:
+                return index[:0]
+            index = index[self.columns["form"][lo:hi] == self.forms.index(form)]
+        return index
+
+    def values(self, tag, **filters):
+        return self.columns["val"][self.rows(tag, **filters)]
+
+    def latest(self, tag, ticker=None, form=None):
+        """Value with the latest period end (latest filing wins ties)"""
+        index = self.rows(tag, ticker=ticker, form=form)
+        return float(self.columns["val"][index[-1]]) if len(index) else None
+
+    def to_frame(self, tag, **filters):
+        """Decode a slice back into the DataFrame layout parse_financial_statements produces"""
+        index = self.rows(tag, **filters)
+        cols = self.columns
+        frame = pd.DataFrame({
+            "start": _dates(cols["start"][index]),
+            "end": _dates(cols["end"][index]),
+            "val": cols["val"][index],
+            "accn": np.array(self.accessions, dtype=object)[cols["accn"][index]] if self.accessions else [],
+            "fy": np.where(cols["fy"][index] == NO_YEAR, np.nan, cols["fy"][index]),
+            "fp": np.array(self.fps, dtype=object)[cols["fp"][index]] if self.fps else [],
+            "form": np.array(self.forms, dtype=object)[cols["form"][index]] if self.forms else [],
+            "filed": _dates(cols["filed"][index]),
+            "frame": np.array(self.frames, dtype=object)[cols["frame"][index]] if self.frames else []
+        })
+        return frame[[c for c in COLUMNS if frame[c].notna().any()] or COLUMNS]
+
+    def to_frames(self, ticker=None):
+        """dict of tag -> DataFrame for one ticker, like parse_financial_statements"""
+        ticker = self.tickers[0] if ticker is None else ticker
+        return {tag: self.to_frame(tag, ticker=ticker) for (t, tag) in self.offsets if t == ticker}
+
+    def nbytes(self):
+        """Bytes held by the columns plus the string dictionaries"""
+        strings = sum(len(str(s)) + 49 for d in (self.tags, self.forms, self.fps, self.frames,
+                                                 self.accessions, self.tickers) for s in d)
+        return sum(col.nbytes for col in self.columns.values()) + strings
+
+
+def _days(values):
+    days = np.array(values, dtype="datetime64[D]").astype(np.int64)
+    days[days == np.iinfo(np.int64).min] = NO_DATE
+    return days.astype(np.int32)
+
+
+def _day(value):
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+def _dates(days):
+    out = days.astype("datetime64[D]").astype(object)
+    out[days == NO_DATE] = None
+    return [None if d is None else d.isoformat() for d in out]
+
+
+def measure_memory(xbrl, tags):
+    """Compare the dict-of-DataFrames from parse_financial_statements with a FactTable"""
+    frames = {}
+    facts = xbrl.get("facts", {}).get("us-gaap", {})
+    for name, tag in tags.items():
+        if tag in facts:
+            df = pd.DataFrame(facts[tag].get("units", {}).get("USD", []))
+            if not df.empty:
+                frames[name] = df
+    frame_bytes = sum(df.memory_usage(deep=True).sum() for df in frames.values())
+    table = FactTable.from_xbrl(xbrl, tags)
+    table_bytes = table.nbytes()
+    result = {
+        "rows": len(table),
+        "dataframes_mb": frame_bytes / 1e6,
+        "fact_table_mb": table_bytes / 1e6,
+        "reduction": frame_bytes / table_bytes if table_bytes else None
+    }
+    print(f"{result['rows']} facts: DataFrames {result['dataframes_mb']:.2f} MB, "
+          f"FactTable {result['fact_table_mb']:.2f} MB ({result['reduction']:.1f}x smaller)")
+    return result
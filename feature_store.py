@@ -0,0 +1,427 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from covariance import price_files
+from kernels import rolling_moment
+
+FEATURE_CACHE = "feature_cache"
+
+BAR_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+RETURN_HORIZONS = (1, 5, 21, 63)
+
+FEATURES = tuple(f"ret_{h}" for h in RETURN_HORIZONS) + (
+    "rsi_14", "macd", "macd_signal", "macd_hist", "atr_14", "volume_z_20", "dist_ma50", "dist_ma200"
+)
+
+# Exponential averages carried from one bar to the next (see _recursive_features)
+STATE = ("ema_12", "ema_26", "macd_signal", "avg_gain", "avg_loss", "atr")
+
+# Rows recomputed before the first new bar: longer than every window and return horizon
+WARMUP = 256
+
+# Spare rows allocated after a full build, so daily appends rarely grow the files
+ROW_SLACK = 256
+
+
+def _parse_bars(source):
+    """Date and OHLCV columns of a price CSV, one row per day"""
+    df = pd.read_csv(source, usecols=["Date", *BAR_FIELDS])
+    df["Date"] = pd.to_datetime(df["Date"].astype(str).str[:10])
+    return df.drop_duplicates("Date", keep="last")
+
+
+def _days(df):
+    # pandas stores datetime columns in seconds or nanoseconds; the cache counts days
+    return df["Date"].to_numpy().astype("datetime64[D]")
+
+
+def _read_tail(path, since, chunk=1 << 16):
+    """
+    Rows of a price CSV dated on or after since, reading back from the end.
+
+    Histories are written in date order, so the read stops at the first
+    chunk that reaches a day before since; the cost is the tail, not the
+    whole file.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        body = f.tell()
+        offset = os.fstat(f.fileno()).st_size
+        while True:
+            offset = max(body, offset - chunk)
+            f.seek(offset)
+            data = f.read()
+            if offset > body:
+                # Drop the line the chunk starts inside of
+                data = data[data.find(b"\n") + 1:] if b"\n" in data else b""
+            df = _parse_bars(io.BytesIO(header + data))
+            if offset == body or (len(df) and df["Date"].min() <= since):
+                return df[df["Date"] >= since]
+            chunk *= 2
+
+
+def _place(frames, dates, n_tickers):
+    """(fields x dates x tickers) array with each {column: frame} row on its date"""
+    bars = np.full((len(BAR_FIELDS), len(dates), n_tickers), np.nan)
+    for j, df in frames.items():
+        rows = np.searchsorted(dates, _days(df))
+        bars[:, rows, j] = df[list(BAR_FIELDS)].to_numpy(dtype=np.float64).T
+    return bars
+
+
+def load_bars(files):
+    """(dates, bars): the union of trading days and a (fields x days x tickers) OHLCV array"""
+    frames = [_parse_bars(path) for path in files.values()]
+    dates = np.unique(np.concatenate([_days(df) for df in frames] or
+                                     [np.array([], dtype="datetime64[D]")]))
+    return dates, _place(dict(enumerate(frames)), dates, len(frames))
+
+
+def _stat(path):
+    info = os.stat(path)
+    return [info.st_mtime_ns, info.st_size]
+
+
+def _ewm_step(state, value, alpha):
+    """One bar of an exponential average that skips missing values (pandas ewm adjust=False, ignore_na=True)"""
+    updated = np.where(np.isnan(state), value, alpha * value + (1 - alpha) * state)
+    return np.where(np.isnan(value), state, updated)
+
+
+def _recursive_features(bars, start, state):
+    """RSI, MACD and ATR for rows [start, days), continuing from state; returns (features, state)"""
+    _, high, low, close, _ = bars
+    n_rows, n_tickers = close.shape[0] - start, close.shape[1]
+    out = {name: np.empty((n_rows, n_tickers)) for name in ("rsi_14", "macd", "macd_signal", "atr_14")}
+    ema_12, ema_26, signal, avg_gain, avg_loss, atr = state
+    missing = np.full(n_tickers, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for i, row in enumerate(range(start, close.shape[0])):
+            price = close[row]
+            previous = close[row - 1] if row else missing
+            ema_12 = _ewm_step(ema_12, price, 2 / 13)
+            ema_26 = _ewm_step(ema_26, price, 2 / 27)
+            macd = ema_12 - ema_26
+            signal = _ewm_step(signal, macd, 2 / 10)
+            delta = price - previous
+            avg_gain = _ewm_step(avg_gain, np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)),
+                                 1 / 14)
+            avg_loss = _ewm_step(avg_loss, np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0)),
+                                 1 / 14)
+            # True range; fmax ignores the missing previous close on a ticker's first bar
+            true_range = np.fmax(high[row] - low[row],
+                                 np.fmax(np.abs(high[row] - previous), np.abs(low[row] - previous)))
+            atr = _ewm_step(atr, true_range, 1 / 14)
+            out["rsi_14"][i] = 100 - 100 / (1 + avg_gain / avg_loss)
+            out["macd"][i] = macd
+            out["macd_signal"][i] = signal
+            out["atr_14"][i] = atr
+    out["macd_hist"] = out["macd"] - out["macd_signal"]
+    return out, np.stack([ema_12, ema_26, signal, avg_gain, avg_loss, atr])
+
+
+def _window_features(bars, start):
+    """Return-horizon, moving-average and volume features for rows [start, days)"""
+    lo = max(0, start - WARMUP)
+    close, volume = bars[3, lo:], bars[4, lo:]
+    out = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for h in RETURN_HORIZONS:
+            ret = np.full(close.shape, np.nan)
+            ret[h:] = close[h:] / close[:-h] - 1
+            out[f"ret_{h}"] = ret
+        for window in (50, 200):
+            out[f"dist_ma{window}"] = close / rolling_moment(close, window, "mean") - 1
+        std = rolling_moment(volume, 20, "std")
+        out["volume_z_20"] = np.where(std > 0, (volume - rolling_moment(volume, 20, "mean")) / std, np.nan)
+    return {name: values[start - lo:] for name, values in out.items()}
+
+
+class FeatureStore:
+    """
+    Technical features for every saved ticker, as (days x tickers) columns.
+
+    Each feature in FEATURES is one .npy matrix in cache_dir, computed
+    across all tickers at once, with spare rows at the end; meta.json
+    records how many rows are filled. update() only reads the price
+    histories whose size or modification time changed, and only their
+    tails: when those tails agree with the last WARMUP cached bars, the
+    new days are computed from the cached bars and the stored state of
+    the exponential averages and written after the filled rows, so the
+    result matches a full rebuild (rolling windows to rounding) and a new
+    bar costs its own rows. A revised history or a different ticker set
+    rebuilds.
+
+    version changes whenever update() adds or recomputes rows; readers
+    can pass it to detect a changed store.
+    """
+
+    def __init__(self, data_root=".", cache_dir=FEATURE_CACHE):
+        self.data_root = data_root
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.meta = self._read_meta()
+
+    # =====================================
+    # CACHE
+    # =====================================
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.npy")
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.cache_dir, "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        # A unique temp file per writer, so two updates never swap in each other's partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix="meta.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, os.path.join(self.cache_dir, "meta.json"))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.meta = meta
+
+    def _save(self, name, array):
+        tmp_path = self._path(f"{name}.new")
+        np.save(tmp_path, array)
+        os.replace(tmp_path, self._path(name))
+
+    @property
+    def tickers(self):
+        return self.meta["tickers"] if self.meta else []
+
+    @property
+    def version(self):
+        return self.meta["version"] if self.meta else None
+
+    @staticmethod
+    def _version(previous, tickers, dates, bars):
+        """Hash of the previous version and the rows an update added"""
+        digest = hashlib.sha1((previous or "").encode())
+        digest.update(json.dumps(tickers).encode())
+        digest.update(np.ascontiguousarray(dates.astype("datetime64[D]").astype(np.int64)))
+        digest.update(np.ascontiguousarray(bars))
+        return digest.hexdigest()[:16]
+
+    def _write(self, name, new_rows, start):
+        """
+        Store new_rows at rows [start, start + len(new_rows)) of a preallocated matrix.
+
+        Rows before start are kept. A full build (start 0) or an append
+        past the spare rows writes a new file with room to spare and swaps
+        it in; otherwise the rows are written in place after the filled
+        ones, which readers (bounded by meta rows) never look at.
+        """
+        end = start + len(new_rows)
+        matrix = np.load(self._path(name), mmap_mode="r+") if start else None
+        if matrix is None or end > len(matrix):
+            tmp_path = self._path(f"{name}.new")
+            grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=new_rows.dtype,
+                                              shape=(end + max(ROW_SLACK, start),) + new_rows.shape[1:])
+            if start:
+                grown[:start] = matrix[:start]
+            grown.flush()
+            del grown, matrix
+            os.replace(tmp_path, self._path(name))
+            matrix = np.load(self._path(name), mmap_mode="r+")
+        matrix[start:end] = new_rows
+        matrix.flush()
+
+    def _filled(self, name):
+        return np.load(self._path(name), mmap_mode="r")[:self.meta["rows"]]
+
+    # =====================================
+    # BUILDING
+    # =====================================
+
+    def update(self, rebuild=False):
+        """
+        Bring the features up to date with the saved price histories.
+
+        Returns a summary with the mode used (full, incremental or
+        unchanged), tickers, rows computed, version and seconds.
+        """
+        start_time = time.perf_counter()
+        files = price_files(self.data_root)
+        tickers = list(files)
+        stats = {ticker: _stat(path) for ticker, path in files.items()}
+
+        meta = self.meta
+        appendable = (not rebuild and meta is not None and meta.get("state") == "ready"
+                      and meta.get("files") is not None and meta["tickers"] == tickers and meta["rows"] > 0)
+        new = None
+        if appendable:
+            changed = [ticker for ticker in tickers if stats[ticker] != meta["files"][ticker]]
+            new = self._new_rows(files, changed) if changed else (np.array([], dtype="datetime64[D]"), None)
+
+        if new is not None and not len(new[0]):
+            if stats != meta["files"]:
+                # Rewritten with the same bars: remember the new stats so the next update skips them
+                self._write_meta({**meta, "files": stats})
+            return {"mode": "unchanged", "tickers": len(tickers), "rows": 0, "version": meta["version"],
+                    "seconds": time.perf_counter() - start_time}
+
+        if new is not None:
+            new_dates, new_bars = new
+            tail = np.load(self._path("tail"))
+            bars = np.concatenate([tail, new_bars], axis=1)
+            start, offset, state = tail.shape[1], meta["rows"], np.load(self._path("state"))
+            previous = meta["version"]
+        else:
+            new_dates, bars = load_bars(files)
+            new_bars, start, offset = bars, 0, 0
+            state = np.full((len(STATE), len(tickers)), np.nan)
+            previous = None
+
+        features, state = _recursive_features(bars, start, state)
+        features.update(_window_features(bars, start))
+        no_bar = np.isnan(bars[3, start:])
+
+        self._write_meta({**(meta if new is not None else {}), "state": "updating", "tickers": tickers,
+                          "rows": offset})
+        for name in FEATURES:
+            values = features[name]
+            values[no_bar] = np.nan
+            self._write(name, values, offset)
+        self._write("dates", new_dates.astype("datetime64[D]").astype(np.int64), offset)
+        self._save("state", state)
+        self._save("tail", bars[:, -WARMUP:])
+        version = self._version(previous, tickers, new_dates, new_bars)
+        rows = offset + len(new_dates)
+        self._write_meta({"state": "ready", "tickers": tickers, "rows": rows, "features": list(FEATURES),
+                          "files": stats, "version": version, "updated_at": time.time()})
+
+        summary = {"mode": "incremental" if offset else "full", "tickers": len(tickers),
+                   "rows": len(new_dates), "version": version, "seconds": time.perf_counter() - start_time}
+        print(f"🧩 Feature store {summary['mode']}: {summary['tickers']} tickers, {summary['rows']} days, "
+              f"version {version} ({summary['seconds']:.1f}s)")
+        return summary
+
+    def _new_rows(self, files, changed):
+        """
+        (dates, bars) after the last cached day, read from the tails of the changed histories.
+
+        Returns None when a changed history no longer matches the cached
+        tail (revised or back-filled prices), which needs a full rebuild.
+        """
+        tail = np.load(self._path("tail"))
+        tail_dates = self._filled("dates")[-tail.shape[1]:].astype("datetime64[D]")
+        last = tail_dates[-1]
+        position = {ticker: j for j, ticker in enumerate(self.meta["tickers"])}
+
+        frames = {}
+        for ticker in changed:
+            df = _read_tail(files[ticker], tail_dates[0])
+            cached = df[df["Date"] <= last]
+            if not np.isin(_days(cached), tail_dates).all():
+                return None
+            j = position[ticker]
+            if not np.array_equal(_place({0: cached}, tail_dates, 1)[:, :, 0], tail[:, :, j], equal_nan=True):
+                return None
+            frames[j] = df[df["Date"] > last]
+
+        dates = np.unique(np.concatenate([_days(df) for df in frames.values()]))
+        return dates, _place(frames, dates, len(position))
+
+    # =====================================
+    # QUERIES
+    # =====================================
+
+    def _check(self, version):
+        if self.meta is None or self.meta.get("state") != "ready":
+            raise RuntimeError("Feature store is empty or mid-update; run update() first")
+        if version is not None and version != self.meta["version"]:
+            raise ValueError(f"Feature store is at version {self.meta['version']}, not {version}")
+
+    def _dates(self):
+        return pd.DatetimeIndex(np.asarray(self._filled("dates")).astype("datetime64[D]"))
+
+    def matrix(self, feature, tickers=None, version=None):
+        """One feature as a dates x tickers DataFrame"""
+        self._check(version)
+        names = list(tickers) if tickers else self.tickers
+        position = {ticker: i for i, ticker in enumerate(self.tickers)}
+        values = self._filled(feature)
+        return pd.DataFrame(np.asarray(values[:, [position[t] for t in names]]), index=self._dates(),
+                            columns=names)
+
+    def frame(self, ticker, features=None, version=None):
+        """One ticker's features as a dates x features DataFrame"""
+        self._check(version)
+        column = self.tickers.index(ticker)
+        features = list(features or FEATURES)
+        return pd.DataFrame({name: np.asarray(self._filled(name)[:, column]) for name in features},
+                            index=self._dates())
+
+
+# =====================================
+# SELF-CHECK
+# =====================================
+
+def _write_history(path, dates, bars):
+    df = pd.DataFrame(bars, columns=list(BAR_FIELDS))
+    df.insert(0, "Date", [f"{d} 00:00:00-05:00" for d in dates])
+    df.to_csv(path, index=False)
+
+
+def self_check(days=600, tickers=3, seed=2022):
+    """
+    Build a store from synthetic histories, append one bar and compare with a full rebuild.
+
+    Raises RuntimeError when the append does not run incrementally, the
+    dates differ from the CSVs, or any feature differs from the rebuild
+    by more than rounding. Returns the largest difference.
+    """
+    rng = np.random.default_rng(seed)
+    dates = np.array(pd.bdate_range("2015-01-02", periods=days + 1).date.astype(str))
+    with tempfile.TemporaryDirectory() as root:
+        paths, histories = {}, {}
+        for i in range(tickers):
+            close = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, days + 1)))
+            spread = close * rng.uniform(0.001, 0.02, days + 1)
+            histories[i] = np.column_stack([close + rng.normal(0, 1, days + 1) * spread / 2, close + spread,
+                                            close - spread, close, rng.integers(1e5, 1e7, days + 1)])
+            folder = os.path.join(root, f"T{i}_COMPLETE_DATA", "04_Market_Data")
+            os.makedirs(folder)
+            paths[i] = os.path.join(folder, "Price_History.csv")
+            _write_history(paths[i], dates[:-1], histories[i][:-1])
+
+        store = FeatureStore(root, os.path.join(root, "cache"))
+        store.update()
+        for i in range(tickers):
+            _write_history(paths[i], dates, histories[i])
+        summary = store.update()
+        if summary["mode"] != "incremental" or summary["rows"] != 1:
+            raise RuntimeError(f"Appending one bar ran {summary['mode']} over {summary['rows']} rows")
+        expected = pd.DatetimeIndex(pd.to_datetime(dates))
+        if not store.frame("T0").index.equals(expected):
+            raise RuntimeError(f"Store dates {store.frame('T0').index[[0, -1]]} differ from the CSV dates")
+
+        rebuilt = FeatureStore(root, os.path.join(root, "rebuilt"))
+        rebuilt.update()
+        worst = 0.0
+        for name in FEATURES:
+            a, b = store.matrix(name).to_numpy(), rebuilt.matrix(name).to_numpy()
+            if not np.array_equal(np.isnan(a), np.isnan(b)):
+                raise RuntimeError(f"{name}: missing values differ from a full rebuild")
+            scale = np.maximum(np.abs(b), 1.0)
+            worst = max(worst, float(np.nanmax(np.abs(a - b) / scale, initial=0.0)))
+        if worst > 1e-9:
+            raise RuntimeError(f"Incremental features differ from a full rebuild by {worst:.2e}")
+    print(f"🧩 Feature store check passed: incremental append, CSV dates, max relative diff {worst:.1e}")
+    return worst
@@ -0,0 +1,124 @@
+import gzip
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from filing_text import stream_document_text
+from lazy import lazy_import
+
+requests = lazy_import("requests")
+
+ARCHIVE_DIR = "filing_archive"
+ARCHIVE_FORMS = ("10-K", "10-Q")
+
+# SEC fair-access policy allows at most 10 requests per second
+SEC_REQUESTS_PER_SECOND = 10
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls evenly to stay under a requests/second budget"""
+
+    def __init__(self, rate=SEC_REQUESTS_PER_SECOND):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _rows(block):
+    """Yield one dict per filing from a columnar submissions block"""
+    keys = ["form", "accessionNumber", "primaryDocument", "filingDate", "reportDate"]
+    columns = [block.get(key, []) for key in keys]
+    for values in zip(*columns):
+        yield dict(zip(keys, values))
+
+
+def list_filings(company_data, headers, forms=ARCHIVE_FORMS, limiter=None):
+    """List every filing of the given forms, including the paged filings.files shards"""
+    limiter = limiter or RateLimiter()
+    filings = company_data.get("filings", {})
+    blocks = [filings.get("recent", {})]
+
+    for shard in filings.get("files", []):
+        limiter.wait()
+        response = requests.get(f"https://data.sec.gov/submissions/{shard['name']}", headers=headers)
+        response.raise_for_status()
+        blocks.append(response.json())
+
+    seen = set()
+    matches = []
+    for block in blocks:
+        for row in _rows(block):
+            if row["form"] in forms and row["accessionNumber"] not in seen:
+                seen.add(row["accessionNumber"])
+                matches.append(row)
+    return sorted(matches, key=lambda row: row["filingDate"], reverse=True)
+
+
+def filing_path(archive_dir, ticker, filing):
+    """Location of the compressed text for one filing"""
+    form = filing["form"].replace("/", "-")
+    name = f"{filing['filingDate']}_{form}_{filing['accessionNumber'].replace('-', '')}.txt.gz"
+    return os.path.join(archive_dir, ticker, name)
+
+
+def archive_filings(ticker, cik, company_data, headers, forms=ARCHIVE_FORMS,
+                    archive_dir=ARCHIVE_DIR, max_workers=8, limiter=None):
+    """
+    Download every matching filing's primary document as gzipped text.
+
+    Downloads run on a thread pool; every request goes through one shared
+    RateLimiter so the pool as a whole stays under the SEC limit. Filings
+    already present on disk are skipped, and a manifest.json listing all
+    archived filings is written per ticker.
+    """
+    limiter = limiter or RateLimiter()
+    filings = list_filings(company_data, headers, forms, limiter)
+    os.makedirs(os.path.join(archive_dir, ticker), exist_ok=True)
+
+    pending = [f for f in filings if not os.path.exists(filing_path(archive_dir, ticker, f))]
+    print(f"📚 {ticker}: {len(filings)} filings, {len(filings) - len(pending)} already archived")
+
+    def download(filing):
+        limiter.wait()
+        text = stream_document_text(cik, filing["accessionNumber"], filing["primaryDocument"], headers)
+        path = filing_path(archive_dir, ticker, filing)
+        # Write to a temp file first so a killed run never leaves a truncated archive entry
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return filing
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(download, filing): filing for filing in pending}
+        for future in as_completed(futures):
+            filing = futures[future]
+            try:
+                future.result()
+                print(f"   ✓ {filing['form']} {filing['filingDate']}")
+            except Exception as e:
+                failed.append(filing)
+                print(f"   ✗ {filing['form']} {filing['filingDate']}: {e}")
+
+    manifest = [dict(f, path=filing_path(archive_dir, ticker, f)) for f in filings if f not in failed]
+    with open(os.path.join(archive_dir, ticker, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def read_filing_text(path):
+    """Read an archived filing back as text"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.read()
@@ -0,0 +1,340 @@
+import glob
+import os
+import re
+import sqlite3
+import time
+from collections import defaultdict
+
+from filing_text import split_sections
+from filing_archive import ARCHIVE_DIR, read_filing_text
+
+INDEX_PATH = "filing_index.db"
+
+TOKEN = re.compile(r"[a-z0-9]+")
+QUERY_TOKEN = re.compile(r'"[^"]*"|\(|\)|-?[^\s()"]+')
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+# =====================================
+# POSTINGS ENCODING
+# =====================================
+# term_postings holds one row per (term_id, doc_id), clustered by term
+# (WITHOUT ROWID), with the term's positions in that document as
+# delta-encoded varints. Terms are interned in the terms table, so a row
+# key is two small integers, which SQLite already stores as 1-4 byte
+# varints. Doc ids are left as keys rather than packed into delta-encoded
+# blocks: boolean queries then only touch the keys, so SQLite intersects
+# and unions them with index seeks, and adding a filing appends rows
+# instead of rewriting every touched term's block. Positions are read and
+# decoded only for phrase candidates.
+
+def _encode_varint(value, out):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_positions(positions):
+    out = bytearray()
+    previous = 0
+    for pos in positions:
+        _encode_varint(pos - previous, out)
+        previous = pos
+    return bytes(out)
+
+
+def decode_positions(data):
+    """Decode a delta-encoded varint blob into a list of positions"""
+    positions = []
+    pos = value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        pos += value
+        positions.append(pos)
+        value = shift = 0
+    return positions
+
+
+class FilingIndex:
+    """
+    On-disk inverted index over filing text, one document per filing section.
+
+    Supports incremental add/update per filing: re-adding a filing whose
+    source changed tombstones its old documents and adds new postings.
+    compact() deletes the tombstoned documents' postings. Queries are
+    compiled to SQL so set operations run inside SQLite.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        old_blobs = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'postings'").fetchone()
+        old_terms = self.conn.execute(
+            "SELECT 1 FROM pragma_table_info('term_postings') WHERE name = 'term'").fetchone()
+        if old_blobs or old_terms:
+            # Concatenated per-term blobs or uninterned terms from earlier versions: rebuild on the next build()
+            print("🔎 Filing index uses an old postings layout; it will be rebuilt")
+            self.conn.executescript("DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS term_postings; "
+                                    "DROP TABLE IF EXISTS docs; DROP TABLE IF EXISTS sources;")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                doc_id INTEGER PRIMARY KEY,
+                ticker TEXT, filing TEXT, section TEXT,
+                deleted INTEGER DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS docs_filing ON docs (ticker, filing);
+            CREATE TABLE IF NOT EXISTS terms (
+                term_id INTEGER PRIMARY KEY,
+                term TEXT UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS term_postings (
+                term_id INTEGER, doc_id INTEGER, positions BLOB,
+                PRIMARY KEY (term_id, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS term_postings_doc ON term_postings (doc_id);
+            CREATE TABLE IF NOT EXISTS sources (
+                ticker TEXT, filing TEXT, signature TEXT,
+                PRIMARY KEY (ticker, filing)
+            );
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    # =====================================
+    # BUILDING
+    # =====================================
+
+    def add_filing(self, ticker, filing, sections, signature=None):
+        """Add or replace one filing; sections maps section name to text"""
+        cur = self.conn.cursor()
+        cur.execute("UPDATE docs SET deleted = 1 WHERE ticker = ? AND filing = ?", (ticker, filing))
+
+        for section, text in sections.items():
+            cur.execute("INSERT INTO docs (ticker, filing, section) VALUES (?, ?, ?)",
+                        (ticker, filing, section))
+            doc_id = cur.lastrowid
+
+            positions = defaultdict(list)
+            for pos, term in enumerate(tokenize(text)):
+                positions[term].append(pos)
+
+            cur.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", ((term,) for term in positions))
+            cur.executemany(
+                "INSERT INTO term_postings (term_id, doc_id, positions) "
+                "SELECT term_id, ?, ? FROM terms WHERE term = ?",
+                ((doc_id, encode_positions(pos), term) for term, pos in positions.items())
+            )
+
+        cur.execute("INSERT OR REPLACE INTO sources (ticker, filing, signature) VALUES (?, ?, ?)",
+                    (ticker, filing, signature))
+        self.conn.commit()
+
+    def add_text_file(self, ticker, filing, path):
+        """Index a stored filing text file, skipping it when unchanged since the last build"""
+        stat = os.stat(path)
+        signature = f"{stat.st_size}:{int(stat.st_mtime)}"
+        row = self.conn.execute("SELECT signature FROM sources WHERE ticker = ? AND filing = ?",
+                                (ticker, filing)).fetchone()
+        if row and row[0] == signature:
+            return False
+
+        if path.endswith(".gz"):
+            text = read_filing_text(path)
+        else:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        sections = split_sections(text) or {"Full": text}
+        self.add_filing(ticker, filing, sections, signature)
+        return True
+
+    def build(self, data_root=".", archive_dir=ARCHIVE_DIR):
+        """Index every Latest_10K.txt under *_COMPLETE_DATA and every archived filing"""
+        start = time.perf_counter()
+        added = skipped = 0
+
+        for path in glob.glob(os.path.join(data_root, "*_COMPLETE_DATA", "05_Filing_Text", "Latest_10K.txt")):
+            ticker = os.path.basename(os.path.dirname(os.path.dirname(path))).replace("_COMPLETE_DATA", "")
+            if self.add_text_file(ticker, "Latest_10K", path):
+                added += 1
+            else:
+                skipped += 1
+
+        for path in glob.glob(os.path.join(data_root, archive_dir, "*", "*.txt.gz")):
+            ticker = os.path.basename(os.path.dirname(path))
+            filing = os.path.basename(path)[:-len(".txt.gz")]
+            if self.add_text_file(ticker, filing, path):
+                added += 1
+            else:
+                skipped += 1
+
+        print(f"🔎 Indexed {added} filings ({skipped} unchanged) in {time.perf_counter() - start:.1f}s")
+        return added
+
+    def compact(self):
+        """Delete tombstoned documents and their postings"""
+        cur = self.conn.cursor()
+        cur.execute("DELETE FROM term_postings WHERE doc_id IN (SELECT doc_id FROM docs WHERE deleted = 1)")
+        if not cur.rowcount:
+            return
+        cur.execute("DELETE FROM docs WHERE deleted = 1")
+        self.conn.commit()
+        self.conn.execute("VACUUM")
+
+    # =====================================
+    # QUERYING
+    # =====================================
+    # Each query node compiles to (SELECT doc_id ..., params). Phrases are
+    # checked in Python against the positions of the documents that hold
+    # every term, and their matches go into a temporary table.
+
+    ALL_DOCS = ("SELECT doc_id FROM docs WHERE deleted = 0", [])
+    NO_DOCS = ("SELECT doc_id FROM docs WHERE 0", [])
+
+    @staticmethod
+    def _combine(op, left, right):
+        return (f"SELECT doc_id FROM ({left[0]}) {op} SELECT doc_id FROM ({right[0]})", left[1] + right[1])
+
+    def _term(self, term):
+        return ("SELECT doc_id FROM term_postings "
+                "WHERE term_id = (SELECT term_id FROM terms WHERE term = ?)", [term])
+
+    def _phrase(self, terms):
+        if not terms:
+            return self.NO_DOCS
+        candidates = self._term(terms[0])
+        for term in terms[1:]:
+            candidates = self._combine("INTERSECT", candidates, self._term(term))
+        if len(terms) == 1:
+            return candidates
+
+        positions = defaultdict(dict)
+        distinct = sorted(set(terms))
+        rows = self.conn.execute(
+            f"SELECT term, doc_id, positions FROM term_postings JOIN terms USING (term_id) "
+            f"WHERE term IN ({','.join('?' * len(distinct))}) AND doc_id IN ({candidates[0]})",
+            distinct + candidates[1]
+        )
+        for term, doc_id, data in rows:
+            positions[doc_id][term] = decode_positions(data)
+
+        matches = []
+        for doc_id, by_term in positions.items():
+            starts = set(by_term[terms[0]])
+            for offset, term in enumerate(terms[1:], start=1):
+                starts &= {pos - offset for pos in by_term[term]}
+                if not starts:
+                    break
+            if starts:
+                matches.append(doc_id)
+
+        self._phrases += 1
+        self.conn.executemany("INSERT INTO temp.phrase_hits VALUES (?, ?)",
+                              ((self._phrases, doc_id) for doc_id in matches))
+        return "SELECT doc_id FROM temp.phrase_hits WHERE phrase = ?", [self._phrases]
+
+    def search(self, query):
+        """
+        Run a boolean/phrase query and return matching sections.
+
+        Terms next to each other are ANDed; OR, NOT (or a leading -) and
+        parentheses are supported, and "quoted text" matches a phrase.
+        Example: "supply chain" AND (tariff OR sanctions) -china
+
+        Raises ValueError for a malformed query (an operator with nothing
+        after it, an unmatched parenthesis).
+        """
+        start = time.perf_counter()
+        tokens = QUERY_TOKEN.findall(query)
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS phrase_hits (phrase INTEGER, doc_id INTEGER)")
+        self.conn.execute("DELETE FROM temp.phrase_hits")
+        self._phrases = 0
+        pos = 0
+
+        def peek():
+            return tokens[pos] if pos < len(tokens) else None
+
+        def parse_or():
+            nonlocal pos
+            result = parse_and()
+            while peek() and peek().upper() == "OR":
+                pos += 1
+                result = self._combine("UNION", result, parse_and())
+            return result
+
+        def parse_and():
+            nonlocal pos
+            result = parse_not()
+            while peek() and peek() != ")" and peek().upper() != "OR":
+                if peek().upper() == "AND":
+                    pos += 1
+                result = self._combine("INTERSECT", result, parse_not())
+            return result
+
+        def parse_not():
+            nonlocal pos
+            token = peek()
+            if token and token.upper() == "NOT":
+                pos += 1
+                return self._combine("EXCEPT", self.ALL_DOCS, parse_not())
+            if token == "-":
+                pos += 1
+                return self._combine("EXCEPT", self.ALL_DOCS, parse_not())
+            if token and token.startswith("-"):
+                tokens[pos] = token[1:]
+                return self._combine("EXCEPT", self.ALL_DOCS, parse_not())
+            return parse_atom()
+
+        def parse_atom():
+            nonlocal pos
+            token = peek()
+            if token is None:
+                raise ValueError(f"Query ends after an operator: {query!r}")
+            if token == ")" or token.upper() in ("AND", "OR"):
+                raise ValueError(f"Expected a term before {token!r} in {query!r}")
+            pos += 1
+            if token == "(":
+                result = parse_or()
+                if peek() != ")":
+                    raise ValueError(f"Missing ')' in {query!r}")
+                pos += 1
+                return result
+            if token.startswith('"'):
+                return self._phrase(tokenize(token.strip('"')))
+            return self._phrase(tokenize(token))
+
+        sql, params = parse_or() if tokens else self.NO_DOCS
+        if pos < len(tokens):
+            raise ValueError(f"Unexpected {tokens[pos]!r} in {query!r}")
+        rows = self.conn.execute(
+            f"SELECT doc_id, ticker, filing, section FROM docs "
+            f"WHERE deleted = 0 AND doc_id IN ({sql}) ORDER BY ticker, filing, section",
+            params
+        ).fetchall()
+
+        hits = [{"ticker": ticker, "filing": filing, "section": section}
+                for _, ticker, filing, section in rows]
+        self.last_query_ms = (time.perf_counter() - start) * 1000
+        return hits
+
+
+if __name__ == "__main__":
+    import sys
+
+    index = FilingIndex()
+    index.build()
+    if len(sys.argv) > 1:
+        query = " ".join(sys.argv[1:])
+        hits = index.search(query)
+        for hit in hits:
+            print(f"{hit['ticker']:8} {hit['filing']:40} {hit['section']}")
+        print(f"{len(hits)} hits in {index.last_query_ms:.1f} ms")
+    index.close()
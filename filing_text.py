@@ -0,0 +1,213 @@
+import codecs
+import json
+import os
+import re
+import time
+from html.parser import HTMLParser
+
+from instrumentation import TRACER
+from lazy import lazy_import
+
+requests = lazy_import("requests")
+
+# Tags whose content never belongs in the filing text
+SKIP_TAGS = {"script", "style", "head", "title", "ix:header", "ix:hidden", "xbrli:context",
+             "xbrli:unit", "ix:references", "ix:resources"}
+
+# Tags that end a line of text
+BLOCK_TAGS = {"p", "div", "br", "tr", "li", "table", "h1", "h2", "h3", "h4", "h5", "h6",
+              "section", "article", "ul", "ol", "hr", "center", "blockquote", "pre"}
+
+# Void elements never get a closing tag, so they must not open a skip scope
+VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "area", "base", "col", "wbr"}
+
+# 10-K items we split out and the heading pattern for each
+SECTION_ITEMS = ["1", "1A", "7", "7A"]
+ITEM_HEADING = re.compile(r"^\s*item\s*(\d{1,2}[a-c]?)\s*[\.\:\-—–]?", re.IGNORECASE)
+
+CACHE_DIR = "filing_cache"
+
+
+class StreamingTextExtractor(HTMLParser):
+    """Event-based HTML to text converter that drops tags and inline XBRL noise as it goes"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines = []
+        self._current = []
+        # Open tags inside a skipped element; empty when text is being kept
+        self._skip_stack = []
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_stack:
+            if tag not in VOID_TAGS:
+                self._skip_stack.append(tag)
+            return
+        if tag in SKIP_TAGS or (tag not in VOID_TAGS and self._is_hidden(attrs)):
+            self._skip_stack.append(tag)
+            return
+        if tag in BLOCK_TAGS:
+            self._end_line()
+
+    def handle_startendtag(self, tag, attrs):
+        if not self._skip_stack and tag in BLOCK_TAGS:
+            self._end_line()
+
+    def handle_endtag(self, tag):
+        if self._skip_stack:
+            # Pop back to the matching open tag so unclosed inner tags don't leak
+            if tag in self._skip_stack:
+                while self._skip_stack.pop() != tag:
+                    pass
+            return
+        if tag == "td":
+            self._current.append(" ")
+        elif tag in BLOCK_TAGS:
+            self._end_line()
+
+    def handle_data(self, data):
+        if not self._skip_stack:
+            self._current.append(data)
+
+    def close(self):
+        super().close()
+        self._end_line()
+
+    def text(self):
+        return "\n".join(self.lines)
+
+    def _end_line(self):
+        if self._current:
+            line = " ".join("".join(self._current).split())
+            if line:
+                self.lines.append(line)
+            self._current = []
+
+    @staticmethod
+    def _is_hidden(attrs):
+        for name, value in attrs:
+            if name == "style" and value and "display:none" in value.replace(" ", "").lower():
+                return True
+        return False
+
+
+def html_to_text(chunks):
+    """Convert an iterable of HTML string chunks to text without building a DOM"""
+    parser = StreamingTextExtractor()
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+    return parser.text()
+
+
+def split_sections(text, items=SECTION_ITEMS):
+    """
+    Split 10-K text into Items by heading.
+
+    Headings appear twice (table of contents and body), so for each item
+    the occurrence that starts the longest section is kept.
+    """
+    lines = text.split("\n")
+    headings = []
+    for idx, line in enumerate(lines):
+        if len(line) > 200:
+            continue
+        match = ITEM_HEADING.match(line)
+        if match:
+            headings.append((match.group(1).upper(), idx))
+
+    sections = {}
+    for pos, (item, start) in enumerate(headings):
+        if item not in items:
+            continue
+        end = headings[pos + 1][1] if pos + 1 < len(headings) else len(lines)
+        body = "\n".join(lines[start:end])
+        if len(body) > len(sections.get(item, "")):
+            sections[item] = body
+    return {f"Item_{item}": sections[item] for item in items if item in sections}
+
+
+def _cache_path(cik, accession, cache_dir):
+    return os.path.join(cache_dir, str(int(cik)), f"{accession.replace('-', '')}.json")
+
+
+def stream_document_text(cik, accession, document, headers, chunk_size=1 << 16):
+    """Download a filing document and convert it to text chunk by chunk"""
+    url = f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession.replace('-', '')}/{document}"
+    with requests.get(url, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        received = 0
+
+        def chunks():
+            nonlocal received
+            for raw in response.iter_content(chunk_size):
+                received += len(raw)
+                yield decoder.decode(raw)
+
+        text = html_to_text(chunks())
+    TRACER.count("http.requests")
+    TRACER.count("http.bytes", received)
+    return text
+
+
+def fetch_filing_sections(cik, accession, document, headers, cache_dir=CACHE_DIR, chunk_size=1 << 16,
+                          limiter=None):
+    """Stream a filing's primary document into text and sections, using the on-disk cache when present"""
+    path = _cache_path(cik, accession, cache_dir)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    if limiter:
+        limiter.wait()
+    else:
+        time.sleep(0.1)  # Rate limiting
+    text = stream_document_text(cik, accession, document, headers, chunk_size)
+    result = {"accession": accession, "document": document, "text": text,
+              "sections": split_sections(text)}
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    return result
+
+
+def benchmark(html_path, repeat=3):
+    """Compare MB/s of the streaming extractor against BeautifulSoup(html, 'lxml').get_text"""
+    from bs4 import BeautifulSoup
+
+    with open(html_path, encoding="utf-8", errors="replace") as f:
+        html = f.read()
+    size_mb = len(html.encode("utf-8")) / 1e6
+
+    def timed(func):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    chunk = 1 << 16
+    stream_time = timed(lambda: html_to_text(html[i:i + chunk] for i in range(0, len(html), chunk)))
+    soup_time = timed(lambda: BeautifulSoup(html, "lxml").get_text("\n"))
+
+    results = {
+        "size_mb": size_mb,
+        "streaming_mb_per_s": size_mb / stream_time,
+        "beautifulsoup_mb_per_s": size_mb / soup_time,
+        "speedup": soup_time / stream_time
+    }
+    print(f"{os.path.basename(html_path)}: {size_mb:.1f} MB")
+    print(f"  Streaming:     {results['streaming_mb_per_s']:.1f} MB/s")
+    print(f"  BeautifulSoup: {results['beautifulsoup_mb_per_s']:.1f} MB/s")
+    print(f"  Speedup:       {results['speedup']:.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    for path in sys.argv[1:]:
+        benchmark(path)
@@ -1,18 +1,115 @@
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+from matplotlib.collections import PolyCollection
 import pandas as pd
 import numpy as np
+import io
 import json
 import os
+import time
 from datetime import datetime
 import seaborn as sns
+from instrumentation import TRACER
+from kernels import rolling_mean, rolling_volatility
 
 # Set style
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
 
+SAVE_DPI = 300
+
+
+def minmax_downsample(y, n_buckets):
+    """
+    Indices that keep the min and max of y in each of n_buckets equal-width buckets.
+
+    Drawn as a line, the result has the same per-pixel envelope as the
+    full series when n_buckets is the plot's pixel width. Returns sorted
+    indices; the first and last point are always kept.
+    """
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    bucket = (np.arange(n) * n_buckets) // n
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    # Sort within each bucket; NaNs (e.g. the MA warm-up) go last so they never win
+    valid = ~np.isnan(y)
+    order = np.lexsort((np.where(valid, y, np.inf), bucket))
+    valid_counts = np.add.reduceat(valid[order].astype(np.int64), starts)
+    last = np.where(valid_counts > 0, starts + valid_counts - 1, ends)
+    return np.unique(np.r_[0, order[starts], order[last], n - 1])
+
+
+def volume_bars(x, height):
+    """
+    Rectangles for a volume bar at each x, as vertices for one PolyCollection.
+
+    Bars are 0.8 of the typical spacing wide, like ax.bar's default
+    0.8-day width on daily data, so per-bucket bars look like the daily ones.
+    """
+    width = 0.8 * (np.median(np.diff(x)) if len(x) > 1 else 1.0)
+    left, right = x - width / 2, x + width / 2
+    zero = np.zeros_like(height)
+    return np.stack([np.c_[left, zero], np.c_[left, height], np.c_[right, height], np.c_[right, zero]], axis=1)
+
+
+# (label, method) for every chart, in drawing order
+CHARTS = [
+    ("Revenue & Net Income", "plot_revenue_and_income"),
+    ("Balance Sheet", "plot_balance_sheet"),
+    ("Cash Flows", "plot_cash_flows"),
+    ("Profitability Ratios", "plot_profitability_ratios"),
+    ("Financial Ratios Dashboard", "plot_financial_ratios_dashboard"),
+    ("Stock Price", "plot_stock_price"),
+    ("Returns & Volatility", "plot_returns_distribution"),
+    ("Risk Metrics", "plot_risk_metrics"),
+    ("Growth Metrics", "plot_growth_metrics")
+]
+
+PROFITABILITY_RATIOS = [
+    ('Net_Profit_Margin', 'Net Profit Margin'),
+    ('Operating_Margin', 'Operating Margin'),
+    ('ROA', 'Return on Assets (ROA)'),
+    ('ROE', 'Return on Equity (ROE)')
+]
+
+DASHBOARD_RATIOS = [
+    ('Current_Ratio', 'Current Ratio', False),
+    ('Debt_to_Equity', 'Debt-to-Equity', False),
+    ('Interest_Coverage', 'Interest Coverage', False),
+    ('PE_Ratio', 'P/E Ratio', False),
+    ('Price_to_Book', 'Price-to-Book', False),
+    ('Dividend_Yield', 'Dividend Yield', True)
+]
+
+RISK_METRICS = [
+    ('Volatility_Annualized', 'Annualized Volatility', False),
+    ('Sharpe_Ratio', 'Sharpe Ratio', False),
+    ('Sortino_Ratio', 'Sortino Ratio', False),
+    ('Max_Drawdown', 'Maximum Drawdown', True)
+]
+
+BALANCE_SHEET_LINES = {
+    "Assets": "Assets",
+    "Liabilities": "Liabilities",
+    "StockholdersEquity": "Shareholders Equity"
+}
+
+CASH_FLOW_LINES = {
+    "OperatingCashFlow": "Operating",
+    "InvestingCashFlow": "Investing",
+    "FinancingCashFlow": "Financing"
+}
+
+
 class FinancialVisualizer:
-    def __init__(self):
-        pass
+    def __init__(self, fast_render=False, templates=False):
+        # fast_render draws the price chart from per-pixel min/max buckets (see plot_stock_price_fast)
+        self.fast_render = fast_render
+        # templates builds each chart's layout once and only swaps data per ticker (see _render_template)
+        self.templates = templates
+        self._templates = {}
     def set_data_dir(self, ticker, data_dir=None):
         self.ticker = ticker.upper()
         self.data_dir = data_dir if data_dir else f"{ticker}_COMPLETE_DATA"
@@ -49,6 +146,8 @@ class FinancialVisualizer:
     
     def plot_revenue_and_income(self):
         """Plot Revenue and Net Income over time"""
+        if self.templates:
+            return self._render_template('revenue_income')
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
         
         # Revenue
@@ -95,6 +194,8 @@ class FinancialVisualizer:
     
     def plot_balance_sheet(self):
         """Plot Assets, Liabilities, and Equity"""
+        if self.templates:
+            return self._render_template('balance_sheet')
         fig, ax = plt.subplots(figsize=(14, 8))
         
         data_to_plot = {}
@@ -125,15 +226,11 @@ class FinancialVisualizer:
     
     def plot_cash_flows(self):
         """Plot Operating, Investing, and Financing Cash Flows"""
+        if self.templates:
+            return self._render_template('cash_flows')
         fig, ax = plt.subplots(figsize=(14, 8))
         
-        cash_metrics = {
-            "OperatingCashFlow": "Operating",
-            "InvestingCashFlow": "Investing", 
-            "FinancingCashFlow": "Financing"
-        }
-        
-        for metric, label in cash_metrics.items():
+        for metric, label in CASH_FLOW_LINES.items():
             if metric in self.financials:
                 df = self.financials[metric].copy()
                 df['end'] = pd.to_datetime(df['end'])
@@ -157,16 +254,11 @@ class FinancialVisualizer:
     
     def plot_profitability_ratios(self):
         """Plot key profitability ratios"""
+        if self.templates:
+            return self._render_template('profitability_ratios')
         fig, axes = plt.subplots(2, 2, figsize=(14, 10))
         
-        ratios_to_plot = {
-            'Net_Profit_Margin': 'Net Profit Margin',
-            'Operating_Margin': 'Operating Margin',
-            'ROA': 'Return on Assets (ROA)',
-            'ROE': 'Return on Equity (ROE)'
-        }
-        
-        for idx, (key, title) in enumerate(ratios_to_plot.items()):
+        for idx, (key, title) in enumerate(PROFITABILITY_RATIOS):
             ax = axes[idx // 2, idx % 2]
             
             if key in self.ratios and self.ratios[key] is not None:
@@ -193,19 +285,12 @@ class FinancialVisualizer:
     
     def plot_financial_ratios_dashboard(self):
         """Dashboard of various financial ratios"""
+        if self.templates:
+            return self._render_template('ratios_dashboard')
         fig, axes = plt.subplots(2, 3, figsize=(16, 10))
         axes = axes.flatten()
         
-        ratio_list = [
-            ('Current_Ratio', 'Current Ratio', False),
-            ('Debt_to_Equity', 'Debt-to-Equity', False),
-            ('Interest_Coverage', 'Interest Coverage', False),
-            ('PE_Ratio', 'P/E Ratio', False),
-            ('Price_to_Book', 'Price-to-Book', False),
-            ('Dividend_Yield', 'Dividend Yield', True)
-        ]
-        
-        for idx, (key, title, is_percent) in enumerate(ratio_list):
+        for idx, (key, title, is_percent) in enumerate(DASHBOARD_RATIOS):
             ax = axes[idx]
             
             if key in self.ratios and self.ratios[key] is not None:
@@ -233,6 +318,10 @@ class FinancialVisualizer:
     
     def plot_stock_price(self):
         """Plot historical stock price with volume"""
+        if self.templates:
+            return self._render_template('stock_price')
+        if self.fast_render:
+            return self.plot_stock_price_fast()
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10), 
                                         gridspec_kw={'height_ratios': [3, 1]})
         
@@ -247,15 +336,14 @@ class FinancialVisualizer:
         ax1.grid(True, alpha=0.3)
         
         # Add moving averages
-        df['MA50'] = df['Close'].rolling(window=50).mean()
-        df['MA200'] = df['Close'].rolling(window=200).mean()
+        df['MA50'] = rolling_mean(df['Close'], 50)
+        df['MA200'] = rolling_mean(df['Close'], 200)
         ax1.plot(df['Date'], df['MA50'], linewidth=1, alpha=0.7, label='50-day MA', linestyle='--')
         ax1.plot(df['Date'], df['MA200'], linewidth=1, alpha=0.7, label='200-day MA', linestyle='--')
         ax1.legend(loc='best')
         
         # Volume chart
-        colors = ['green' if close >= open_ else 'red' 
-                 for close, open_ in zip(df['Close'], df['Open'])]
+        colors = np.where(df['Close'].to_numpy() >= df['Open'].to_numpy(), 'green', 'red')
         ax2.bar(df['Date'], df['Volume'], color=colors, alpha=0.5)
         ax2.set_ylabel('Volume', fontsize=12)
         ax2.set_xlabel('Date', fontsize=12)
@@ -265,8 +353,84 @@ class FinancialVisualizer:
         self.figures.append(('stock_price', fig))
         return fig
     
+    def plot_stock_price_fast(self):
+        """
+        Same chart as plot_stock_price, drawn from downsampled data.
+
+        Each series is reduced to the min and max of every pixel-wide
+        bucket at the save DPI, so lines and the high/low band keep their
+        visible shape. Volume is drawn as one bar per bucket (its maximum)
+        in a single PolyCollection instead of one bar artist per trading day.
+        """
+        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10), 
+                                        gridspec_kw={'height_ratios': [3, 1]})
+        n_buckets = max(1, int(fig.get_size_inches()[0] * SAVE_DPI * ax1.get_position().width))
+        data = self._price_chart_data(n_buckets)
+        
+        # Price chart
+        ax1.plot(*data['close'], linewidth=1.5, label='Close Price')
+        ax1.fill_between(*data['band'], alpha=0.2, label='Daily Range')
+        ax1.set_title(f'{self.ticker} - Stock Price History', fontsize=16, fontweight='bold')
+        ax1.set_ylabel('Price ($)', fontsize=12)
+        ax1.grid(True, alpha=0.3)
+        
+        # Moving averages on the full series, then downsampled for drawing
+        for key, label in [('ma50', '50-day MA'), ('ma200', '200-day MA')]:
+            ax1.plot(*data[key], linewidth=1, alpha=0.7, label=label, linestyle='--')
+        ax1.legend(loc='best')
+        
+        # Volume chart: one collection of bars
+        vol_x, vol_max, vol_up = data['volume']
+        ax2.add_collection(PolyCollection(volume_bars(vol_x, vol_max), facecolors=np.where(vol_up, 'green', 'red'),
+                                          alpha=0.5))
+        ax2.autoscale_view()
+        ax2.set_ylabel('Volume', fontsize=12)
+        ax2.set_xlabel('Date', fontsize=12)
+        ax2.grid(True, alpha=0.3)
+        for ax in (ax1, ax2):
+            ax.xaxis_date()
+        
+        plt.tight_layout()
+        self.figures.append(('stock_price', fig))
+        return fig
+    
+    def _price_chart_data(self, n_buckets):
+        """Downsampled series for the price chart, as plain arrays keyed by artist"""
+        df = self.price_history
+        dates = pd.to_datetime(df['Date'], utc=True).dt.tz_localize(None).to_numpy()
+        x = mdates.date2num(dates)
+        close = df['Close'].to_numpy(dtype=float)
+        high = df['High'].to_numpy(dtype=float)
+        low = df['Low'].to_numpy(dtype=float)
+        volume = df['Volume'].to_numpy(dtype=float)
+        up = close >= df['Open'].to_numpy(dtype=float)
+        
+        # Bucket envelope of the daily range: max of High and min of Low per pixel
+        n = len(x)
+        if n > 2 * n_buckets:
+            bucket = (np.arange(n) * n_buckets) // n
+            starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+            band = (x[starts], np.minimum.reduceat(low, starts), np.maximum.reduceat(high, starts))
+            # Color each volume bar by the day that set the bucket maximum
+            peak_day = np.lexsort((volume, bucket))[np.r_[starts[1:], n] - 1]
+            bars = (x[starts], np.maximum.reduceat(volume, starts), up[peak_day])
+        else:
+            band = (x, low, high)
+            bars = (x, volume, up)
+        
+        data = {'band': band, 'volume': bars}
+        keep = minmax_downsample(close, n_buckets)
+        data['close'] = (x[keep], close[keep])
+        for window in (50, 200):
+            ma = rolling_mean(close, window)
+            keep = minmax_downsample(ma, n_buckets)
+            data[f'ma{window}'] = (x[keep], ma[keep])
+        return data
+    
     def plot_returns_distribution(self):
         """Plot returns distribution and volatility"""
+        if self.templates:
+            return self._render_template('returns_volatility')
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
         
         df = self.price_history.copy()
@@ -283,7 +447,7 @@ class FinancialVisualizer:
         ax1.grid(True, alpha=0.3)
         
         # Rolling volatility
-        rolling_vol = returns.rolling(window=30).std() * np.sqrt(252)  # Annualized
+        rolling_vol = rolling_volatility(returns, 30)  # Annualized
         ax2.plot(df['Date'][1:], rolling_vol, linewidth=1.5, color='darkred')
         ax2.set_title(f'{self.ticker} - 30-Day Rolling Volatility (Annualized)', fontsize=14, fontweight='bold')
         ax2.set_ylabel('Volatility', fontsize=12)
@@ -296,17 +460,12 @@ class FinancialVisualizer:
     
     def plot_risk_metrics(self):
         """Plot risk metrics"""
+        if self.templates:
+            return self._render_template('risk_metrics')
         fig, axes = plt.subplots(2, 2, figsize=(14, 10))
         axes = axes.flatten()
         
-        risk_metrics = [
-            ('Volatility_Annualized', 'Annualized Volatility', False),
-            ('Sharpe_Ratio', 'Sharpe Ratio', False),
-            ('Sortino_Ratio', 'Sortino Ratio', False),
-            ('Max_Drawdown', 'Maximum Drawdown', True)
-        ]
-        
-        for idx, (key, title, is_percent) in enumerate(risk_metrics):
+        for idx, (key, title, is_percent) in enumerate(RISK_METRICS):
             ax = axes[idx]
             
             if key in self.risk and self.risk[key] is not None:
@@ -337,6 +496,8 @@ class FinancialVisualizer:
     
     def plot_growth_metrics(self):
         """Plot growth rates"""
+        if self.templates:
+            return self._render_template('growth_metrics')
         fig, ax = plt.subplots(figsize=(12, 6))
         
         growth_data = {}
@@ -366,28 +527,335 @@ class FinancialVisualizer:
         self.figures.append(('growth_metrics', fig))
         return fig
     
+    # =====================================
+    # TEMPLATES
+    # =====================================
+    def _render_template(self, name):
+        """
+        Draw one chart by swapping this ticker's data into a reused figure.
+
+        The figure, axes, grids, labels and artists come from _build_<name>
+        on first use; every later ticker only runs _update_<name>, which
+        changes artist data and text in place. Layout (tight_layout) is
+        computed once from the first ticker drawn.
+        """
+        template = self._templates.get(name)
+        first = template is None
+        if first:
+            template = self._templates[name] = getattr(self, f"_build_{name}")()
+        getattr(self, f"_update_{name}")(template)
+        if first:
+            template["fig"].tight_layout()
+        self.figures.append((name, template["fig"]))
+        return template["fig"]
+    
+    def _annual_series(self, metric):
+        """(date numbers, values) of one statement line's 10-K rows, oldest first"""
+        if metric not in self.financials:
+            return np.array([]), np.array([])
+        df = self.financials[metric]
+        df = df[df['form'] == '10-K'].sort_values('end')
+        return mdates.date2num(pd.to_datetime(df['end']).to_numpy()), df['val'].to_numpy(dtype=float)
+    
+    @staticmethod
+    def _rescale(ax):
+        ax.relim()
+        ax.autoscale_view()
+    
+    @staticmethod
+    def _relegend(ax, lines, **kwargs):
+        """Legend over the lines that have data this ticker"""
+        shown = [line for line in lines if line.get_visible()]
+        if shown:
+            ax.legend(handles=shown, **kwargs)
+        elif ax.get_legend() is not None:
+            ax.get_legend().remove()
+    
+    @staticmethod
+    def _bar_panel(ax, title, missing_text='N/A', color='steelblue'):
+        """One-bar axes with a value label and a 'not available' message"""
+        bar = ax.bar([title], [0], color=color, alpha=0.7)[0]
+        label = ax.text(0, 0, '', ha='center', va='bottom', fontweight='bold')
+        missing = ax.text(0.5, 0.5, missing_text, ha='center', va='center',
+                          transform=ax.transAxes, fontsize=12)
+        ax.set_title(title, fontsize=12, fontweight='bold')
+        ax.grid(True, alpha=0.3, axis='y')
+        return {"ax": ax, "bar": bar, "label": label, "missing": missing}
+    
+    def _update_bar_panel(self, panel, height=None, text='', color='steelblue', va='bottom'):
+        available = height is not None
+        panel["bar"].set_visible(available)
+        panel["label"].set_visible(available)
+        panel["missing"].set_visible(not available)
+        if available:
+            panel["bar"].set_height(height)
+            panel["bar"].set_facecolor(color)
+            panel["label"].set_position((0, height))
+            panel["label"].set_text(text)
+            panel["label"].set_verticalalignment(va)
+        self._rescale(panel["ax"])
+    
+    def _build_line_chart(self, labels, ylabel, zero_line):
+        fig, ax = plt.subplots(figsize=(14, 8))
+        lines = [ax.plot([], [], marker='o', linewidth=2, markersize=8, label=label)[0]
+                 for label in labels]
+        title = ax.set_title('', fontsize=16, fontweight='bold')
+        ax.set_ylabel(ylabel, fontsize=12)
+        ax.set_xlabel('Year', fontsize=12)
+        ax.grid(True, alpha=0.3)
+        if zero_line:
+            ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
+        ax.tick_params(axis='x', rotation=45)
+        ax.xaxis_date()
+        return {"fig": fig, "ax": ax, "lines": lines, "title": title}
+    
+    def _update_line_chart(self, template, metrics, title):
+        for line, metric in zip(template["lines"], metrics):
+            x, y = self._annual_series(metric)
+            line.set_data(x, y / 1e9)
+            line.set_visible(len(x) > 0)
+        template["title"].set_text(f'{self.ticker} - {title}')
+        self._relegend(template["ax"], template["lines"], fontsize=11, loc='best')
+        self._rescale(template["ax"])
+    
+    def _build_revenue_income(self):
+        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
+        revenue, = ax1.plot([], [], marker='o', linewidth=2, markersize=8)
+        ax1.set_ylabel('Revenue (Billions $)', fontsize=12)
+        income, = ax2.plot([], [], marker='o', linewidth=2, markersize=8, color='green')
+        ax2.set_ylabel('Net Income (Billions $)', fontsize=12)
+        ax2.set_xlabel('Year', fontsize=12)
+        ax2.axhline(y=0, color='red', linestyle='--', alpha=0.5)
+        titles = []
+        for ax in (ax1, ax2):
+            titles.append(ax.set_title('', fontsize=16, fontweight='bold'))
+            ax.grid(True, alpha=0.3)
+            ax.tick_params(axis='x', rotation=45)
+            ax.xaxis_date()
+        return {"fig": fig, "axes": (ax1, ax2), "lines": (revenue, income), "titles": titles,
+                "annotations": []}
+    
+    def _update_revenue_income(self, template):
+        for annotation in template["annotations"]:
+            annotation.remove()
+        template["annotations"] = []
+        
+        ax1, ax2 = template["axes"]
+        revenue, income = template["lines"]
+        x, y = self._annual_series("Revenue")
+        revenue.set_data(x, y / 1e9)
+        # Growth rate annotations
+        growth = np.diff(y) / y[:-1] * 100
+        for i, rate in enumerate(growth, start=1):
+            template["annotations"].append(ax1.annotate(
+                f'{rate:+.1f}%', xy=(x[i], y[i] / 1e9), xytext=(10, 10), textcoords='offset points',
+                fontsize=9, color='green' if rate > 0 else 'red'))
+        
+        x, y = self._annual_series("NetIncome")
+        income.set_data(x, y / 1e9)
+        template["titles"][0].set_text(f'{self.ticker} - Annual Revenue')
+        template["titles"][1].set_text(f'{self.ticker} - Annual Net Income')
+        for ax in (ax1, ax2):
+            self._rescale(ax)
+    
+    def _build_balance_sheet(self):
+        return self._build_line_chart(BALANCE_SHEET_LINES.values(), 'Amount (Billions $)', zero_line=False)
+    
+    def _update_balance_sheet(self, template):
+        self._update_line_chart(template, BALANCE_SHEET_LINES, 'Balance Sheet Overview')
+    
+    def _build_cash_flows(self):
+        return self._build_line_chart(CASH_FLOW_LINES.values(), 'Cash Flow (Billions $)', zero_line=True)
+    
+    def _update_cash_flows(self, template):
+        self._update_line_chart(template, CASH_FLOW_LINES, 'Cash Flow Statement')
+    
+    def _build_profitability_ratios(self):
+        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+        panels = []
+        for ax, (key, title) in zip(axes.flatten(), PROFITABILITY_RATIOS):
+            panel = self._bar_panel(ax, title, missing_text='Data Not Available')
+            ax.set_ylabel('Percentage (%)', fontsize=11)
+            ax.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
+            panels.append(panel)
+        suptitle = fig.suptitle('', fontsize=16, fontweight='bold', y=1.00)
+        return {"fig": fig, "panels": panels, "suptitle": suptitle}
+    
+    def _update_profitability_ratios(self, template):
+        for panel, (key, title) in zip(template["panels"], PROFITABILITY_RATIOS):
+            if self.ratios.get(key) is None:
+                self._update_bar_panel(panel)
+                continue
+            value = self.ratios[key] * 100
+            self._update_bar_panel(panel, value, f'{value:.2f}%', color='green' if value > 0 else 'red',
+                                   va='bottom' if value > 0 else 'top')
+        template["suptitle"].set_text(f'{self.ticker} - Profitability Ratios')
+    
+    def _build_ratios_dashboard(self):
+        fig, axes = plt.subplots(2, 3, figsize=(16, 10))
+        panels = [self._bar_panel(ax, title) for ax, (key, title, _) in zip(axes.flatten(), DASHBOARD_RATIOS)]
+        suptitle = fig.suptitle('', fontsize=16, fontweight='bold')
+        return {"fig": fig, "panels": panels, "suptitle": suptitle}
+    
+    def _update_ratios_dashboard(self, template):
+        for panel, (key, title, is_percent) in zip(template["panels"], DASHBOARD_RATIOS):
+            if self.ratios.get(key) is None:
+                self._update_bar_panel(panel)
+                continue
+            value = self.ratios[key] * 100 if is_percent else self.ratios[key]
+            label = f'{value:.2f}%' if is_percent else f'{value:.2f}'
+            self._update_bar_panel(panel, value, label, va='bottom' if value > 0 else 'top')
+        template["suptitle"].set_text(f'{self.ticker} - Financial Ratios Dashboard')
+    
+    def _build_stock_price(self):
+        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10),
+                                        gridspec_kw={'height_ratios': [3, 1]})
+        close, = ax1.plot([], [], linewidth=1.5, label='Close Price')
+        # The band is a PolyCollection whose vertex count changes per ticker; it is redrawn each time
+        band = ax1.fill_between([], [], [], alpha=0.2, label='Daily Range')
+        ma50, = ax1.plot([], [], linewidth=1, alpha=0.7, label='50-day MA', linestyle='--')
+        ma200, = ax1.plot([], [], linewidth=1, alpha=0.7, label='200-day MA', linestyle='--')
+        title = ax1.set_title('', fontsize=16, fontweight='bold')
+        ax1.set_ylabel('Price ($)', fontsize=12)
+        ax1.grid(True, alpha=0.3)
+        ax1.legend(loc='best')
+        volume = ax2.add_collection(PolyCollection([], alpha=0.5))
+        ax2.set_ylabel('Volume', fontsize=12)
+        ax2.set_xlabel('Date', fontsize=12)
+        ax2.grid(True, alpha=0.3)
+        for ax in (ax1, ax2):
+            ax.xaxis_date()
+        n_buckets = max(1, int(fig.get_size_inches()[0] * SAVE_DPI * ax1.get_position().width))
+        return {"fig": fig, "axes": (ax1, ax2), "lines": {"close": close, "ma50": ma50, "ma200": ma200},
+                "band": band, "volume": volume, "title": title, "n_buckets": n_buckets}
+    
+    def _update_stock_price(self, template):
+        ax1, ax2 = template["axes"]
+        data = self._price_chart_data(template["n_buckets"])
+        for key, line in template["lines"].items():
+            line.set_data(*data[key])
+        ax1.relim()
+        template["band"].remove()
+        template["band"] = ax1.fill_between(*data['band'], alpha=0.2, color=template["band"].get_facecolor(),
+                                            label='Daily Range')
+        ax1.autoscale_view()
+        template["title"].set_text(f'{self.ticker} - Stock Price History')
+        
+        # Collections are not part of relim, so the volume axes' data limits are set directly
+        vol_x, vol_max, vol_up = data['volume']
+        volume = template["volume"]
+        volume.set_verts(volume_bars(vol_x, vol_max))
+        volume.set_facecolor(np.where(vol_up, 'green', 'red'))
+        ax2.ignore_existing_data_limits = True
+        if len(vol_x):
+            ax2.update_datalim([(vol_x[0], 0), (vol_x[-1], np.nanmax(vol_max))])
+        ax2.autoscale_view()
+    
+    def _build_returns_volatility(self):
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+        patches = ax1.bar(np.zeros(50), np.zeros(50), width=0, align='edge', alpha=0.7,
+                          color='steelblue', edgecolor='black')
+        mean = ax1.axvline(0, color='red', linestyle='--', linewidth=2)
+        median = ax1.axvline(0, color='green', linestyle='--', linewidth=2)
+        ax1.set_xlabel('Daily Return', fontsize=12)
+        ax1.set_ylabel('Frequency', fontsize=12)
+        ax1.grid(True, alpha=0.3)
+        vol, = ax2.plot([], [], linewidth=1.5, color='darkred')
+        ax2.set_ylabel('Volatility', fontsize=12)
+        ax2.set_xlabel('Date', fontsize=12)
+        ax2.grid(True, alpha=0.3)
+        ax2.xaxis_date()
+        titles = [ax.set_title('', fontsize=14, fontweight='bold') for ax in (ax1, ax2)]
+        return {"fig": fig, "axes": (ax1, ax2), "patches": list(patches), "mean": mean,
+                "median": median, "vol": vol, "titles": titles}
+    
+    def _update_returns_volatility(self, template):
+        ax1, ax2 = template["axes"]
+        df = self.price_history
+        returns = df['Close'].pct_change().dropna()
+        
+        # Histogram of returns: move and resize the existing 50 bars
+        counts, edges = np.histogram(returns.to_numpy(), bins=len(template["patches"]))
+        for patch, left, width, count in zip(template["patches"], edges[:-1], np.diff(edges), counts):
+            patch.set_x(left)
+            patch.set_width(width)
+            patch.set_height(count)
+        for line, value, name in [(template["mean"], returns.mean(), 'Mean'),
+                                  (template["median"], returns.median(), 'Median')]:
+            line.set_xdata([value, value])
+            line.set_label(f'{name}: {value:.4f}')
+        ax1.legend()
+        
+        # Rolling volatility
+        rolling_vol = rolling_volatility(returns, 30)  # Annualized
+        dates = pd.to_datetime(df['Date'][1:], utc=True).dt.tz_localize(None).to_numpy()
+        template["vol"].set_data(mdates.date2num(dates), rolling_vol)
+        
+        template["titles"][0].set_text(f'{self.ticker} - Daily Returns Distribution')
+        template["titles"][1].set_text(f'{self.ticker} - 30-Day Rolling Volatility (Annualized)')
+        for ax in (ax1, ax2):
+            self._rescale(ax)
+    
+    def _build_risk_metrics(self):
+        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+        panels = [self._bar_panel(ax, title) for ax, (key, title, _) in zip(axes.flatten(), RISK_METRICS)]
+        suptitle = fig.suptitle('', fontsize=16, fontweight='bold')
+        return {"fig": fig, "panels": panels, "suptitle": suptitle}
+    
+    def _update_risk_metrics(self, template):
+        for panel, (key, title, is_percent) in zip(template["panels"], RISK_METRICS):
+            if self.risk.get(key) is None:
+                self._update_bar_panel(panel)
+                continue
+            value = self.risk[key] * 100 if is_percent else self.risk[key]
+            good = (value > 0 and not is_percent) or (value > -20 and is_percent)
+            label = f'{value:.2f}%' if is_percent else f'{value:.4f}'
+            self._update_bar_panel(panel, abs(value), label, color='green' if good else 'red')
+        template["suptitle"].set_text(f'{self.ticker} - Risk Metrics')
+    
+    def _build_growth_metrics(self):
+        fig, ax = plt.subplots(figsize=(12, 6))
+        title = ax.set_title('', fontsize=16, fontweight='bold')
+        ax.set_xlabel('Growth Rate (%)', fontsize=12)
+        ax.axvline(x=0, color='black', linestyle='-', linewidth=0.5)
+        ax.grid(True, alpha=0.3, axis='x')
+        return {"fig": fig, "ax": ax, "title": title, "bars": None, "labels": []}
+    
+    def _update_growth_metrics(self, template):
+        # The set of available metrics changes per ticker, so bars are replaced rather than resized
+        ax = template["ax"]
+        if template["bars"] is not None:
+            template["bars"].remove()
+        for label in template["labels"]:
+            label.remove()
+        
+        growth_data = {key.replace('_', ' '): value * 100
+                       for key, value in self.growth.items() if value is not None}
+        names = list(growth_data.keys())
+        values = np.array(list(growth_data.values()), dtype=float)
+        # Numeric positions, since a categorical axis would keep every earlier ticker's names
+        positions = np.arange(len(names))
+        template["bars"] = ax.barh(positions, values, color=np.where(values > 0, 'green', 'red'), alpha=0.7)
+        ax.set_yticks(positions, names)
+        template["labels"] = [
+            ax.text(value, position, f'{value:.2f}%', ha='left' if value > 0 else 'right',
+                    va='center', fontweight='bold', fontsize=10)
+            for position, value in zip(positions, values)
+        ]
+        template["title"].set_text(f'{self.ticker} - Growth Metrics')
+        self._rescale(ax)
+    
     def create_all_plots(self):
         """Generate all plots"""
         print(f"\n{'='*60}")
         print(f"Creating visualizations for {self.ticker}")
         print(f"{'='*60}\n")
         
-        plots = [
-            ("Revenue & Net Income", self.plot_revenue_and_income),
-            ("Balance Sheet", self.plot_balance_sheet),
-            ("Cash Flows", self.plot_cash_flows),
-            ("Profitability Ratios", self.plot_profitability_ratios),
-            ("Financial Ratios Dashboard", self.plot_financial_ratios_dashboard),
-            ("Stock Price", self.plot_stock_price),
-            ("Returns & Volatility", self.plot_returns_distribution),
-            ("Risk Metrics", self.plot_risk_metrics),
-            ("Growth Metrics", self.plot_growth_metrics)
-        ]
-        
-        for name, func in plots:
+        for name, method in CHARTS:
             try:
                 print(f"Creating {name}...")
-                func()
+                with TRACER.stage(f"charts.{method}"):
+                    getattr(self, method)()
                 print(f"  ✓ {name} created")
             except Exception as e:
                 print(f"  ✗ Error creating {name}: {e}")
@@ -405,7 +873,9 @@ class FinancialVisualizer:
         
         for name, fig in self.figures:
             filepath = os.path.join(output_dir, f"{name}.png")
-            fig.savefig(filepath, dpi=300, bbox_inches='tight')
+            with TRACER.stage("charts.savefig"):
+                fig.savefig(filepath, dpi=SAVE_DPI, bbox_inches='tight')
+            TRACER.count("charts.bytes", os.path.getsize(filepath))
             print(f"  ✓ Saved {name}.png")
         
         print(f"\n✅ All plots saved to {output_dir}")
@@ -419,9 +889,73 @@ class FinancialVisualizer:
 # USAGE
 # =====================================
     def run_all(self):
-        self.load_data()
+        with TRACER.stage("charts.load_data"):
+            self.load_data()
         self.create_all_plots()
         self.save_all_plots()
+def benchmark(tickers, repeat=3):
+    """
+    Per-chart time to draw and render a PNG, fresh figures vs templates.
+
+    tickers must already have saved data. Both sides use the downsampled
+    price chart, so the difference is figure/layout creation alone. The
+    template side includes its one-off build for the first ticker.
+    """
+    fresh = FinancialVisualizer(fast_render=True)
+    reused = FinancialVisualizer(templates=True)
+    times = {method: {"fresh": [], "template": []} for _, method in CHARTS}
+    
+    for _ in range(repeat):
+        for ticker in tickers:
+            for viz in (fresh, reused):
+                viz.set_data_dir(ticker)
+                viz.load_data()
+            for _, method in CHARTS:
+                for mode, viz in (("fresh", fresh), ("template", reused)):
+                    start = time.perf_counter()
+                    fig = getattr(viz, method)()
+                    fig.savefig(io.BytesIO(), format='png', dpi=SAVE_DPI, bbox_inches='tight')
+                    times[method][mode].append(time.perf_counter() - start)
+                    if mode == "fresh":
+                        plt.close(fig)
+    
+    print(f"{'Chart':<34}{'fresh ms':>10}{'template ms':>13}{'speedup':>9}")
+    results = {}
+    for name, method in CHARTS:
+        fresh_ms = np.median(times[method]["fresh"]) * 1000
+        template_ms = np.median(times[method]["template"]) * 1000
+        results[method] = {"fresh_ms": fresh_ms, "template_ms": template_ms,
+                           "speedup": fresh_ms / template_ms}
+        print(f"{name:<34}{fresh_ms:>10.1f}{template_ms:>13.1f}{fresh_ms / template_ms:>8.2f}x")
+    
+    results["price_chart"] = benchmark_price_chart(tickers, repeat)
+    return results
+
+
+def benchmark_price_chart(tickers, repeat=3):
+    """Time to draw and render the stock price chart PNG, full data vs fast_render"""
+    original = FinancialVisualizer()
+    fast = FinancialVisualizer(fast_render=True)
+    times = {"original": [], "fast": []}
+    
+    for _ in range(repeat):
+        for ticker in tickers:
+            for mode, viz in (("original", original), ("fast", fast)):
+                viz.set_data_dir(ticker)
+                viz.load_data()
+                start = time.perf_counter()
+                fig = viz.plot_stock_price()
+                fig.savefig(io.BytesIO(), format='png', dpi=SAVE_DPI, bbox_inches='tight')
+                times[mode].append(time.perf_counter() - start)
+                plt.close(fig)
+    
+    original_ms = np.median(times["original"]) * 1000
+    fast_ms = np.median(times["fast"]) * 1000
+    print(f"\n{'Stock price chart':<34}{'original ms':>13}{'fast ms':>10}{'speedup':>9}")
+    print(f"{'':<34}{original_ms:>13.1f}{fast_ms:>10.1f}{original_ms / fast_ms:>8.2f}x")
+    return {"original_ms": original_ms, "fast_ms": fast_ms, "speedup": original_ms / fast_ms}
+
+
 if __name__ == "__main__":
     ticker = "AAPL"
     
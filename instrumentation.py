@@ -0,0 +1,215 @@
+import json
+import math
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+TRACE_DIR = "traces"
+
+
+class Histogram:
+    """Log-scale histogram (4 buckets per power of two) with approximate percentiles"""
+
+    BUCKETS_PER_OCTAVE = 4
+
+    def __init__(self):
+        self.buckets = defaultdict(int)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        bucket = math.floor(math.log2(max(value, 1e-9)) * self.BUCKETS_PER_OCTAVE)
+        self.buckets[bucket] += 1
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-th percentile"""
+        if not self.count:
+            return None
+        target = self.count * p / 100
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return min(2 ** ((bucket + 1) / self.BUCKETS_PER_OCTAVE), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "total": self.total
+        }
+
+
+def _rss_peak_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _new_run_id():
+    # Workers start in the same second, so the pid and a random suffix keep their files apart
+    return f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}_{uuid.uuid4().hex[:6]}"
+
+
+class Tracer:
+    """
+    Stage timers and counters for one pipeline run.
+
+    Wrap work in `with TRACER.stage("name"):` and record events with
+    TRACER.count("name", n). Between start_ticker() and end_ticker() all
+    stages and counters go into that ticker's trace, which is appended to
+    a JSON-lines file; every stage duration also feeds a run-level
+    histogram that write_summary() reports.
+
+    Memory: process_rss_peak_mb is the process-lifetime peak RSS, and
+    rss_peak_delta_mb how much a stage or ticker raised it (0 when it
+    stayed under an earlier peak).
+    """
+
+    def __init__(self, trace_dir=TRACE_DIR, trace_memory=False):
+        self.trace_dir = trace_dir
+        self.trace_memory = trace_memory
+        self._run_id = _new_run_id()
+        self._pid = os.getpid()
+        self.histograms = defaultdict(Histogram)
+        self.run_counters = defaultdict(float)
+        self._lock = threading.Lock()
+        self._trace = None
+
+    def reset(self):
+        """Drop run-level histograms and counters, e.g. between benchmark runs"""
+        with self._lock:
+            self.histograms = defaultdict(Histogram)
+            self.run_counters = defaultdict(float)
+
+    @property
+    def run_id(self):
+        # A forked worker inherits the parent's tracer; give it its own files
+        if os.getpid() != self._pid:
+            self._run_id, self._pid = _new_run_id(), os.getpid()
+        return self._run_id
+
+    @property
+    def trace_path(self):
+        return os.path.join(self.trace_dir, f"run_{self.run_id}.jsonl")
+
+    def start_ticker(self, ticker):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._trace = {
+            "ticker": ticker,
+            "start": datetime.now().isoformat(),
+            "stages": {},
+            "counters": defaultdict(float),
+            "errors": [],
+            "_t0": time.perf_counter(),
+            "_rss0": _rss_peak_mb()
+        }
+
+    def end_ticker(self):
+        trace = self._trace
+        if trace is None:
+            return None
+        self._trace = None
+        trace["total_s"] = time.perf_counter() - trace.pop("_t0")
+        trace["process_rss_peak_mb"] = _rss_peak_mb()
+        trace["rss_peak_delta_mb"] = trace["process_rss_peak_mb"] - trace.pop("_rss0")
+        trace["counters"] = dict(trace["counters"])
+        self.histograms["ticker.total"].add(trace["total_s"])
+
+        os.makedirs(self.trace_dir, exist_ok=True)
+        with self._lock, open(self.trace_path, "a") as f:
+            f.write(json.dumps(trace, default=str) + "\n")
+        return trace
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block; exceptions are recorded against the stage and re-raised"""
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        rss_start = _rss_peak_mb()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record = {"s": time.perf_counter() - start, "rss_peak_delta_mb": _rss_peak_mb() - rss_start}
+            if self.trace_memory and tracemalloc.is_tracing():
+                record["py_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+            if error:
+                record["error"] = error
+            self.record(name, record)
+
+    def record(self, name, record):
+        """Add a finished stage; record is a seconds value or a dict with an "s" key"""
+        if not isinstance(record, dict):
+            record = {"s": record}
+        with self._lock:
+            self.histograms[name].add(record["s"])
+            if self._trace is not None:
+                # Repeated stages (e.g. one per chart) accumulate
+                previous = self._trace["stages"].get(name)
+                if previous:
+                    record["s"] += previous["s"]
+                    if "rss_peak_delta_mb" in previous:
+                        record["rss_peak_delta_mb"] = record.get("rss_peak_delta_mb", 0) + previous["rss_peak_delta_mb"]
+                    record["calls"] = previous.get("calls", 1) + 1
+                self._trace["stages"][name] = record
+                if "error" in record:
+                    self._trace["errors"].append({"stage": name, "error": record["error"]})
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.run_counters[name] += value
+            if self._trace is not None:
+                self._trace["counters"][name] += value
+
+    def summary(self):
+        return {
+            "run_id": self.run_id,
+            "stages": {name: hist.summary() for name, hist in sorted(self.histograms.items())},
+            "counters": dict(self.run_counters),
+            "process_rss_peak_mb": _rss_peak_mb()
+        }
+
+    def write_summary(self):
+        """Print the per-stage histogram table and save it next to the trace file"""
+        summary = self.summary()
+        print(f"\n{'='*80}")
+        print(f"{'Stage':<36}{'count':>7}{'p50 s':>9}{'p90 s':>9}{'p99 s':>9}{'total s':>10}")
+        print("-" * 80)
+        for name, stats in sorted(summary["stages"].items(), key=lambda item: -item[1]["total"]):
+            print(f"{name:<36}{stats['count']:>7}{stats['p50']:>9.3f}{stats['p90']:>9.3f}"
+                  f"{stats['p99']:>9.3f}{stats['total']:>10.1f}")
+        for name, value in sorted(summary["counters"].items()):
+            print(f"{name}: {value:,.0f}")
+        print(f"{'='*80}\n")
+
+        os.makedirs(self.trace_dir, exist_ok=True)
+        path = os.path.join(self.trace_dir, f"run_{self.run_id}_summary.json")
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+
+# Shared tracer used by ComprehensiveDataFetcher, FinancialVisualizer and EXCEL_WALKER
+TRACER = Tracer()
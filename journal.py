@@ -0,0 +1,157 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+
+JOURNAL_PATH = "run_journal.db"
+
+# Per-ticker stages in run order
+STAGES = ["data", "charts", "excel"]
+
+
+def hash_directory(path):
+    """Fingerprint a directory's files by name, size and mtime"""
+    digest = hashlib.sha1()
+    if os.path.isdir(path):
+        for root, dirs, files in sorted(os.walk(path)):
+            dirs.sort()
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                digest.update(f"{os.path.relpath(os.path.join(root, name), path)}:{stat.st_size}:{int(stat.st_mtime)}".encode())
+    return digest.hexdigest()
+
+
+class RunJournal:
+    """
+    Durable per-ticker, per-stage status for a universe run, stored in SQLite.
+
+    A run is identified by a name (today's date by default). Restarting
+    with the same name skips stages already done with the same input
+    hash and retries failed ones up to max_attempts. The database uses
+    WAL mode so `python journal.py` can watch progress from another
+    terminal while the run is going.
+    """
+
+    def __init__(self, path=JOURNAL_PATH, run=None, max_attempts=3):
+        self.run = run or date.today().isoformat()
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS stages (
+                run TEXT, ticker TEXT, stage TEXT,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                input_hash TEXT, output TEXT, error TEXT,
+                started_at TEXT, finished_at TEXT, seconds REAL,
+                PRIMARY KEY (run, ticker, stage)
+            );
+        """)
+        self._started = {}
+
+    def close(self):
+        self.conn.close()
+
+    def register(self, tickers):
+        """Add pending rows for tickers not yet in this run"""
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO stages (run, ticker, stage) VALUES (?, ?, ?)",
+            ((self.run, ticker.upper(), stage) for ticker in tickers for stage in STAGES)
+        )
+        self.conn.commit()
+
+    def _row(self, ticker, stage):
+        return self.conn.execute(
+            "SELECT status, attempts, input_hash, output FROM stages WHERE run = ? AND ticker = ? AND stage = ?",
+            (self.run, ticker.upper(), stage)
+        ).fetchone()
+
+    def is_done(self, ticker, stage, input_hash=None):
+        row = self._row(ticker, stage)
+        return bool(row) and row[0] == "done" and (input_hash is None or row[2] == input_hash)
+
+    def should_skip(self, ticker):
+        """True when every stage is done or a stage has used up its attempts"""
+        rows = self.conn.execute(
+            "SELECT status, attempts FROM stages WHERE run = ? AND ticker = ?",
+            (self.run, ticker.upper())
+        ).fetchall()
+        if not rows:
+            return False
+        if all(status == "done" for status, _ in rows):
+            return True
+        return any(status == "failed" and attempts >= self.max_attempts for status, attempts in rows)
+
+    def start(self, ticker, stage, input_hash=None):
+        self._started[(ticker.upper(), stage)] = time.perf_counter()
+        self.conn.execute(
+            "INSERT INTO stages (run, ticker, stage, status, attempts, input_hash, started_at) "
+            "VALUES (?, ?, ?, 'running', 1, ?, ?) "
+            "ON CONFLICT (run, ticker, stage) DO UPDATE SET status = 'running', "
+            "attempts = attempts + 1, input_hash = excluded.input_hash, "
+            "started_at = excluded.started_at, error = NULL",
+            (self.run, ticker.upper(), stage, input_hash, datetime.now().isoformat())
+        )
+        self.conn.commit()
+
+    def _finish(self, ticker, stage, status, output=None, error=None):
+        started = self._started.pop((ticker.upper(), stage), None)
+        seconds = time.perf_counter() - started if started else None
+        self.conn.execute(
+            "UPDATE stages SET status = ?, output = ?, error = ?, finished_at = ?, seconds = ? "
+            "WHERE run = ? AND ticker = ? AND stage = ?",
+            (status, output, error, datetime.now().isoformat(), seconds,
+             self.run, ticker.upper(), stage)
+        )
+        self.conn.commit()
+
+    def finish(self, ticker, stage, output=None):
+        self._finish(ticker, stage, "done", output=output)
+
+    def fail(self, ticker, stage, error):
+        self._finish(ticker, stage, "failed", error=str(error))
+
+    def progress(self):
+        """Counts of tickers by overall state for this run"""
+        rows = self.conn.execute("""
+            SELECT ticker,
+                   SUM(status = 'done') AS done,
+                   SUM(status = 'failed') AS failed,
+                   SUM(status = 'running') AS running,
+                   COUNT(*) AS total
+            FROM stages WHERE run = ? GROUP BY ticker
+        """, (self.run,)).fetchall()
+        counts = {"tickers": len(rows), "complete": 0, "failed": 0, "running": 0, "pending": 0}
+        for _, done, failed, running, total in rows:
+            if done == total:
+                counts["complete"] += 1
+            elif failed:
+                counts["failed"] += 1
+            elif running:
+                counts["running"] += 1
+            else:
+                counts["pending"] += 1
+        return counts
+
+    def print_progress(self):
+        counts = self.progress()
+        pct = counts["complete"] / counts["tickers"] * 100 if counts["tickers"] else 0
+        print(f"📒 Run {self.run}: {counts['complete']}/{counts['tickers']} complete ({pct:.1f}%), "
+              f"{counts['failed']} failed, {counts['running']} running, {counts['pending']} pending")
+        return counts
+
+    def failures(self, limit=20):
+        return self.conn.execute(
+            "SELECT ticker, stage, attempts, error FROM stages "
+            "WHERE run = ? AND status = 'failed' ORDER BY finished_at DESC LIMIT ?",
+            (self.run, limit)
+        ).fetchall()
+
+
+if __name__ == "__main__":
+    journal = RunJournal(run=sys.argv[1] if len(sys.argv) > 1 else None)
+    journal.print_progress()
+    for ticker, stage, attempts, error in journal.failures():
+        print(f"  ✗ {ticker} {stage} (attempt {attempts}): {error}")
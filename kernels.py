@@ -0,0 +1,246 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numba
+except ImportError:  # Fall back to the NumPy versions below
+    numba = None
+
+TRADING_DAYS = 252
+
+# "numba" when the compiled loops are available, otherwise "numpy"
+BACKEND = "numba" if numba else "numpy"
+
+
+# =====================================
+# LOOP KERNELS (compiled by numba when installed)
+# =====================================
+
+def _max_drawdown_loop(returns):
+    equity = 1.0
+    peak = 1.0
+    worst = 0.0
+    for i in range(returns.shape[0]):
+        equity *= 1.0 + returns[i]
+        if i == 0 or equity > peak:
+            peak = equity
+        drawdown = (equity - peak) / peak
+        if drawdown < worst:
+            worst = drawdown
+    return worst
+
+
+def _rolling_mean_loop(values, window):
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    total = 0.0
+    valid = 0
+    for i in range(n):
+        value = values[i]
+        if value == value:
+            total += value
+            valid += 1
+        if i >= window:
+            old = values[i - window]
+            if old == old:
+                total -= old
+                valid -= 1
+        if valid == window:
+            out[i] = total / window
+    return out
+
+
+def _rolling_std_loop(values, window, ddof):
+    # Running mean and sum of squared deviations, added and removed one value at a time as in pandas
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    nobs = 0
+    mean = 0.0
+    ssqdm = 0.0
+    for i in range(n):
+        value = values[i]
+        if value == value:
+            nobs += 1
+            delta = value - mean
+            mean += delta / nobs
+            ssqdm += (nobs - 1) * delta * delta / nobs
+        if i >= window:
+            old = values[i - window]
+            if old == old:
+                nobs -= 1
+                if nobs:
+                    delta = old - mean
+                    mean -= delta / nobs
+                    ssqdm -= (nobs + 1) * delta * delta / nobs
+                else:
+                    mean = 0.0
+                    ssqdm = 0.0
+        if nobs == window and nobs > ddof:
+            out[i] = np.sqrt(max(ssqdm, 0.0) / (nobs - ddof))
+    return out
+
+
+def _price_features_loop(open_, high, low, close, month):
+    n = close.shape[0]
+    out = np.empty((n, 3))
+    for i in range(n):
+        out[i, 0] = open_[i] - close[i]
+        out[i, 1] = low[i] - high[i]
+        out[i, 2] = 1.0 if month[i] % 3 == 0 else 0.0
+    return out
+
+
+if numba:
+    _max_drawdown_loop = numba.njit(cache=True)(_max_drawdown_loop)
+    _rolling_mean_loop = numba.njit(cache=True)(_rolling_mean_loop)
+    _rolling_std_loop = numba.njit(cache=True)(_rolling_std_loop)
+    _price_features_loop = numba.njit(cache=True)(_price_features_loop)
+
+
+# =====================================
+# PUBLIC FUNCTIONS
+# =====================================
+
+def _array(values):
+    return np.ascontiguousarray(np.asarray(values, dtype=np.float64))
+
+
+def max_drawdown(returns):
+    """
+    Largest peak-to-trough loss of compounded returns (a negative fraction).
+
+    Same value as ((1 + r).cumprod() / its expanding max - 1).min() for
+    returns without NaN.
+    """
+    returns = _array(returns)
+    if not len(returns):
+        return np.nan
+    if numba:
+        return float(_max_drawdown_loop(returns))
+    equity = np.cumprod(1 + returns)
+    peak = np.maximum.accumulate(equity)
+    return float(((equity - peak) / peak).min())
+
+
+def rolling_moment(values, window, stat="mean", ddof=1):
+    """
+    Rolling mean or std down axis 0 of a 1-D or 2-D array without numba.
+
+    Uses pandas' compiled rolling windows (NaN until a full window
+    without NaN), which stay exact where running sums over the whole
+    array would cancel, e.g. on prices spanning orders of magnitude.
+    Series and DataFrames are used as they are, with no copy.
+    """
+    if not isinstance(values, (pd.Series, pd.DataFrame)):
+        values = np.asarray(values, dtype=np.float64)
+        values = pd.Series(values) if values.ndim == 1 else pd.DataFrame(values)
+    rolling = values.rolling(window)
+    result = rolling.mean() if stat == "mean" else rolling.std(ddof=ddof)
+    return result.to_numpy(dtype=np.float64)
+
+
+def rolling_mean(values, window):
+    """Series.rolling(window).mean() as an array: NaN until a full window without NaN"""
+    if numba:
+        return _rolling_mean_loop(_array(values), window)
+    return rolling_moment(values, window, "mean")
+
+
+def rolling_std(values, window, ddof=1):
+    """Series.rolling(window).std(ddof) as an array"""
+    if numba:
+        return _rolling_std_loop(_array(values), window, ddof)
+    return rolling_moment(values, window, "std", ddof)
+
+
+def rolling_volatility(returns, window=30, periods=TRADING_DAYS):
+    """Annualized rolling standard deviation of returns"""
+    return rolling_std(returns, window) * np.sqrt(periods)
+
+
+def price_features(open_, high, low, close, month):
+    """(n, 3) model features: open - close, low - high, and 1.0 in quarter-end months"""
+    open_, high, low, close = (_array(a) for a in (open_, high, low, close))
+    month = np.ascontiguousarray(np.asarray(month, dtype=np.int64))
+    if numba:
+        return _price_features_loop(open_, high, low, close, month)
+    return np.column_stack([open_ - close, low - high, (month % 3 == 0).astype(np.float64)])
+
+
+# =====================================
+# BENCHMARK
+# =====================================
+
+def benchmark(sizes=(2_520, 25_200, 252_000), repeat=20, seed=2022, min_speedup=0.9, max_rel_diff=1e-9):
+    """
+    Median time of each kernel against the pandas chain it replaces.
+
+    Runs on synthetic prices; the first call of each compiled kernel is
+    timed separately as compile (or cache load) time. The largest
+    difference from the pandas result, relative to its magnitude (floored
+    at 1), is reported alongside. Raises RuntimeError when a kernel is
+    slower than pandas (min_speedup leaves room for timing noise, since
+    without numba the rolling kernels are pandas itself) or differs by
+    more than max_rel_diff.
+    """
+    rng = np.random.default_rng(seed)
+    compile_start = time.perf_counter()
+    max_drawdown(np.zeros(3))
+    rolling_mean(np.zeros(3), 2)
+    rolling_std(np.zeros(3), 2)
+    price_features(*(np.zeros(3) for _ in range(4)), np.ones(3))
+    print(f"Backend: {BACKEND} (first calls {time.perf_counter() - compile_start:.2f}s)")
+
+    def median_ms(fn):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return np.median(times) * 1000
+
+    print(f"{'Kernel':<16}{'Rows':>9}{'pandas ms':>11}{'kernel ms':>11}{'speedup':>9}{'rel diff':>11}")
+    results = []
+    for n in sizes:
+        close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, n))))
+        open_ = close.shift(1).fillna(close.iloc[0]) * (1 + rng.normal(0, 0.003, n))
+        high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n))
+        low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n))
+        month = pd.Series(rng.integers(1, 13, n))
+        returns = close.pct_change().dropna()
+
+        def pandas_drawdown():
+            cumulative = (1 + returns).cumprod()
+            running_max = cumulative.expanding().max()
+            return ((cumulative - running_max) / running_max).min()
+
+        def pandas_features():
+            df = pd.DataFrame({'open-close': open_ - close, 'low-high': low - high,
+                               'is_quarter_end': (month % 3 == 0).astype(int)})
+            return df.to_numpy(dtype=float)
+
+        cases = [
+            ("max_drawdown", pandas_drawdown, lambda: max_drawdown(returns.to_numpy())),
+            ("ma50", lambda: close.rolling(window=50).mean().to_numpy(), lambda: rolling_mean(close, 50)),
+            ("ma200", lambda: close.rolling(window=200).mean().to_numpy(), lambda: rolling_mean(close, 200)),
+            ("vol30", lambda: (returns.rolling(window=30).std() * np.sqrt(252)).to_numpy(),
+             lambda: rolling_volatility(returns, 30)),
+            ("features", pandas_features, lambda: price_features(open_, high, low, close, month)),
+        ]
+        for name, reference, kernel in cases:
+            expected = np.asarray(reference(), dtype=float)
+            with np.errstate(invalid="ignore"):
+                diff = np.nanmax(np.abs(expected - kernel()) / np.maximum(np.abs(expected), 1.0))
+            pandas_ms, kernel_ms = median_ms(reference), median_ms(kernel)
+            results.append({"kernel": name, "rows": n, "pandas_ms": pandas_ms, "kernel_ms": kernel_ms,
+                            "speedup": pandas_ms / kernel_ms, "max_rel_diff": diff})
+            print(f"{name:<16}{n:>9,}{pandas_ms:>11.3f}{kernel_ms:>11.3f}{pandas_ms / kernel_ms:>8.1f}x{diff:>11.1e}")
+
+    failures = [f"{r['kernel']} at {r['rows']:,} rows: " +
+                (f"{r['speedup']:.2f}x pandas" if r["speedup"] < min_speedup else f"rel diff {r['max_rel_diff']:.1e}")
+                for r in results if r["speedup"] < min_speedup or not r["max_rel_diff"] <= max_rel_diff]
+    if failures:
+        raise RuntimeError("Kernel benchmark failed: " + "; ".join(failures))
+    return results
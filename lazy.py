@@ -0,0 +1,23 @@
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """
+    Return module `name` without executing it until an attribute is first used.
+
+    Lets heavy dependencies (pandas, yfinance, matplotlib, scikit-learn)
+    sit at module level as usual while commands that never touch them
+    don't pay their import cost. A missing package still fails here.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
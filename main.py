@@ -1,51 +1,230 @@
-import requests
-import pandas as pd
-import numpy as np
-from bs4 import BeautifulSoup
 import json
 import os
-from datetime import datetime, timedelta
-import yfinance as yf
+import sys
+from datetime import date, datetime, timedelta
 import time
-from model import Model
-from graph import FinancialVisualizer
-from excel import EXCEL_WALKER
+
+# Process start, for the CLI's cold-start report
+_T0 = time.perf_counter()
+
+from lazy import lazy_import
+requests = lazy_import("requests")
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+yf = lazy_import("yfinance")
+from filing_text import fetch_filing_sections
+from filing_archive import ARCHIVE_DIR, archive_filings
+from serializer import write_json
+from instrumentation import TRACER
+from journal import RunJournal, hash_directory
+from scheduler import Stage, run_dag
+from concurrent.futures import ProcessPoolExecutor
 import shutil
 
 HEADERS = {
     "User-Agent": "Dylan Feuerman Dylan.M.Feuerman@gmail.com"
 }
 
+# XBRL us-gaap tags parsed for each statement, keyed by our metric name
+# Income Statement Items
+INCOME_STATEMENT_TAGS = {
+    "Revenue": "Revenues",
+    "RevenueTotal": "RevenueFromContractWithCustomerExcludingAssessedTax",
+    "CostOfRevenue": "CostOfRevenue",
+    "GrossProfit": "GrossProfit",
+    "ResearchDevelopment": "ResearchAndDevelopmentExpense",
+    "SellingGeneralAdmin": "SellingGeneralAndAdministrativeExpense",
+    "OperatingExpenses": "OperatingExpenses",
+    "OperatingIncome": "OperatingIncomeLoss",
+    "InterestExpense": "InterestExpense",
+    "TaxExpense": "IncomeTaxExpenseBenefit",
+    "NetIncome": "NetIncomeLoss",
+    "EPS_Basic": "EarningsPerShareBasic",
+    "EPS_Diluted": "EarningsPerShareDiluted",
+    "WeightedAverageShares": "WeightedAverageNumberOfSharesOutstandingBasic",
+    "WeightedAverageSharesDiluted": "WeightedAverageNumberOfDilutedSharesOutstanding"
+}
+
+# Balance Sheet Items
+BALANCE_SHEET_TAGS = {
+    "Assets": "Assets",
+    "CurrentAssets": "AssetsCurrent",
+    "Cash": "CashAndCashEquivalentsAtCarryingValue",
+    "ShortTermInvestments": "ShortTermInvestments",
+    "AccountsReceivable": "AccountsReceivableNetCurrent",
+    "Inventory": "InventoryNet",
+    "PropertyPlantEquipment": "PropertyPlantAndEquipmentNet",
+    "Goodwill": "Goodwill",
+    "IntangibleAssets": "IntangibleAssetsNetExcludingGoodwill",
+    "Liabilities": "Liabilities",
+    "CurrentLiabilities": "LiabilitiesCurrent",
+    "AccountsPayable": "AccountsPayableCurrent",
+    "ShortTermDebt": "ShortTermBorrowings",
+    "LongTermDebt": "LongTermDebt",
+    "LongTermDebtCurrent": "LongTermDebtCurrent",
+    "StockholdersEquity": "StockholdersEquity",
+    "RetainedEarnings": "RetainedEarningsAccumulatedDeficit",
+    "CommonStock": "CommonStockValue",
+    "TreasuryStock": "TreasuryStockValue"
+}
+
+# Cash Flow Statement Items
+CASH_FLOW_TAGS = {
+    "OperatingCashFlow": "NetCashProvidedByUsedInOperatingActivities",
+    "InvestingCashFlow": "NetCashProvidedByUsedInInvestingActivities",
+    "FinancingCashFlow": "NetCashProvidedByUsedInFinancingActivities",
+    "CapEx": "PaymentsToAcquirePropertyPlantAndEquipment",
+    "Depreciation": "DepreciationDepletionAndAmortization",
+    "StockBasedComp": "ShareBasedCompensation",
+    "DividendsPaid": "PaymentsOfDividends",
+    "StockRepurchase": "PaymentsForRepurchaseOfCommonStock",
+    "DebtIssuance": "ProceedsFromIssuanceOfLongTermDebt",
+    "DebtRepayment": "RepaymentsOfLongTermDebt",
+    "ChangeInWorkingCapital": "IncreaseDecreaseInOperatingCapital"
+}
+
+FINANCIAL_TAGS = {**INCOME_STATEMENT_TAGS, **BALANCE_SHEET_TAGS, **CASH_FLOW_TAGS}
+
+# Payloads a journaled data stage needs; if any is missing the stage fails and is retried
+REQUIRED_PAYLOADS = ("SEC_Company_Info", "XBRL_Raw", "Yahoo_Finance")
+
+
 class ComprehensiveDataFetcher:
-    def __init__(self):
-        self.viz = FinancialVisualizer()
-        self.excel = EXCEL_WALKER()
+    def __init__(self, compress_raw_json=False, parallel=False, chart_templates=False, fast_charts=False,
+                 archive=False):
+        # Chart and workbook helpers are created on first use (see viz/excel)
+        self._viz = None
+        # Reuse chart layouts across tickers (see FinancialVisualizer templates)
+        self.chart_templates = chart_templates
+        # Draw the price chart from per-pixel buckets (see FinancialVisualizer fast_render)
+        self.fast_charts = fast_charts
+        self._excel = None
+        self.compress_raw_json = compress_raw_json
+        # Run each ticker as a stage graph (see fetch_all_data_parallel)
+        self.parallel = parallel
+        self._process_pool = None
+        self._peers = None
+        self._screens = None
+        self._snapshots = None
+        # Also archive every 10-K/10-Q per ticker for the filing index (see archive_filings)
+        self.archive = archive
+        # Optional shared limiter (e.g. work_queue.SharedRateLimiter) for SEC requests
+        self.rate_limiter = None
         
+    @property
+    def viz(self):
+        if self._viz is None:
+            from graph import FinancialVisualizer
+            self._viz = FinancialVisualizer(fast_render=self.fast_charts, templates=self.chart_templates)
+        return self._viz
+    
+    @property
+    def peers(self):
+        if self._peers is None:
+            from peer_ranks import PeerRanks
+            self._peers = PeerRanks()
+        return self._peers
+    
+    @property
+    def screens(self):
+        if self._screens is None:
+            from screens import ScreenEngine
+            self._screens = ScreenEngine()
+        return self._screens
+    
+    @property
+    def snapshots(self):
+        if self._snapshots is None:
+            from snapshot_store import SnapshotStore
+            self._snapshots = SnapshotStore()
+        return self._snapshots
+    
+    @property
+    def excel(self):
+        if self._excel is None:
+            from excel import EXCEL_WALKER
+            self._excel = EXCEL_WALKER()
+        return self._excel
+    
     # =====================================
     # SEC DATA
     # =====================================
-    def set_ticker(self, ticker):
+    def set_ticker(self, ticker, cik=None, clean=True):
         
         self.ticker = ticker.upper()
-        self.clean_output_directory()
-        self.cik = None  # Reset CIK when ticker changes
-    def multi_ticker(self, debug_count=None):
+        if clean:
+            self.clean_output_directory()
+        else:
+            self._ensure_stock_data_dirs()
+        self.cik = cik  # Reset CIK when ticker changes
+        self.latest_10k_sections = {}
+    def multi_ticker(self, debug_count=None, run=None, resume=True):
+        """
+        Run every SEC ticker, recording progress in a RunJournal.
+
+        With resume=True a restarted run with the same name skips tickers
+        already complete and retries only their failed stages.
+        """
         count = 0
-        """Get CIK from ticker"""
         url = "https://www.sec.gov/files/company_tickers.json"
-        data = requests.get(url, headers=HEADERS).json()
-        for item in data.values():
-            self.cik = str(item["cik_str"]).zfill(10)
-            self.run_all(item["ticker"])
-            print("hi")
-            if debug_count:
-                count += 1
-                if count >= debug_count:
+        data = self._get(url).json()
+        journal = RunJournal(run=run)
+        journal.register(item["ticker"] for item in data.values())
+        try:
+            for item in data.values():
+                if resume and journal.should_skip(item["ticker"]):
+                    continue
+                self.run_all(item["ticker"], cik=str(item["cik_str"]).zfill(10), journal=journal)
+                journal.print_progress()
+                if debug_count:
+                    count += 1
+                    if count >= debug_count:
+                        break
+        finally:
+            self.close()
+        self.save_peer_ranks()
+        TRACER.write_summary()
+        journal.close()
+
+    def save_peer_ranks(self):
+        """Rewrite Peer_Ranks.json for group members whose ranks moved during this run"""
+        if self._peers is None:
+            return
+        try:
+            with TRACER.stage("peers.save_changed"):
+                written = self.peers.save_changed()
+            print(f"📊 Refreshed peer ranks for {written} tickers")
+        except Exception as e:
+            print(f"   ⚠ Could not refresh peer ranks: {e}")
+
+    def close(self):
+        """Shut down the chart/workbook process pool (started by parallel runs and kept across tickers)"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True)
+            self._process_pool = None
+
+    def _get(self, url, retries=3):
+        """GET with retry on throttling/server errors; bytes and retries are counted"""
+        for attempt in range(retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.wait()
+            try:
+                response = requests.get(url, headers=HEADERS)
+                if response.status_code not in (429, 500, 502, 503, 504) or attempt == retries:
                     break
+            except requests.ConnectionError:
+                if attempt == retries:
+                    raise
+            TRACER.count("http.retries")
+            time.sleep(0.5 * 2 ** attempt)
+        TRACER.count("http.requests")
+        TRACER.count("http.bytes", len(response.content))
+        return response
+    
     def get_cik(self):
         """Get CIK from ticker"""
         url = "https://www.sec.gov/files/company_tickers.json"
-        data = requests.get(url, headers=HEADERS).json()
+        data = self._get(url).json()
         
         for item in data.values():
             if item["ticker"].upper() == self.ticker:
@@ -59,7 +238,7 @@ class ComprehensiveDataFetcher:
             self.get_cik()
             
         url = f"https://data.sec.gov/submissions/CIK{self.cik}.json"
-        response = requests.get(url, headers=HEADERS)
+        response = self._get(url)
         time.sleep(0.1)  # Rate limiting
         return response.json()
     
@@ -69,7 +248,7 @@ class ComprehensiveDataFetcher:
             self.get_cik()
             
         url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{self.cik}.json"
-        response = requests.get(url, headers=HEADERS)
+        response = self._get(url)
         time.sleep(0.1)
         return response.json()
     
@@ -77,67 +256,8 @@ class ComprehensiveDataFetcher:
         """Parse comprehensive financial statement data from XBRL"""
         facts = xbrl.get("facts", {}).get("us-gaap", {})
         
-        # Income Statement Items
-        income_statement = {
-            "Revenue": "Revenues",
-            "RevenueTotal": "RevenueFromContractWithCustomerExcludingAssessedTax",
-            "CostOfRevenue": "CostOfRevenue",
-            "GrossProfit": "GrossProfit",
-            "ResearchDevelopment": "ResearchAndDevelopmentExpense",
-            "SellingGeneralAdmin": "SellingGeneralAndAdministrativeExpense",
-            "OperatingExpenses": "OperatingExpenses",
-            "OperatingIncome": "OperatingIncomeLoss",
-            "InterestExpense": "InterestExpense",
-            "TaxExpense": "IncomeTaxExpenseBenefit",
-            "NetIncome": "NetIncomeLoss",
-            "EPS_Basic": "EarningsPerShareBasic",
-            "EPS_Diluted": "EarningsPerShareDiluted",
-            "WeightedAverageShares": "WeightedAverageNumberOfSharesOutstandingBasic",
-            "WeightedAverageSharesDiluted": "WeightedAverageNumberOfDilutedSharesOutstanding"
-        }
-        
-        # Balance Sheet Items
-        balance_sheet = {
-            "Assets": "Assets",
-            "CurrentAssets": "AssetsCurrent",
-            "Cash": "CashAndCashEquivalentsAtCarryingValue",
-            "ShortTermInvestments": "ShortTermInvestments",
-            "AccountsReceivable": "AccountsReceivableNetCurrent",
-            "Inventory": "InventoryNet",
-            "PropertyPlantEquipment": "PropertyPlantAndEquipmentNet",
-            "Goodwill": "Goodwill",
-            "IntangibleAssets": "IntangibleAssetsNetExcludingGoodwill",
-            "Liabilities": "Liabilities",
-            "CurrentLiabilities": "LiabilitiesCurrent",
-            "AccountsPayable": "AccountsPayableCurrent",
-            "ShortTermDebt": "ShortTermBorrowings",
-            "LongTermDebt": "LongTermDebt",
-            "LongTermDebtCurrent": "LongTermDebtCurrent",
-            "StockholdersEquity": "StockholdersEquity",
-            "RetainedEarnings": "RetainedEarningsAccumulatedDeficit",
-            "CommonStock": "CommonStockValue",
-            "TreasuryStock": "TreasuryStockValue"
-        }
-        
-        # Cash Flow Statement Items
-        cash_flow = {
-            "OperatingCashFlow": "NetCashProvidedByUsedInOperatingActivities",
-            "InvestingCashFlow": "NetCashProvidedByUsedInInvestingActivities",
-            "FinancingCashFlow": "NetCashProvidedByUsedInFinancingActivities",
-            "CapEx": "PaymentsToAcquirePropertyPlantAndEquipment",
-            "Depreciation": "DepreciationDepletionAndAmortization",
-            "StockBasedComp": "ShareBasedCompensation",
-            "DividendsPaid": "PaymentsOfDividends",
-            "StockRepurchase": "PaymentsForRepurchaseOfCommonStock",
-            "DebtIssuance": "ProceedsFromIssuanceOfLongTermDebt",
-            "DebtRepayment": "RepaymentsOfLongTermDebt",
-            "ChangeInWorkingCapital": "IncreaseDecreaseInOperatingCapital"
-        }
-        
-        all_metrics = {**income_statement, **balance_sheet, **cash_flow}
-        
         output = {}
-        for name, tag in all_metrics.items():
+        for name, tag in FINANCIAL_TAGS.items():
             if tag in facts and "units" in facts[tag]:
                 try:
                     df = pd.DataFrame(facts[tag]["units"].get("USD", []))
@@ -148,6 +268,11 @@ class ComprehensiveDataFetcher:
         
         return output
     
+    def parse_fact_table(self, xbrl):
+        """Compact columnar alternative to parse_financial_statements (see facts_store.FactTable)"""
+        from facts_store import FactTable
+        return FactTable.from_xbrl(xbrl, FINANCIAL_TAGS, ticker=self.ticker)
+    
     def get_latest_10k_text(self, company_data):
         """Download and parse latest 10-K"""
         forms = company_data["filings"]["recent"]["form"]
@@ -156,18 +281,22 @@ class ComprehensiveDataFetcher:
         
         for i, form in enumerate(forms):
             if form == "10-K":
-                accession = accessions[i]
-                document = documents[i]
-                accession_clean = accession.replace("-", "")
-                url = f"https://www.sec.gov/Archives/edgar/data/{int(self.cik)}/{accession_clean}/{document}"
-                
-                time.sleep(0.1)
-                html = requests.get(url, headers=HEADERS).text
-                soup = BeautifulSoup(html, "lxml")
-                return soup.get_text("\n")
+                # Streamed straight to text; Items 1, 1A, 7 and 7A are cached alongside it
+                filing = fetch_filing_sections(self.cik, accessions[i], documents[i], HEADERS,
+                                               limiter=self.rate_limiter)
+                self.latest_10k_sections = filing["sections"]
+                return filing["text"]
         
         return None
     
+    def archive_filings(self, forms=("10-K", "10-Q"), max_workers=8):
+        """Archive every 10-K/10-Q (all submission shards) as compressed text"""
+        if not self.cik:
+            self.get_cik()
+        company_data = self.get_sec_filings()
+        return archive_filings(self.ticker, self.cik, company_data, HEADERS,
+                               forms=forms, max_workers=max_workers, limiter=self.rate_limiter)
+    
     # =====================================
     # YAHOO FINANCE DATA
     # =====================================
@@ -317,11 +446,9 @@ class ComprehensiveDataFetcher:
                 if len(downside) > 0 and downside.std() > 0:
                     risk["Sortino_Ratio"] = (excess_returns.mean() / downside.std()) * np.sqrt(252)
                 
-                # Maximum drawdown
-                cumulative = (1 + returns).cumprod()
-                running_max = cumulative.expanding().max()
-                drawdown = (cumulative - running_max) / running_max
-                risk["Max_Drawdown"] = drawdown.min()
+                # Maximum drawdown, in one pass over the returns
+                from kernels import max_drawdown
+                risk["Max_Drawdown"] = max_drawdown(returns.to_numpy())
                 
                 # VaR (95% confidence)
                 risk["VaR_95"] = returns.quantile(0.05)
@@ -346,7 +473,8 @@ class ComprehensiveDataFetcher:
         # 1. SEC Data
         print("📄 Fetching SEC filings...")
         try:
-            sec_data = self.get_sec_filings()
+            with TRACER.stage("sec.submissions"):
+                sec_data = self.get_sec_filings()
             all_data["SEC_Company_Info"] = sec_data
             print("   ✓ SEC company info fetched")
         except Exception as e:
@@ -356,9 +484,11 @@ class ComprehensiveDataFetcher:
         # 2. XBRL Financial Data
         print("📊 Fetching XBRL financial data...")
         try:
-            xbrl = self.get_xbrl_facts()
+            with TRACER.stage("sec.xbrl_facts"):
+                xbrl = self.get_xbrl_facts()
             all_data["XBRL_Raw"] = xbrl
-            financials = self.parse_financial_statements(xbrl)
+            with TRACER.stage("parse.financial_statements"):
+                financials = self.parse_financial_statements(xbrl)
             all_data["Financial_Statements"] = financials
             print(f"   ✓ Parsed {len(financials)} financial metrics")
         except Exception as e:
@@ -368,7 +498,8 @@ class ComprehensiveDataFetcher:
         # 3. Yahoo Finance Data
         print("💹 Fetching Yahoo Finance data...")
         try:
-            yf_data = self.get_yfinance_data()
+            with TRACER.stage("yahoo.fetch"):
+                yf_data = self.get_yfinance_data()
             all_data["Yahoo_Finance"] = yf_data
             print("   ✓ Yahoo Finance data fetched")
         except Exception as e:
@@ -378,21 +509,24 @@ class ComprehensiveDataFetcher:
         # 4. Calculated Metrics
         print("🧮 Calculating derived metrics...")
         try:
-            ratios = self.calculate_financial_ratios(financials, yf_data)
+            with TRACER.stage("calc.ratios"):
+                ratios = self.calculate_financial_ratios(financials, yf_data)
             all_data["Financial_Ratios"] = ratios
             print(f"   ✓ Calculated {len(ratios)} ratios")
         except Exception as e:
             print(f"   ✗ Ratio calculation error: {e}")
         
         try:
-            growth = self.calculate_growth_metrics(financials)
+            with TRACER.stage("calc.growth"):
+                growth = self.calculate_growth_metrics(financials)
             all_data["Growth_Metrics"] = growth
             print(f"   ✓ Calculated {len(growth)} growth metrics")
         except Exception as e:
             print(f"   ✗ Growth calculation error: {e}")
         
         try:
-            risk = self.calculate_risk_metrics(yf_data)
+            with TRACER.stage("calc.risk"):
+                risk = self.calculate_risk_metrics(yf_data)
             all_data["Risk_Metrics"] = risk
             print(f"   ✓ Calculated {len(risk)} risk metrics")
         except Exception as e:
@@ -402,8 +536,10 @@ class ComprehensiveDataFetcher:
         print("📑 Fetching latest 10-K text...")
         try:
             if sec_data:
-                text_10k = self.get_latest_10k_text(sec_data)
+                with TRACER.stage("sec.10k_text"):
+                    text_10k = self.get_latest_10k_text(sec_data)
                 all_data["Latest_10K_Text"] = text_10k
+                all_data["Latest_10K_Sections"] = getattr(self, "latest_10k_sections", {})
                 print("   ✓ 10-K text fetched")
         except Exception as e:
             print(f"   ✗ 10-K fetch error: {e}")
@@ -411,6 +547,58 @@ class ComprehensiveDataFetcher:
         self.company_data = all_data
         return all_data
     
+    def fetch_all_data_parallel(self):
+        """
+        Fetch all available data as a stage graph.
+
+        Produces the same all_data as fetch_all_data, but the SEC
+        submissions, XBRL facts, Yahoo data and 10-K download run
+        concurrently, and each metric starts as soon as its own inputs
+        arrive. A failed stage falls back to an empty result the same way
+        the sequential path does.
+        """
+        print(f"\n{'='*60}")
+        print(f"Fetching comprehensive data for {self.ticker} (parallel)")
+        print(f"{'='*60}\n")
+        
+        if not self.cik:
+            try:
+                with TRACER.stage("sec.cik"):
+                    self.get_cik()
+            except Exception as e:
+                print(f"   ✗ CIK lookup error: {e}")
+        
+        def traced(name, func):
+            def run(*args):
+                with TRACER.stage(name):
+                    return func(*args)
+            return run
+        
+        stages = [
+            Stage("SEC_Company_Info", traced("sec.submissions", self.get_sec_filings), default={}),
+            Stage("XBRL_Raw", traced("sec.xbrl_facts", self.get_xbrl_facts), default={}),
+            Stage("Yahoo_Finance", traced("yahoo.fetch", self.get_yfinance_data), default={}),
+            Stage("Financial_Statements", traced("parse.financial_statements", self.parse_financial_statements),
+                  deps=["XBRL_Raw"], kind="compute", default={}),
+            Stage("Financial_Ratios", traced("calc.ratios", self.calculate_financial_ratios),
+                  deps=["Financial_Statements", "Yahoo_Finance"], kind="compute"),
+            Stage("Growth_Metrics", traced("calc.growth", self.calculate_growth_metrics),
+                  deps=["Financial_Statements"], kind="compute"),
+            Stage("Risk_Metrics", traced("calc.risk", self.calculate_risk_metrics),
+                  deps=["Yahoo_Finance"], kind="compute"),
+            Stage("Latest_10K_Text", traced("sec.10k_text", lambda sec: self.get_latest_10k_text(sec) if sec else None),
+                  deps=["SEC_Company_Info"])
+        ]
+        results, errors = run_dag(stages)
+        
+        # Keep the sequential layout: failed stages are left out, not stored as defaults
+        all_data = {name: value for name, value in results.items() if name not in errors}
+        if all_data.get("Latest_10K_Text"):
+            all_data["Latest_10K_Sections"] = self.latest_10k_sections
+        
+        self.company_data = all_data
+        return all_data
+    
     # =====================================
     # SAVE DATA
     # =====================================
@@ -431,10 +619,9 @@ class ComprehensiveDataFetcher:
         for key in ["SEC_Company_Info", "XBRL_Raw", "Yahoo_Finance"]:
             if key in self.company_data:
                 try:
-                    # Handle non-serializable objects
-                    data_to_save = self._make_serializable(self.company_data[key])
-                    with open(f"{json_dir}/{key}.json", "w") as f:
-                        json.dump(data_to_save, f, indent=2, default=str)
+                    # Streams DataFrames through pandas' encoder instead of _make_serializable
+                    write_json(self.company_data[key], f"{json_dir}/{key}.json",
+                               compress=self.compress_raw_json)
                 except Exception as e:
                     print(f"   ⚠ Could not save {key}: {e}")
                     import traceback
@@ -466,6 +653,11 @@ class ComprehensiveDataFetcher:
                     import traceback
                     traceback.print_exc()
         
+        # Sector/industry for peer ranking (see peer_ranks)
+        info = self.company_data.get("Yahoo_Finance", {}).get("info", {})
+        with open(f"{metrics_dir}/Classification.json", "w") as f:
+            json.dump({"sector": info.get("sector"), "industry": info.get("industry")}, f, indent=2)
+        
         # 4. Save historical price data
         if "Yahoo_Finance" in self.company_data and "history" in self.company_data["Yahoo_Finance"]:
             history_dir = os.path.join(output_dir, "04_Market_Data")
@@ -479,12 +671,16 @@ class ComprehensiveDataFetcher:
                 pass
         
         # 5. Save 10-K text
-        if "Latest_10K_Text" in self.company_data:
+        if self.company_data.get("Latest_10K_Text"):
             text_dir = os.path.join(output_dir, "05_Filing_Text")
             os.makedirs(text_dir, exist_ok=True)
             
             with open(f"{text_dir}/Latest_10K.txt", "w", encoding="utf-8") as f:
                 f.write(self.company_data["Latest_10K_Text"])
+            
+            for item, section in self.company_data.get("Latest_10K_Sections", {}).items():
+                with open(f"{text_dir}/Latest_10K_{item}.txt", "w", encoding="utf-8") as f:
+                    f.write(section)
         
         # 6. Create summary report
         self._create_summary_report(output_dir)
@@ -580,23 +776,167 @@ class ComprehensiveDataFetcher:
             print(f"🧹 Cleaned existing directory: {output_dir}")
         else:
             print(f"No existing directory to clean: {output_dir}")
+        self._ensure_stock_data_dirs()
+    
+    def _ensure_stock_data_dirs(self):
         if not os.path.isdir("stock_data"):
             os.mkdir("stock_data")
         if not os.path.isdir(f"stock_data/{self.ticker}"):
             os.mkdir(f"stock_data/{self.ticker}")
             os.mkdir(f"stock_data/{self.ticker}/charts")
     
-    def run_all(self, ticker):
-        self.set_ticker(ticker)
-        self.fetch_all_data()
-        self.save_all_data()
-        self.viz.set_data_dir(ticker)
-        self.viz.run_all()
+    def run_all(self, ticker, cik=None, journal=None):
+        """
+        Fetch, save, chart and export one ticker.
+
+        Without a journal errors propagate as before. With a journal each
+        stage's status is recorded, stages already done with the same
+        input hash are skipped (keeping their output), and a failed stage
+        skips the stages after it. With parallel=True the fetch runs as a
+        stage graph and charts/excel run side by side in worker processes.
+        With archive=True the ticker's filings are archived after the data
+        stage, once per day like the data itself.
+        """
+        TRACER.start_ticker(ticker.upper())
+        try:
+            output_dir = f"{ticker.upper()}_COMPLETE_DATA"
+            # Data is refetched once per day, so a resumed run on a later day gets fresh filings and prices
+            data_key = f"{ticker.upper()}|{date.today().isoformat()}"
+            data_done = journal is not None and journal.is_done(ticker, "data", data_key) \
+                and os.path.isdir(output_dir)
+            self.set_ticker(ticker, cik=cik, clean=not data_done)
+            fetch = (lambda: self._fetch_and_save(required=REQUIRED_PAYLOADS)) if journal else self._fetch_and_save
+            
+            archive_dir = os.path.join(ARCHIVE_DIR, ticker.upper())
+            stages = [
+                ("data", lambda: data_key, fetch, output_dir),
+                ("archive", lambda: data_key, self.archive_filings, archive_dir),
+                ("charts", lambda: hash_directory(output_dir), self._render_charts, None),
+                ("excel", lambda: hash_directory(output_dir), self._export_excel, None)
+            ]
+            if not self.archive:
+                stages = [stage for stage in stages if stage[0] != "archive"]
+            if self.parallel:
+                # Charts and the workbook only read the saved files, so they overlap
+                if self._run_stage(journal, "data", data_key, fetch, output_dir) and \
+                        (not self.archive or self._run_stage(journal, "archive", data_key,
+                                                             self.archive_filings, archive_dir)):
+                    self._run_process_stages(journal, output_dir)
+            else:
+                for stage, input_hash, func, output in stages:
+                    if not self._run_stage(journal, stage, input_hash(), func, output):
+                        break
+        finally:
+            self.last_trace = TRACER.end_ticker()
+        #self.remove_non_used_data()
+    
+    def _run_stage(self, journal, stage, input_hash, func, output_dir=None):
+        """
+        Run one stage under the journal; returns False when it failed.
+
+        A stage done with the same input hash is skipped only while its
+        output_dir (when given) still exists.
+        """
+        if journal is None:
+            func()
+            return True
+        if journal.is_done(self.ticker, stage, input_hash) and (output_dir is None or os.path.isdir(output_dir)):
+            print(f"⏭  {self.ticker} {stage} already done")
+            return True
+        journal.start(self.ticker, stage, input_hash)
+        try:
+            output = func()
+        except Exception as e:
+            print(f"   ✗ {self.ticker} {stage} failed: {e}")
+            journal.fail(self.ticker, stage, e)
+            return False
+        journal.finish(self.ticker, stage, output)
+        return True
+    
+    def _run_process_stages(self, journal, output_dir):
+        """Run the charts and excel stages at the same time in worker processes"""
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=2)
+        input_hash = hash_directory(output_dir)
+        futures = {}
+        for stage, func, args in [("charts", render_charts, (self.ticker, self.chart_templates, self.fast_charts)),
+                                  ("excel", export_excel, (self.ticker,))]:
+            if journal is not None:
+                if journal.is_done(self.ticker, stage, input_hash):
+                    print(f"⏭  {self.ticker} {stage} already done")
+                    continue
+                journal.start(self.ticker, stage, input_hash)
+            futures[stage] = (self._process_pool.submit(func, *args), time.perf_counter())
         
-        self.excel.set_path(ticker)
+        for stage, (future, start) in futures.items():
+            try:
+                output = future.result()
+            except Exception as e:
+                print(f"   ✗ {self.ticker} {stage} failed: {e}")
+                if journal is None:
+                    raise
+                journal.fail(self.ticker, stage, e)
+                continue
+            # Wall time from submission, since worker processes have their own tracer
+            TRACER.record(f"{stage}.process", time.perf_counter() - start)
+            if journal is not None:
+                journal.finish(self.ticker, stage, output)
+    
+    def _fetch_and_save(self, required=()):
+        """Fetch and save one ticker; raises after saving when a payload in required came back empty"""
+        if self.parallel:
+            self.fetch_all_data_parallel()
+        else:
+            self.fetch_all_data()
+        with TRACER.stage("save.all_data"):
+            self.save_all_data()
+        missing = [key for key in required if not self._has_payload(key)]
+        if missing:
+            raise RuntimeError(f"Missing {', '.join(missing)}; see the fetch errors above")
+        try:
+            # Keep the raw payloads before the next run's clean_output_directory removes them
+            with TRACER.stage("snapshots.put"):
+                results = self.snapshots.put_dir(self.ticker)
+            new = sum(r["new_bytes"] for r in results)
+            print(f"   📦 Snapshot: {new / 1e6:.2f} of {sum(r['bytes'] for r in results) / 1e6:.2f} MB new")
+        except Exception as e:
+            print(f"   ⚠ Could not snapshot raw data: {e}")
+        try:
+            with TRACER.stage("peers.update"):
+                self.peers.update_from_dir(self.ticker)
+                self.peers.save_ticker(self.ticker)
+        except Exception as e:
+            print(f"   ⚠ Could not update peer ranks: {e}")
+        try:
+            with TRACER.stage("screens.refresh"):
+                for event in self.screens.refresh_from_dirs([self.ticker]):
+                    print(f"   🔔 {event['ticker']} {event['event']}s {event['screen']}")
+        except Exception as e:
+            print(f"   ⚠ Could not refresh screens: {e}")
+        try:
+            with TRACER.stage("dashboard.export"):
+                from dashboard_export import export_ticker, update_manifest
+                update_manifest(self.ticker, export_ticker(self.ticker))
+        except Exception as e:
+            print(f"   ⚠ Could not export dashboard data: {e}")
+        return f"{self.ticker}_COMPLETE_DATA"
+    
+    def _has_payload(self, key):
+        payload = self.company_data.get(key)
+        if key == "Yahoo_Finance":
+            history = (payload or {}).get("history")
+            return history is not None and not history.empty
+        return bool(payload)
+    
+    def _render_charts(self):
+        self.viz.set_data_dir(self.ticker)
+        self.viz.run_all()
+        return f"stock_data/{self.ticker}/charts"
+    
+    def _export_excel(self):
+        self.excel.set_path(self.ticker)
         self.excel.walk()
-        exit(1)
-        #self.remove_non_used_data()
+        return self.excel.out_path
     
     def remove_non_used_data(self):
 
@@ -604,14 +944,511 @@ class ComprehensiveDataFetcher:
         shutil.rmtree(f"{self.ticker}_COMPLETE_DATA")
     
 
+# Per-process visualizer whose chart templates outlive one ticker
+_TEMPLATE_VIZ = None
+
+
+def render_charts(ticker, templates=False, fast=False):
+    """Chart one ticker from its saved data (process-pool entry point)"""
+    global _TEMPLATE_VIZ
+    from graph import FinancialVisualizer
+    if templates:
+        if _TEMPLATE_VIZ is None:
+            _TEMPLATE_VIZ = FinancialVisualizer(templates=True)
+        viz = _TEMPLATE_VIZ
+    else:
+        viz = FinancialVisualizer(fast_render=fast)
+    viz.set_data_dir(ticker)
+    viz.run_all()
+    return f"stock_data/{ticker}/charts"
+
+
+def export_excel(ticker):
+    """Build one ticker's workbook from its saved CSVs (process-pool entry point)"""
+    from excel import EXCEL_WALKER
+    excel = EXCEL_WALKER()
+    excel.set_path(ticker)
+    excel.walk()
+    return excel.out_path
+
+
 # =====================================
-# USAGE
+# CLI
 # =====================================
 
-if __name__ == "__main__":
-    tickers = ["A", "IE"]  # Change this to any ticker
-    #Model(ticker).run_all()
+HEAVY_MODULES = ["pandas", "numpy", "yfinance", "bs4", "lxml", "matplotlib", "seaborn",
+                 "openpyxl", "sklearn", "xgboost"]
+
+
+def _loaded_heavy_modules():
+    """Heavy packages actually executed so far (lazy placeholders don't count)"""
+    from importlib.util import _LazyModule
+    return [name for name in HEAVY_MODULES
+            if name in sys.modules and not isinstance(sys.modules[name], _LazyModule)]
+
+
+def cmd_cik(args):
     fetcher = ComprehensiveDataFetcher()
-    #fetcher.run_all(tickers[0])
-    fetcher.multi_ticker(debug_count=5)
-        
+    fetcher.ticker = args.ticker.upper()
+    fetcher.cik = None
+    print(f"{fetcher.ticker}: {fetcher.get_cik()}")
+
+
+def cmd_fetch(args):
+    fetcher = ComprehensiveDataFetcher(compress_raw_json=args.compress, parallel=args.parallel)
+    fetcher.set_ticker(args.ticker)
+    fetcher._fetch_and_save()
+
+
+def cmd_run(args):
+    fetcher = ComprehensiveDataFetcher(compress_raw_json=args.compress, parallel=args.parallel,
+                                       fast_charts=args.fast_charts, archive=args.archive)
+    try:
+        fetcher.run_all(args.ticker)
+    finally:
+        fetcher.close()
+
+
+def cmd_universe(args):
+    fetcher = ComprehensiveDataFetcher(parallel=args.parallel, chart_templates=args.chart_templates,
+                                       fast_charts=args.fast_charts, archive=args.archive)
+    fetcher.multi_ticker(debug_count=args.limit, run=args.run, resume=not args.restart)
+
+
+def cmd_metrics(args):
+    """Print saved ratios, growth and risk metrics without loading pandas"""
+    metrics_dir = os.path.join(f"{args.ticker.upper()}_COMPLETE_DATA", "03_Calculated_Metrics")
+    for key in ["Financial_Ratios", "Growth_Metrics", "Risk_Metrics"]:
+        path = os.path.join(metrics_dir, f"{key}.json")
+        if not os.path.exists(path):
+            print(f"✗ {path} not found; run 'fetch {args.ticker}' first")
+            continue
+        with open(path) as f:
+            values = json.load(f)
+        print(key)
+        for name, value in values.items():
+            if args.metric and name not in args.metric:
+                continue
+            print(f"  {name}: {value}")
+
+
+def cmd_charts(args):
+    render_charts(args.ticker.upper(), fast=args.fast_charts)
+
+
+def cmd_chart_bench(args):
+    import graph
+    graph.benchmark([t.upper() for t in args.tickers], repeat=args.repeat)
+
+
+def cmd_kernel_bench(args):
+    import kernels
+    try:
+        kernels.benchmark(repeat=args.repeat)
+    except RuntimeError as e:
+        sys.exit(f"✗ {e}")
+
+
+def cmd_shm_bench(args):
+    import shared_prices
+    shared_prices.benchmark(days=args.days, tickers=args.tickers, workers=args.workers)
+
+
+def cmd_excel(args):
+    export_excel(args.ticker.upper())
+
+
+def cmd_train(args):
+    from model import Model
+    model = Model(args.ticker.upper(), features=args.features)
+    if args.search:
+        model.search_hyperparameters(mode=args.search)
+    model.train_model()
+
+
+def cmd_backtest(args):
+    import backtest
+    tickers = [t.upper() for t in args.tickers]
+    signals = backtest.model_signals(tickers, model_name=args.model, features=args.features)
+    tester = backtest.Backtester(signals, backtest.load_prices(tickers))
+    variants = backtest.variant_grid(executions=("close", "open"))
+    start = time.perf_counter()
+    summary, _ = tester.run(variants)
+    print(f"{len(variants)} variants x {len(tester.tickers)} tickers in {time.perf_counter() - start:.2f}s\n")
+    columns = ["total_return", "cagr", "sharpe", "max_drawdown", "avg_daily_turnover", "hit_rate"]
+    print(summary[columns].head(args.top).to_string(float_format=lambda v: f"{v:.4f}"))
+
+
+def cmd_peers(args):
+    from peer_ranks import PeerRanks
+    peers = PeerRanks()
+    if args.build:
+        print(f"Loaded {peers.build()} tickers")
+    if args.save:
+        print(f"Wrote Peer_Ranks.json for {peers.save_changed()} tickers")
+    if args.export:
+        peers.build_table().to_csv(args.export, index=False)
+        print(f"Wrote {args.export}")
+    if args.ticker:
+        for level, metrics in peers.rank(args.ticker.upper()).items():
+            print(f"{level}:")
+            for metric, rank in sorted(metrics.items()):
+                z = "n/a" if rank["z"] is None else f"{rank['z']:+.2f}"
+                print(f"  {metric:<28} {rank['percentile']:>6.1%}  z {z:>6}  "
+                      f"({rank['peers']} in {rank['group']})")
+    peers.close()
+
+
+def cmd_screens(args):
+    from screens import ScreenEngine
+    engine = ScreenEngine()
+    if args.refresh:
+        tickers = [t.upper() for t in args.refresh]
+        if tickers == ["ALL"]:
+            tickers = [d.replace("_COMPLETE_DATA", "") for d in os.listdir(".") if d.endswith("_COMPLETE_DATA")]
+        start = time.perf_counter()
+        events = engine.refresh_from_dirs(tickers)
+        print(f"Refreshed {len(tickers)} tickers in {time.perf_counter() - start:.3f}s, {len(events)} events")
+        for event in events:
+            print(f"  🔔 {event['ticker']} {event['event']}s {event['screen']}")
+    for name, expression in engine.screens.items():
+        matches = engine.matches(name)
+        print(f"{name} ({len(matches)}): {expression}")
+        if args.verbose:
+            print(f"  {', '.join(matches)}")
+    if args.events:
+        print("\nRecent events:")
+        for event in engine.recent_events(args.events):
+            when = datetime.fromtimestamp(event["at"]).strftime("%Y-%m-%d %H:%M")
+            print(f"  {when} {event['ticker']:8} {event['event']:5} {event['screen']}")
+    engine.close()
+
+
+def cmd_dashboard(args):
+    from dashboard_export import build_manifest, export_ticker, update_manifest
+    for ticker in [t.upper() for t in args.tickers]:
+        start = time.perf_counter()
+        entry = export_ticker(ticker, out_dir=args.out)
+        update_manifest(ticker, entry, out_dir=args.out)
+        levels = ", ".join(f"{level['points']} bars" for level in entry["prices"].values())
+        print(f"Exported {ticker} (prices: {levels or 'none'}) in {time.perf_counter() - start:.2f}s")
+    if args.all or args.manifest or not args.tickers:
+        print(f"Manifest lists {build_manifest(out_dir=args.out, export=args.all)} tickers")
+
+
+def cmd_snapshots(args):
+    from snapshot_store import SnapshotStore
+    store = SnapshotStore()
+    if args.ticker:
+        ticker = args.ticker.upper()
+        if args.restore:
+            for path in store.restore(ticker, args.as_of, args.out):
+                print(f"Restored {path}")
+        else:
+            for name, taken, size in store.history(ticker):
+                print(f"  {taken}  {name:<18} {size / 1e6:>9.2f} MB")
+    stats = store.stats()
+    ratio = f"{stats['ratio']:.1f}x" if stats["ratio"] else "n/a"
+    print(f"{stats['snapshots']} snapshots, {stats['logical_bytes'] / 1e6:.1f} MB logical, "
+          f"{stats['stored_bytes'] / 1e6:.1f} MB stored in {stats['chunks']} chunks ({ratio})")
+    store.close()
+
+
+def cmd_archive(args):
+    fetcher = ComprehensiveDataFetcher()
+    for ticker in args.tickers:
+        fetcher.set_ticker(ticker, clean=False)
+        fetcher.archive_filings(forms=tuple(args.forms), max_workers=args.workers)
+
+
+def cmd_query(args):
+    from filing_index import FilingIndex
+    index = FilingIndex()
+    if args.build:
+        index.build()
+    try:
+        hits = index.search(" ".join(args.query))
+    except ValueError as e:
+        index.close()
+        sys.exit(f"✗ {e}")
+    for hit in hits:
+        print(f"{hit['ticker']:8} {hit['filing']:40} {hit['section']}")
+    print(f"{len(hits)} hits in {index.last_query_ms:.1f} ms")
+    index.close()
+
+
+def cmd_features(args):
+    from feature_store import FeatureStore, self_check
+    if args.check:
+        self_check()
+        return
+    store = FeatureStore()
+    store.update(rebuild=args.rebuild)
+    if args.ticker:
+        print(store.frame(args.ticker.upper()).tail(args.rows).to_string(float_format=lambda v: f"{v:.4f}"))
+
+
+def cmd_covariance(args):
+    from covariance import CovarianceEngine
+    engine = CovarianceEngine(ram_budget_mb=args.ram_mb)
+    engine.update(rebuild=args.rebuild)
+    if args.ticker:
+        print(f"\nMost correlated with {args.ticker.upper()}:")
+        print(engine.most_correlated(args.ticker.upper()).to_string())
+    if args.benchmark:
+        betas = engine.beta(args.benchmark.upper()).dropna().sort_values()
+        print(f"\nBeta vs {args.benchmark.upper()} ({len(betas)} tickers), lowest and highest:")
+        print(pd.concat([betas.head(5), betas.tail(5)]).to_string())
+
+
+def cmd_var(args):
+    import portfolio_risk
+    if args.benchmark:
+        portfolio_risk.benchmark(scenarios=args.scenarios, dist=args.dist)
+        return
+    weights = {}
+    for position in args.positions:
+        ticker, _, weight = position.partition("=")
+        weights[ticker.upper()] = float(weight) if weight else 1.0
+    total = sum(weights.values())
+    weights = {ticker: weight / total for ticker, weight in weights.items()}
+    
+    risk = portfolio_risk.PortfolioRisk(weights, lookback=args.lookback)
+    report = risk.report(horizon=args.horizon, scenarios=args.scenarios, dist=args.dist)
+    for method, values in report.items():
+        print(f"{method} ({values['scenarios']:,} scenarios, {args.horizon}-day)")
+        for key, value in values.items():
+            if key.startswith(("VaR", "CVaR")):
+                print(f"  {key}: {value:.2%}")
+    mc = report["monte_carlo"]
+    print(f"\n⏱  {mc['scenarios_per_second']:,.0f} scenarios/s")
+
+
+def cmd_risk(args):
+    import portfolio_risk
+    tickers = [ticker.upper() for ticker in args.tickers] or None
+    benchmark = args.benchmark.upper() if args.benchmark else None
+    table = portfolio_risk.universe_risk(tickers, benchmark=benchmark, workers=args.workers)
+    table = table.sort_values("volatility", ascending=False)
+    if args.export:
+        table.to_csv(args.export)
+        print(f"Wrote {args.export}")
+    print(f"{len(table)} tickers, most and least volatile:")
+    print(pd.concat([table.head(args.rows), table.tail(args.rows)]).to_string(float_format=lambda v: f"{v:.4f}"))
+
+
+def cmd_serve(args):
+    import asyncio
+    from service import MetricsService
+    service = MetricsService(workers=args.workers)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.pool.shutdown(cancel_futures=True)
+
+
+def cmd_startup(args):
+    """Measure cold start of 'import main' against eagerly importing every heavy dependency"""
+    import statistics
+    import subprocess
+    
+    here = os.path.dirname(os.path.abspath(__file__))
+    eager = "import " + ", ".join(m for m in HEAVY_MODULES if m != "matplotlib") + ", matplotlib.pyplot"
+    cases = [("python startup", "pass"), ("import main", "import main"), ("eager heavy imports", eager)]
+    
+    print(f"{'Case':<24}{'median s':>10}{'min s':>10}")
+    for label, code in cases:
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True)
+            times.append(time.perf_counter() - start)
+            if result.returncode:
+                print(f"{label:<24}{'failed':>10}")
+                break
+        else:
+            print(f"{label:<24}{statistics.median(times):>10.3f}{min(times):>10.3f}")
+
+
+def build_parser():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="SEC + Yahoo Finance data pipeline")
+    parser.add_argument("--timing", action="store_true",
+                        help="report import time and which heavy modules a command loaded")
+    parser.add_argument("--root",
+                        help="directory that all databases, caches and <TICKER>_COMPLETE_DATA outputs "
+                             "resolve against (default: cwd)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    p = sub.add_parser("cik", help="look up a ticker's CIK")
+    p.add_argument("ticker")
+    p.set_defaults(func=cmd_cik)
+    
+    for name, func, help_text in [("fetch", cmd_fetch, "fetch and save one ticker"),
+                                  ("run", cmd_run, "fetch, save, chart and export one ticker")]:
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("ticker")
+        p.add_argument("--parallel", action="store_true")
+        p.add_argument("--compress", action="store_true", help="gzip raw JSON")
+        if name == "run":
+            p.add_argument("--fast-charts", action="store_true",
+                           help="draw the price chart from per-pixel min/max buckets")
+            p.add_argument("--archive", action="store_true", help="also archive every 10-K/10-Q for query")
+        p.set_defaults(func=func)
+    
+    p = sub.add_parser("universe", help="run every SEC ticker with a resumable journal")
+    p.add_argument("--limit", type=int)
+    p.add_argument("--run", help="journal run name (default: today)")
+    p.add_argument("--restart", action="store_true", help="ignore completed work in the journal")
+    p.add_argument("--parallel", action="store_true")
+    p.add_argument("--chart-templates", action="store_true",
+                   help="build each chart layout once and only swap data per ticker")
+    p.add_argument("--fast-charts", action="store_true",
+                   help="draw the price chart from per-pixel min/max buckets")
+    p.add_argument("--archive", action="store_true", help="also archive every 10-K/10-Q for query")
+    p.set_defaults(func=cmd_universe)
+    
+    p = sub.add_parser("metrics", help="print saved metrics for a ticker")
+    p.add_argument("ticker")
+    p.add_argument("metric", nargs="*")
+    p.set_defaults(func=cmd_metrics)
+    
+    for name, func, help_text in [("charts", cmd_charts, "render charts from saved data"),
+                                  ("excel", cmd_excel, "build the workbook from saved CSVs")]:
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("ticker")
+        if name == "charts":
+            p.add_argument("--fast-charts", action="store_true",
+                           help="draw the price chart from per-pixel min/max buckets")
+        p.set_defaults(func=func)
+    
+    p = sub.add_parser("chart-bench", help="time each chart, fresh figures vs templates, and the price "
+                                          "chart with and without --fast-charts")
+    p.add_argument("tickers", nargs="+", help="tickers with saved data")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=cmd_chart_bench)
+    
+    p = sub.add_parser("kernel-bench", help="time drawdown/rolling/feature kernels against pandas")
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(func=cmd_kernel_bench)
+    
+    p = sub.add_parser("shm-bench", help="worker memory with the returns matrix pickled vs in shared memory")
+    p.add_argument("--days", type=int, default=5040)
+    p.add_argument("--tickers", type=int, default=1000)
+    p.add_argument("--workers", type=int, default=4)
+    p.set_defaults(func=cmd_shm_bench)
+    
+    p = sub.add_parser("train", help="train the up/down models on saved prices")
+    p.add_argument("ticker")
+    p.add_argument("--search", choices=["grid", "random", "halving"])
+    p.add_argument("--features", nargs="+", metavar="NAME", help="add feature store columns (see features)")
+    p.set_defaults(func=cmd_train)
+    
+    p = sub.add_parser("backtest", help="backtest walk-forward model signals over strategy variants")
+    p.add_argument("tickers", nargs="+")
+    p.add_argument("--model", default="LogisticRegression", choices=["LogisticRegression", "SVC", "XGBClassifier"])
+    p.add_argument("--top", type=int, default=10, help="variants to show, best Sharpe first")
+    p.add_argument("--features", nargs="+", metavar="NAME", help="add feature store columns (see features)")
+    p.set_defaults(func=cmd_backtest)
+    
+    p = sub.add_parser("peers", help="sector/industry percentile ranks and z-scores")
+    p.add_argument("ticker", nargs="?")
+    p.add_argument("--build", action="store_true", help="reload every saved ticker first")
+    p.add_argument("--save", action="store_true",
+                   help="rewrite Peer_Ranks.json for tickers whose groups changed since the last save")
+    p.add_argument("--export", help="write the full universe rank table to this CSV")
+    p.set_defaults(func=cmd_peers)
+    
+    p = sub.add_parser("screens", help="standing screens from screens.json with enter/exit alerts")
+    p.add_argument("--refresh", nargs="+", metavar="TICKER", help="re-evaluate these tickers (ALL for every saved one)")
+    p.add_argument("--events", type=int, default=0, help="show the N most recent events")
+    p.add_argument("-v", "--verbose", action="store_true", help="list matching tickers")
+    p.set_defaults(func=cmd_screens)
+    
+    p = sub.add_parser("snapshots", help="deduplicated history of raw SEC/Yahoo payloads")
+    p.add_argument("ticker", nargs="?", help="list this ticker's snapshots")
+    p.add_argument("--restore", action="store_true", help="write the payloads as of --as-of to --out")
+    p.add_argument("--as-of", help="YYYY-MM-DD or full timestamp (default: latest)")
+    p.add_argument("--out", help="output directory (default: <TICKER>_AS_OF_<date>)")
+    p.set_defaults(func=cmd_snapshots)
+    
+    p = sub.add_parser("dashboard", help="export static per-ticker data for index.html")
+    p.add_argument("tickers", nargs="*")
+    p.add_argument("--all", action="store_true", help="re-export every saved ticker")
+    p.add_argument("--manifest", action="store_true", help="rebuild manifest.json from the exported tickers")
+    p.add_argument("--out", default="dashboard_data")
+    p.set_defaults(func=cmd_dashboard)
+    
+    p = sub.add_parser("archive", help="archive every 10-K/10-Q of some tickers as compressed text")
+    p.add_argument("tickers", nargs="+")
+    p.add_argument("--forms", nargs="+", default=["10-K", "10-Q"])
+    p.add_argument("--workers", type=int, default=8)
+    p.set_defaults(func=cmd_archive)
+    
+    p = sub.add_parser("query", help="full-text search over stored filings (archive them first)")
+    p.add_argument("query", nargs="+")
+    p.add_argument("--build", action="store_true", help="update the index first")
+    p.set_defaults(func=cmd_query)
+    
+    p = sub.add_parser("features", help="update the technical-feature store from saved prices")
+    p.add_argument("--rebuild", action="store_true", help="recompute from scratch instead of adding new bars")
+    p.add_argument("--ticker", help="show this ticker's latest features")
+    p.add_argument("--rows", type=int, default=10)
+    p.add_argument("--check", action="store_true",
+                   help="verify an appended bar updates incrementally and matches a full rebuild")
+    p.set_defaults(func=cmd_features)
+    
+    p = sub.add_parser("covariance", help="update universe correlations/covariances from saved prices")
+    p.add_argument("--rebuild", action="store_true", help="recompute from scratch instead of adding new bars")
+    p.add_argument("--ram-mb", type=int, default=512, help="memory budget for tiles")
+    p.add_argument("--ticker", help="show the tickers most correlated with this one")
+    p.add_argument("--benchmark", help="show betas against this cached ticker")
+    p.set_defaults(func=cmd_covariance)
+    
+    p = sub.add_parser("var", help="portfolio VaR/CVaR from cached returns (see covariance)")
+    p.add_argument("positions", nargs="*", help="TICKER=WEIGHT pairs; weights are normalized to sum to 1")
+    p.add_argument("--horizon", type=int, default=1, help="days")
+    p.add_argument("--scenarios", type=int, default=1_000_000)
+    p.add_argument("--dist", choices=["normal", "t"], default="normal")
+    p.add_argument("--lookback", type=int, help="use only the last N common days")
+    p.add_argument("--benchmark", action="store_true", help="report Monte Carlo scenarios/second")
+    p.set_defaults(func=cmd_var)
+    
+    p = sub.add_parser("risk", help="volatility, drawdown and beta for saved tickers on a shared-memory pool")
+    p.add_argument("tickers", nargs="*", help="default: every saved ticker")
+    p.add_argument("--benchmark", help="compute betas against this saved ticker")
+    p.add_argument("--workers", type=int)
+    p.add_argument("--rows", type=int, default=10, help="tickers shown from each end")
+    p.add_argument("--export", help="write the full table to this CSV")
+    p.set_defaults(func=cmd_risk)
+    
+    p = sub.add_parser("serve", help="run the async metrics service")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--workers", type=int, default=4)
+    p.set_defaults(func=cmd_serve)
+    
+    p = sub.add_parser("startup", help="measure CLI cold start")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=cmd_startup)
+    
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.root:
+        os.makedirs(args.root, exist_ok=True)
+        os.chdir(args.root)
+    imported = time.perf_counter()
+    args.func(args)
+    if args.timing:
+        print(f"\n⏱  import {imported - _T0:.3f}s, command {time.perf_counter() - imported:.3f}s")
+        print(f"   heavy modules loaded: {', '.join(_loaded_heavy_modules()) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,14 +10,114 @@ from sklearn.svm import SVC
 from xgboost import XGBClassifier
 from sklearn import metrics
 
+import hashlib
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from kernels import price_features
+from shared_prices import ArraySpec, SharedArrays, attach
+
 import warnings
 warnings.filterwarnings('ignore')
+
+# Default search spaces for search_hyperparameters()
+PARAM_GRIDS = {
+    "LogisticRegression": {
+        "C": [0.01, 0.1, 1.0, 10.0],
+        "penalty": ["l2"],
+        "max_iter": [200, 1000]
+    },
+    "SVC": {
+        "C": [0.1, 1.0, 10.0],
+        "kernel": ["poly", "rbf"],
+        "degree": [2, 3],
+        "probability": [True]
+    },
+    "XGBClassifier": {
+        "n_estimators": [100, 300],
+        "max_depth": [2, 3, 5],
+        "learning_rate": [0.03, 0.1, 0.3],
+        "subsample": [0.8, 1.0]
+    }
+}
+
+# Computed from each ticker's own rows in _add_price_features
+BASE_FEATURES = ['open-close', 'low-high', 'is_quarter_end']
+
+MODEL_CLASSES = {
+    "LogisticRegression": LogisticRegression,
+    "SVC": SVC,
+    "XGBClassifier": XGBClassifier
+}
+
+# Constructor defaults under any searched or supplied params; every model must support predict_proba
+DEFAULT_PARAMS = {
+    "SVC": {"kernel": "poly", "probability": True}
+}
+
+
+def make_model(model_name, params=None):
+    return MODEL_CLASSES[model_name](**{**DEFAULT_PARAMS.get(model_name, {}), **(params or {})})
+
+
+def walk_forward_folds(n_rows, n_folds=5, min_train=0.5):
+    """Expanding-window (train_idx, valid_idx) pairs in time order"""
+    start = int(n_rows * min_train)
+    step = (n_rows - start) // n_folds
+    folds = []
+    for i in range(n_folds):
+        split = start + i * step
+        end = n_rows if i == n_folds - 1 else split + step
+        if step <= 0 or split >= end:
+            break
+        folds.append((np.arange(0, split), np.arange(split, end)))
+    return folds
+
+
+def _folds_key(folds):
+    """Fingerprint of the exact fold boundaries: (train end, valid start, valid end) per fold"""
+    bounds = [(len(train_idx), int(valid_idx[0]), int(valid_idx[-1]) + 1) for train_idx, valid_idx in folds]
+    return hashlib.sha1(json.dumps(bounds).encode()).hexdigest()[:12]
+
+
+def _rank_score(score):
+    """Sort key that puts NaN scores last"""
+    return float("-inf") if np.isnan(score) else score
+
+
+def _evaluate_config(args):
+    """Score one configuration on a set of folds (runs in a worker process)"""
+    model_name, params, X, y, folds = args
+    if isinstance(X, ArraySpec):
+        X, y = attach(X), attach(y)
+    scores = []
+    for train_idx, valid_idx in folds:
+        y_valid = y[valid_idx]
+        if len(np.unique(y_valid)) < 2:
+            continue
+        # Fit the scaler on the training window only to avoid look-ahead
+        scaler = StandardScaler()
+        X_train = scaler.fit_transform(X[train_idx])
+        X_valid = scaler.transform(X[valid_idx])
+        model = make_model(model_name, params)
+        model.fit(X_train, y[train_idx])
+        scores.append(metrics.roc_auc_score(y_valid, model.predict_proba(X_valid)[:, 1]))
+    return float(np.mean(scores)) if scores else float("nan")
+
+
 class Model:
-    def __init__(self, ticker):
+    def __init__(self, ticker, features=None):
         pass
         self.ticker = ticker
         self.df = pd.read_csv(f'{ticker}_COMPLETE_DATA/04_Market_Data/Price_History.csv')
         self.df.head()
+        self.feature_columns = list(BASE_FEATURES)
+        # Extra columns read from the feature store (names from feature_store.FEATURES)
+        if features:
+            self._join_store_features(features)
 
 
         
@@ -41,6 +141,205 @@ class Model:
             plt.subplot(2,3,i+1)
             sb.boxplot(self.df[col])
         plt.show()
+    def _join_store_features(self, features):
+        """
+        Add feature store columns for this ticker's price history.
+
+        The store is updated when it does not cover every day in the CSV.
+        Rows before the indicators' windows fill (and any other day a
+        feature is undefined) are dropped rather than given a made-up value.
+        """
+        from feature_store import FEATURES, FeatureStore
+        unknown = [name for name in features if name not in FEATURES]
+        if unknown:
+            raise ValueError(f"Unknown store features {unknown}; choose from {list(FEATURES)}")
+
+        store = FeatureStore()
+        days = pd.DatetimeIndex(pd.to_datetime(self.df['Date'].astype(str).str[:10]))
+
+        def read():
+            # The store's rows for this ticker, or None when it misses the ticker or any CSV date
+            if store.meta is None or store.meta.get("state") != "ready" or self.ticker not in store.tickers:
+                return None
+            frame = store.frame(self.ticker, features)
+            return frame.reindex(days) if days.isin(frame.index).all() else None
+
+        joined = read()
+        if joined is None:
+            store.update()
+            joined = read()
+        if joined is None:
+            raise ValueError(f"Feature store has no rows for some {self.ticker} price dates; "
+                             f"check {self.ticker}_COMPLETE_DATA/04_Market_Data/Price_History.csv")
+
+        for name in features:
+            self.df[name] = joined[name].to_numpy()
+        defined = joined.notna().all(axis=1).to_numpy()
+        if not defined.any():
+            raise ValueError(f"{self.ticker} has too little history for store features {list(features)}")
+        self.df = self.df[defined].reset_index(drop=True)
+        self.feature_columns += list(features)
+        self.feature_version = store.version
+
+    def _add_price_features(self):
+        """open-close, low-high and is_quarter_end (months that are multiples of 3) in one pass"""
+        # Unparsed dates have no month; they are not quarter ends
+        month = self.df['month'].fillna(1)
+        features = price_features(self.df['Open'], self.df['High'], self.df['Low'], self.df['Close'], month)
+        self.df['open-close'] = features[:, 0]
+        self.df['low-high'] = features[:, 1]
+        self.df['is_quarter_end'] = features[:, 2].astype(int)
+
+    def build_features(self):
+        """Return the (features, target) arrays used for training"""
+        self.df['Date'] = pd.to_datetime(self.df['Date'], errors='coerce', utc=True)
+        self.df['month'] = self.df['Date'].dt.month
+        self._add_price_features()
+        self.df['target'] = np.where(
+            self.df['Close'].shift(-1) > self.df['Close'], 1, 0
+        )
+        # The last row has no next-day close to compare against
+        df = self.df.iloc[:-1]
+        X = df[self.feature_columns].to_numpy(dtype=float)
+        y = df['target'].to_numpy()
+        return X, y
+
+    def predict_signals(self, model_name="LogisticRegression", n_folds=5, params=None):
+        """
+        Walk-forward out-of-sample probability that the next close is higher.
+
+        Each fold's model is fit only on rows before its window, so every
+        value is one that could have been known at that day's close. Rows
+        before the first window are NaN. Uses params, else best_params
+        from search_hyperparameters(), else the model defaults.
+        """
+        dates = pd.to_datetime(self.df['Date'].astype(str).str[:10])
+        X, y = self.build_features()
+        if params is None:
+            params = getattr(self, 'best_params', {}).get(model_name, {}).get('params', {})
+
+        proba = np.full(len(y), np.nan)
+        for train_idx, valid_idx in walk_forward_folds(len(y), n_folds=n_folds):
+            if len(np.unique(y[train_idx])) < 2:
+                continue
+            scaler = StandardScaler()
+            model = make_model(model_name, params)
+            model.fit(scaler.fit_transform(X[train_idx]), y[train_idx])
+            proba[valid_idx] = model.predict_proba(scaler.transform(X[valid_idx]))[:, 1]
+        return pd.Series(proba, index=pd.DatetimeIndex(dates.iloc[:len(y)]), name=self.ticker)
+
+    def search_hyperparameters(self, model_names=None, mode="grid", n_samples=20,
+                               n_folds=5, eta=2, n_jobs=None,
+                               cache_path="hyperparam_cache.json", seed=2022):
+        """
+        Search hyperparameters on walk-forward folds using a process pool.
+
+        mode="grid" scores every configuration on all folds. mode="random"
+        scores n_samples random configurations. mode="halving" runs
+        successive halving per model: every candidate is scored on the
+        first fold, only the best 1/eta of each model's candidates continue
+        to the next rung, and so on, so bad configurations are stopped
+        early without one model family crowding out another. Scores are cached on disk per
+        (data, model, params, folds) so repeated searches skip work.
+        """
+        X, y = self.build_features()
+        folds = walk_forward_folds(len(y), n_folds=n_folds)
+        if not folds:
+            print("Not enough data for walk-forward folds")
+            return {}
+
+        data_key = hashlib.sha1(X.tobytes() + y.tobytes()).hexdigest()[:16]
+        cache = self._load_search_cache(cache_path)
+        rng = random.Random(seed)
+        model_names = model_names or list(PARAM_GRIDS)
+
+        candidates = []
+        for name in model_names:
+            grid = PARAM_GRIDS[name]
+            keys = sorted(grid)
+            configs = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+            if mode in ("random", "halving") and len(configs) > n_samples:
+                configs = rng.sample(configs, n_samples)
+            candidates.extend((name, params) for params in configs)
+
+        print(f"Searching {len(candidates)} configurations ({mode}) on {len(folds)} folds")
+
+        # Workers map X and y from shared memory instead of unpickling a copy per configuration
+        with SharedArrays({"X": X, "y": y}) as shared, ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            X_spec, y_spec = shared.specs["X"], shared.specs["y"]
+            if mode == "halving":
+                rung_folds = 1
+                while True:
+                    scores = self._score_candidates(pool, candidates, X_spec, y_spec, folds[:rung_folds],
+                                                    data_key, cache)
+                    by_model = {}
+                    for name, params in candidates:
+                        by_model.setdefault(name, []).append((name, params))
+                    if rung_folds >= len(folds) or all(len(group) <= 1 for group in by_model.values()):
+                        break
+                    # All models share one pool per rung, but each is pruned against its own configurations
+                    candidates = []
+                    for group in by_model.values():
+                        ranked = sorted(group, key=lambda c: _rank_score(scores[self._config_key(*c)]),
+                                        reverse=True)
+                        candidates.extend(ranked[:max(1, len(ranked) // eta)])
+                    rung_folds = min(len(folds), rung_folds * eta)
+                    print(f"  Rung: {len(candidates)} configurations on {rung_folds} folds")
+            else:
+                scores = self._score_candidates(pool, candidates, X_spec, y_spec, folds, data_key, cache)
+
+        self._save_search_cache(cache_path, cache)
+
+        best = {}
+        for name, params in candidates:
+            score = scores[self._config_key(name, params)]
+            # NaN means no fold had both classes; such a configuration was never really scored
+            if np.isnan(score):
+                continue
+            if name not in best or score > best[name]["auc"]:
+                best[name] = {"params": params, "auc": score}
+        for name, result in best.items():
+            print(f"{name}: best walk-forward AUC {result['auc']:.4f} with {result['params']}")
+        self.best_params = best
+        return best
+
+    def _score_candidates(self, pool, candidates, X, y, folds, data_key, cache):
+        """Score candidates on folds, evaluating only configurations missing from the cache"""
+        scores = {}
+        pending = []
+        fold_key = _folds_key(folds)
+        for name, params in candidates:
+            cache_key = f"{data_key}|{fold_key}|{self._config_key(name, params)}"
+            if cache_key in cache:
+                scores[self._config_key(name, params)] = cache[cache_key]
+            else:
+                pending.append((cache_key, name, params))
+
+        if pending:
+            jobs = [(name, params, X, y, folds) for _, name, params in pending]
+            for (cache_key, name, params), score in zip(pending, pool.map(_evaluate_config, jobs)):
+                cache[cache_key] = score
+                scores[self._config_key(name, params)] = score
+        print(f"  Scored {len(candidates)} configurations ({len(candidates) - len(pending)} cached)")
+        return scores
+
+    @staticmethod
+    def _config_key(name, params):
+        return f"{name}:{json.dumps(params, sort_keys=True)}"
+
+    @staticmethod
+    def _load_search_cache(path):
+        if path and os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return {}
+
+    @staticmethod
+    def _save_search_cache(path, cache):
+        if path:
+            with open(path, "w") as f:
+                json.dump(cache, f)
+
     def train_model(self):
 
         # Force the conversion and verify
@@ -61,12 +360,8 @@ class Model:
             print("ERROR: Date column is not datetime type!")
             print(f"Current type: {self.df['Date'].dtype}")
 
-        # Quarter-end months are multiples of 3
-        self.df['is_quarter_end'] = (self.df['month'] % 3 == 0).astype(int)
-
-        # Price-based engineered features
-        self.df['open-close'] = self.df['Open'] - self.df['Close']
-        self.df['low-high'] = self.df['Low'] - self.df['High']
+        # Price-based engineered features and the quarter-end flag
+        self._add_price_features()
 
         # Prediction target (binary up/down)
         self.df['target'] = np.where(
@@ -74,7 +369,7 @@ class Model:
         )
 
         # Select features
-        features = self.df[['open-close', 'low-high', 'is_quarter_end']]
+        features = self.df[self.feature_columns]
         target = self.df['target']
 
         # Standardize features
@@ -88,11 +383,10 @@ class Model:
 
         print(X_train.shape, X_valid.shape)
 
-        models = [
-            LogisticRegression(),
-            SVC(kernel='poly', probability=True),
-            XGBClassifier()
-        ]
+        # Use tuned parameters from search_hyperparameters() when available
+        best = getattr(self, 'best_params', {})
+        models = [make_model(name, best.get(name, {}).get('params'))
+                  for name in ("LogisticRegression", "SVC", "XGBClassifier")]
 
         for model in models:
             model.fit(X_train, Y_train)
@@ -0,0 +1,290 @@
+import bisect
+import glob
+import json
+import math
+import os
+import sqlite3
+import tempfile
+
+import pandas as pd
+
+PEERS_PATH = "peer_ranks.db"
+
+# Peer groups, from Yahoo info
+LEVELS = ("sector", "industry")
+
+METRIC_FILES = ("Financial_Ratios", "Growth_Metrics", "Risk_Metrics")
+
+
+def read_classification(data_dir):
+    """(sector, industry) saved with a ticker's data, falling back to the summary report"""
+    path = os.path.join(data_dir, "03_Calculated_Metrics", "Classification.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            info = json.load(f)
+        return info.get("sector"), info.get("industry")
+
+    found = {}
+    report = os.path.join(data_dir, "SUMMARY_REPORT.txt")
+    if os.path.exists(report):
+        with open(report, encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Sector", "Industry") and value.strip() not in ("", "N/A"):
+                    found[key.lower()] = value.strip()
+                if len(found) == 2:
+                    break
+    return found.get("sector"), found.get("industry")
+
+
+def read_metrics(data_dir):
+    """Every numeric value in a ticker's Financial_Ratios, Growth_Metrics and Risk_Metrics"""
+    metrics = {}
+    for name in METRIC_FILES:
+        path = os.path.join(data_dir, "03_Calculated_Metrics", f"{name}.json")
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            for key, value in json.load(f).items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+                    metrics[key] = float(value)
+    return metrics
+
+
+class PeerRanks:
+    """
+    Percentile ranks and z-scores of every metric within sector and industry.
+
+    Each ticker's metrics and classification are stored in SQLite.
+    build_table() ranks the whole universe at once with grouped pandas
+    operations. For one-ticker changes, every (level, group, metric)
+    keeps a sorted list of values and running sums: update() moves the
+    ticker's old values out and new ones in by bisection, and rank()
+    reads any ticker's percentile and z-score from them, so nothing is
+    re-sorted.
+
+    Several processes can share the database. Every write stamps its row
+    with the next version number, and before ranking each instance
+    applies the rows written since it last looked (a build() in any
+    process makes the others reload everything), so ranks are against
+    the current universe.
+
+    Percentiles match pandas rank(pct=True): ties share the average rank.
+    """
+
+    def __init__(self, path=PEERS_PATH):
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS peers (
+                ticker TEXT PRIMARY KEY, sector TEXT, industry TEXT, metrics TEXT
+            );
+            CREATE TABLE IF NOT EXISTS peers_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                generation INTEGER DEFAULT 0, saved_version INTEGER DEFAULT 0, saved_generation INTEGER DEFAULT 0
+            );
+            INSERT OR IGNORE INTO peers_state (id) VALUES (1);
+        """)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(peers)")]
+        if "version" not in columns:
+            # Databases from before versioning: existing rows count as version 0
+            self.conn.execute("ALTER TABLE peers ADD COLUMN version INTEGER DEFAULT 0")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS peers_version ON peers (version)")
+        self.conn.commit()
+        self._generation = None
+        self._version = 0
+        self._refresh()
+
+    def close(self):
+        self.conn.close()
+
+    def _load(self):
+        """Build the sorted lists and sums once from the stored rows"""
+        self._rows, self._sorted, self._sums = {}, {}, {}
+        self._generation = self.conn.execute("SELECT generation FROM peers_state").fetchone()[0]
+        self._version = 0
+        values = {}
+        for ticker, sector, industry, metrics, version in self.conn.execute(
+                "SELECT ticker, sector, industry, metrics, version FROM peers"):
+            row = {"sector": sector, "industry": industry, "metrics": json.loads(metrics)}
+            self._rows[ticker] = row
+            self._version = max(self._version, version or 0)
+            for key, value in self._keys(row):
+                values.setdefault(key, []).append(value)
+        for key, group in values.items():
+            group.sort()
+            self._sorted[key] = group
+            self._sums[key] = [len(group), sum(group), sum(v * v for v in group)]
+
+    def _refresh(self):
+        """Apply rows other processes (or this one) wrote since the last read"""
+        generation = self.conn.execute("SELECT generation FROM peers_state").fetchone()[0]
+        if generation != self._generation:
+            self._load()
+            return
+        changed = self.conn.execute(
+            "SELECT ticker, sector, industry, metrics, version FROM peers WHERE version > ? ORDER BY version",
+            (self._version,)
+        ).fetchall()
+        for ticker, sector, industry, metrics, version in changed:
+            self._apply(ticker, {"sector": sector, "industry": industry, "metrics": json.loads(metrics)})
+            self._version = version
+
+    @staticmethod
+    def _keys(row):
+        """((level, group, metric), value) for every value a row contributes"""
+        for level in LEVELS:
+            if row[level]:
+                for metric, value in row["metrics"].items():
+                    yield (level, row[level], metric), value
+
+    # =====================================
+    # INCREMENTAL UPDATES
+    # =====================================
+
+    def _apply(self, ticker, row):
+        """Move a ticker's old values out of the sorted lists and sums and its new ones in"""
+        old = self._rows.get(ticker)
+        if old is not None:
+            for key, value in self._keys(old):
+                group = self._sorted[key]
+                del group[bisect.bisect_left(group, value)]
+                sums = self._sums[key]
+                sums[0] -= 1
+                sums[1] -= value
+                sums[2] -= value * value
+
+        for key, value in self._keys(row):
+            bisect.insort(self._sorted.setdefault(key, []), value)
+            sums = self._sums.setdefault(key, [0, 0.0, 0.0])
+            sums[0] += 1
+            sums[1] += value
+            sums[2] += value * value
+        self._rows[ticker] = row
+
+    def update(self, ticker, metrics, sector=None, industry=None):
+        """Replace one ticker's metrics and classification; returns its new ranks"""
+        # The version is assigned under SQLite's write lock, so versions follow commit order
+        self.conn.execute(
+            "INSERT OR REPLACE INTO peers (ticker, sector, industry, metrics, version) "
+            "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(version), 0) + 1 FROM peers))",
+            (ticker, sector, industry, json.dumps(metrics))
+        )
+        self.conn.commit()
+        return self.rank(ticker)
+
+    def update_from_dir(self, ticker, data_dir=None):
+        data_dir = data_dir or f"{ticker}_COMPLETE_DATA"
+        sector, industry = read_classification(data_dir)
+        return self.update(ticker, read_metrics(data_dir), sector, industry)
+
+    def rank(self, ticker):
+        """{level: {metric: {group, percentile, z, peers}}} for one ticker"""
+        self._refresh()
+        row = self._rows[ticker]
+        out = {level: {} for level in LEVELS}
+        for (level, group_name, metric), value in self._keys(row):
+            group = self._sorted[(level, group_name, metric)]
+            n, total, squares = self._sums[(level, group_name, metric)]
+            less = bisect.bisect_left(group, value)
+            equal = bisect.bisect_right(group, value) - less
+            variance = (squares - total * total / n) / (n - 1) if n > 1 else 0.0
+            std = math.sqrt(variance) if variance > 0 else 0.0
+            out[level][metric] = {
+                "group": group_name,
+                "percentile": (less + (equal + 1) / 2) / n,
+                "z": (value - total / n) / std if std > 0 else None,
+                "peers": n
+            }
+        return out
+
+    # =====================================
+    # FULL TABLE
+    # =====================================
+
+    def build(self, data_root="."):
+        """Load every *_COMPLETE_DATA directory under data_root; returns the number of tickers"""
+        rows = []
+        for path in glob.glob(os.path.join(data_root, "*_COMPLETE_DATA")):
+            ticker = os.path.basename(path).replace("_COMPLETE_DATA", "")
+            sector, industry = read_classification(path)
+            rows.append((ticker, sector, industry, json.dumps(read_metrics(path))))
+        self.conn.execute("DELETE FROM peers")
+        self.conn.executemany("INSERT INTO peers (ticker, sector, industry, metrics, version) VALUES (?, ?, ?, ?, 0)",
+                              rows)
+        # Other processes see the new generation and reload instead of applying changes
+        self.conn.execute("UPDATE peers_state SET generation = generation + 1")
+        self.conn.commit()
+        self._load()
+        return len(rows)
+
+    def build_table(self):
+        """
+        Ranks for the whole universe in one pass.
+
+        Returns a long DataFrame (ticker, level, group, metric, value,
+        percentile, z, peers) computed with groupby rank/transform.
+        """
+        long = pd.DataFrame(
+            [(ticker, level, group, metric, value)
+             for ticker, row in self._rows.items()
+             for (level, group, metric), value in self._keys(row)],
+            columns=["ticker", "level", "group", "metric", "value"]
+        )
+        grouped = long.groupby(["level", "group", "metric"])["value"]
+        long["percentile"] = grouped.rank(pct=True)
+        long["peers"] = grouped.transform("count")
+        std = grouped.transform("std")
+        long["z"] = (long["value"] - grouped.transform("mean")) / std.where(std > 0)
+        return long
+
+    def save_ticker(self, ticker, data_dir=None):
+        """Write one ticker's ranks next to its metrics as Peer_Ranks.json"""
+        data_dir = data_dir or f"{ticker}_COMPLETE_DATA"
+        path = os.path.join(data_dir, "03_Calculated_Metrics", "Peer_Ranks.json")
+        ranks = self.rank(ticker)
+        # Workers may refresh the same files at once; each swaps in its own complete file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(ranks, f, indent=2)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return path
+
+    def save_changed(self, data_root="."):
+        """
+        Rewrite Peer_Ranks.json for every ticker whose ranks may have moved.
+
+        An update changes the percentiles and z-scores of everyone in the
+        ticker's sector and industry, so each group with a row written
+        since the last save_changed() (in any process) is saved again;
+        after a build() every ticker is. Meant to run once after a batch
+        of updates rather than per ticker. Returns the number of files written.
+        """
+        self._refresh()
+        saved_version, saved_generation = self.conn.execute(
+            "SELECT saved_version, saved_generation FROM peers_state").fetchone()
+        if saved_generation != self._generation:
+            tickers = set(self._rows)
+        else:
+            groups = {(level, value) for sector, industry in self.conn.execute(
+                          "SELECT sector, industry FROM peers WHERE version > ? AND version <= ?",
+                          (saved_version, self._version))
+                      for level, value in zip(LEVELS, (sector, industry)) if value}
+            tickers = {ticker for ticker, row in self._rows.items()
+                       if any((level, row[level]) in groups for level in LEVELS)}
+
+        written = 0
+        for ticker in sorted(tickers):
+            data_dir = os.path.join(data_root, f"{ticker}_COMPLETE_DATA")
+            if os.path.isdir(os.path.join(data_dir, "03_Calculated_Metrics")):
+                self.save_ticker(ticker, data_dir)
+                written += 1
+        self.conn.execute("UPDATE peers_state SET saved_version = ?, saved_generation = ?",
+                          (self._version, self._generation))
+        self.conn.commit()
+        return written
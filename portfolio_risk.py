@@ -0,0 +1,220 @@
+import itertools
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+CONFIDENCE_LEVELS = (0.95, 0.99)
+
+
+def tail_risk(returns, levels=CONFIDENCE_LEVELS):
+    """
+    VaR and CVaR (as positive loss fractions) from a sample of portfolio returns.
+
+    VaR is the loss at the (1 - level) empirical quantile; CVaR is the
+    mean loss of the scenarios at or beyond it.
+    """
+    returns = np.sort(np.asarray(returns, dtype=float))
+    return _from_sorted_tail(returns, len(returns), levels)
+
+
+def _from_sorted_tail(tail, n, levels):
+    """tail holds (at least) the worst ceil((1 - level) * n) of n sorted portfolio returns"""
+    out = {}
+    for level in levels:
+        k = max(1, math.ceil((1 - level) * n))
+        label = f"{round(level * 100):g}"
+        out[f"VaR_{label}"] = float(-tail[k - 1])
+        out[f"CVaR_{label}"] = float(-tail[:k].mean())
+    return out
+
+
+def _factor(cov):
+    """Matrix L with L @ L.T == cov; eigen-decomposition when cov is not positive definite"""
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(cov)
+        return vectors * np.sqrt(np.clip(values, 0, None))
+
+
+class PortfolioRisk:
+    """
+    Historical and Monte Carlo VaR/CVaR for a weighted portfolio.
+
+    weights maps ticker to the fraction of portfolio value held (negative
+    for shorts). returns is a dates x tickers DataFrame of daily simple
+    returns; by default it is read from the CovarianceEngine cache. Only
+    days on which every holding has a return are used.
+    """
+
+    def __init__(self, weights, returns=None, lookback=None):
+        self.weights = pd.Series(weights, dtype=float)
+        if returns is None:
+            from covariance import CovarianceEngine
+            returns = CovarianceEngine().returns(list(self.weights.index))
+        returns = returns[list(self.weights.index)].dropna()
+        if lookback:
+            returns = returns.iloc[-lookback:]
+        if len(returns) < 2:
+            raise ValueError("Not enough days where every holding has a return")
+        self.returns = returns
+        self.log_returns = np.log1p(returns.to_numpy())
+
+    def historical(self, horizon=1, levels=CONFIDENCE_LEVELS):
+        """
+        Historical-simulation VaR/CVaR over horizon days.
+
+        Each overlapping horizon-day window of history is one scenario:
+        every holding compounds its own returns, then holdings are
+        weighted, so the horizon loss is not approximated by scaling.
+        """
+        if not 1 <= horizon < len(self.log_returns):
+            raise ValueError(f"horizon must be between 1 and {len(self.log_returns) - 1} days, got {horizon}")
+        logs = np.vstack([np.zeros(self.log_returns.shape[1]), self.log_returns]).cumsum(axis=0)
+        window = logs[horizon:] - logs[:-horizon]
+        portfolio = np.expm1(window) @ self.weights.to_numpy()
+        result = tail_risk(portfolio, levels)
+        result["scenarios"] = len(portfolio)
+        return result
+
+    def monte_carlo(self, scenarios=1_000_000, horizon=1, levels=CONFIDENCE_LEVELS, dist="normal",
+                    df=5, cov=None, chunk_mb=64, workers=None, seed=2022):
+        """
+        Monte Carlo VaR/CVaR over horizon days.
+
+        Holdings' horizon log returns are drawn jointly from a normal (or
+        Student-t with df degrees of freedom, for fat tails) with the
+        historical mean and covariance scaled by horizon; cov overrides
+        the daily covariance (e.g. CovarianceEngine.shrunk_covariance).
+
+        Scenarios are generated in chunks of about chunk_mb and only each
+        chunk's worst tail is kept, so memory stays at roughly chunk_mb
+        per worker no matter how many scenarios run. Chunks run on a
+        thread pool, at most two per worker at a time, each with its own
+        seeded generator, so results depend on seed alone.
+        """
+        if horizon < 1:
+            raise ValueError(f"horizon must be at least 1 day, got {horizon}")
+        k = len(self.weights)
+        mean = self.log_returns.mean(axis=0) * horizon
+        daily_cov = np.cov(self.log_returns, rowvar=False).reshape(k, k) if cov is None \
+            else np.asarray(cov, dtype=float)
+        factor = _factor(daily_cov * horizon).T
+        weights = self.weights.to_numpy()
+
+        # Draws plus their correlated copy dominate memory: 2 * k floats per scenario
+        chunk = int(max(1, min(scenarios, chunk_mb * 1024 * 1024 / (16 * k))))
+        sizes = [min(chunk, scenarios - start) for start in range(0, scenarios, chunk)]
+        keep = max(1, math.ceil((1 - min(levels)) * scenarios))
+        streams = np.random.SeedSequence(seed).spawn(len(sizes))
+
+        def simulate(size, stream):
+            rng = np.random.default_rng(stream)
+            draws = rng.standard_normal((size, k))
+            if dist == "t":
+                # Unit-variance multivariate t: scale normals by a shared chi-square draw
+                draws *= np.sqrt((df - 2) / rng.chisquare(df, size))[:, None]
+            draws = draws @ factor
+            draws += mean
+            np.expm1(draws, out=draws)
+            portfolio = draws @ weights
+            # Only the worst `keep` scenarios can matter for the tail estimates
+            if len(portfolio) > keep:
+                portfolio = np.partition(portfolio, keep - 1)[:keep]
+            return portfolio
+
+        start = time.perf_counter()
+        tail = np.empty(0)
+        workers = workers or os.cpu_count() or 1
+        jobs = iter(zip(sizes, streams))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # At most two chunks per worker in flight, so finished chunks never pile up in memory
+            running = deque(pool.submit(simulate, *job) for job in itertools.islice(jobs, 2 * workers))
+            while running:
+                part = running.popleft().result()
+                for job in itertools.islice(jobs, 1):
+                    running.append(pool.submit(simulate, *job))
+                tail = np.concatenate([tail, part])
+                if len(tail) > keep:
+                    tail = np.partition(tail, keep - 1)[:keep]
+        elapsed = time.perf_counter() - start
+
+        result = _from_sorted_tail(np.sort(tail), scenarios, levels)
+        result.update({"scenarios": scenarios, "seconds": elapsed,
+                       "scenarios_per_second": scenarios / elapsed if elapsed else None})
+        return result
+
+    def report(self, horizon=1, scenarios=1_000_000, **kwargs):
+        """Historical and Monte Carlo results side by side"""
+        return {"historical": self.historical(horizon), "monte_carlo": self.monte_carlo(scenarios, horizon, **kwargs)}
+
+
+# =====================================
+# UNIVERSE RISK
+# =====================================
+
+TRADING_DAYS = 252
+
+
+def _risk_block(handle, lo, hi, benchmark_column=None):
+    """Volatility, max drawdown and beta for tickers [lo, hi), read from the shared returns"""
+    from kernels import max_drawdown
+    from shared_prices import attach_prices
+
+    returns = attach_prices(handle).returns
+    market = returns[:, benchmark_column] if benchmark_column is not None else None
+    rows = []
+    for j in range(lo, hi):
+        column = returns[:, j]
+        valid = ~np.isnan(column)
+        r = column[valid]
+        row = {"ticker": handle["tickers"][j], "days": int(valid.sum()),
+               "volatility": float(r.std(ddof=1) * math.sqrt(TRADING_DAYS)) if len(r) > 1 else np.nan,
+               "max_drawdown": max_drawdown(r)}
+        if market is not None:
+            both = valid & ~np.isnan(market)
+            m = market[both]
+            row["beta"] = float(np.cov(column[both], m)[0, 1] / m.var(ddof=1)) if both.sum() > 1 else np.nan
+        rows.append(row)
+    return rows
+
+
+def universe_risk(tickers=None, data_root=".", benchmark=None, workers=None, block_size=64):
+    """
+    Annualized volatility, max drawdown and (with benchmark) beta for every saved ticker.
+
+    The universe's returns go into shared memory once (SharedPrices) and
+    column blocks run on a process pool that maps them, so workers hold
+    no copy of the matrix. Returns a DataFrame indexed by ticker.
+    """
+    from shared_prices import SharedPrices, map_blocks
+
+    with SharedPrices(tickers, data_root) as shared:
+        if benchmark is not None and benchmark not in shared.tickers:
+            raise ValueError(f"{benchmark} has no saved price history")
+        column = shared.tickers.index(benchmark) if benchmark is not None else None
+        blocks = map_blocks(_risk_block, shared, block_size, workers, args=(column,))
+    return pd.DataFrame([row for block in blocks for row in block]).set_index("ticker")
+
+
+def benchmark(n_tickers=(10, 100, 500), scenarios=2_000_000, days=2520, dist="normal", seed=2022):
+    """Monte Carlo scenarios per second for equal-weight portfolios on synthetic returns"""
+    rng = np.random.default_rng(seed)
+    print(f"{'Holdings':>9}{'Scenarios':>12}{'Seconds':>10}{'Scenarios/s':>14}{'VaR 95':>9}")
+    results = []
+    for k in n_tickers:
+        # One market factor plus noise, so holdings are correlated like real equities
+        market = rng.normal(0.0004, 0.01, days)
+        returns = pd.DataFrame(market[:, None] * rng.uniform(0.5, 1.5, k) + rng.normal(0, 0.015, (days, k)),
+                               columns=[f"T{i}" for i in range(k)])
+        risk = PortfolioRisk({ticker: 1 / k for ticker in returns.columns}, returns=returns)
+        result = risk.monte_carlo(scenarios, dist=dist, seed=seed)
+        results.append(dict(result, holdings=k))
+        print(f"{k:>9}{scenarios:>12,}{result['seconds']:>10.2f}{result['scenarios_per_second']:>14,.0f}"
+              f"{result['VaR_95']:>9.4f}")
+    return results
@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import time
+
+import requests
+
+FIXTURE_DIR = os.path.join("benchmarks", "fixtures")
+
+
+def _url_key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+
+
+def _make_response(url, status_code, encoding, content):
+    """Build a requests.Response that behaves like a fully read live response"""
+    response = requests.models.Response()
+    response.url = url
+    response.status_code = status_code
+    response.encoding = encoding
+    response._content = content
+    response._content_consumed = True
+    return response
+
+
+class Cassette:
+    """
+    Record or replay HTTP and Yahoo Finance responses for one fixture set.
+
+    In "record" mode requests.get and ComprehensiveDataFetcher.get_yfinance_data
+    run live and their results are written under fixture_dir. In "replay"
+    mode they are served from those files and nothing touches the network;
+    a URL or ticker missing from the fixtures raises KeyError. time.sleep is
+    turned into a no-op during replay so rate-limit pauses don't skew timings.
+    """
+
+    def __init__(self, name, mode="replay", fixture_dir=FIXTURE_DIR, skip_sleep=True):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = os.path.abspath(os.path.join(fixture_dir, name))
+        self.mode = mode
+        self.skip_sleep = skip_sleep
+        self.index_path = os.path.join(self.path, "index.json")
+        self.index = {}
+        self._patched = []
+
+    # =====================================
+    # HTTP
+    # =====================================
+
+    def _get(self, url, *args, **kwargs):
+        key = _url_key(url)
+        body_path = os.path.join(self.path, f"{key}.bin.gz")
+
+        if self.mode == "replay":
+            if key not in self.index:
+                raise KeyError(f"No recorded response for {url}")
+            meta = self.index[key]
+            with gzip.open(body_path, "rb") as f:
+                return _make_response(url, meta["status_code"], meta["encoding"], f.read())
+
+        kwargs.pop("stream", None)
+        response = self._real_get(url, *args, **kwargs)
+        with gzip.open(body_path, "wb") as f:
+            f.write(response.content)
+        self.index[key] = {"url": url, "status_code": response.status_code,
+                           "encoding": response.encoding}
+        return _make_response(url, response.status_code, response.encoding, response.content)
+
+    # =====================================
+    # YAHOO FINANCE
+    # =====================================
+
+    def _yfinance(self, fetcher):
+        path = os.path.join(self.path, f"yahoo_{fetcher.ticker}.pkl.gz")
+        if self.mode == "replay":
+            if not os.path.exists(path):
+                raise KeyError(f"No recorded Yahoo Finance data for {fetcher.ticker}")
+            with gzip.open(path, "rb") as f:
+                return pickle.load(f)
+
+        data = self._real_yfinance(fetcher)
+        with gzip.open(path, "wb") as f:
+            pickle.dump(data, f)
+        return data
+
+    # =====================================
+    # PATCHING
+    # =====================================
+
+    def _patch(self, owner, name, value):
+        self._patched.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, value)
+
+    def __enter__(self):
+        from main import ComprehensiveDataFetcher
+
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+
+        self._real_get = requests.get
+        self._real_yfinance = ComprehensiveDataFetcher.get_yfinance_data
+        cassette = self
+        self._patch(requests, "get", self._get)
+        self._patch(ComprehensiveDataFetcher, "get_yfinance_data",
+                    lambda fetcher: cassette._yfinance(fetcher))
+        if self.mode == "replay" and self.skip_sleep:
+            self._patch(time, "sleep", lambda seconds: None)
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+        if self.mode == "record":
+            with open(self.index_path, "w") as f:
+                json.dump(self.index, f, indent=2)
+        return False
@@ -0,0 +1,104 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Sentinel meaning "a failure of this stage fails everything downstream"
+NO_DEFAULT = object()
+
+
+class Stage:
+    """
+    One node in a per-ticker pipeline graph.
+
+    func is called with the results of deps, in order. kind picks the
+    executor: "io" stages (network, disk) share a wide thread pool;
+    "compute" stages get their own thread pool sized to the machine, so
+    parsing and metrics are not queued behind slow requests (they still
+    share the GIL, so only NumPy/pandas work that releases it overlaps);
+    "process" stages run in the process pool passed to run_dag for real
+    CPU parallelism (func and its inputs must pickle). If func raises and
+    default is given, default becomes the result and downstream stages
+    still run.
+    """
+
+    def __init__(self, name, func, deps=(), kind="io", default=NO_DEFAULT):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.kind = kind
+        self.default = default
+
+
+def run_dag(stages, io_workers=8, compute_workers=None, process_pool=None, verbose=True):
+    """
+    Run stages as soon as their dependencies finish, with maximum overlap.
+
+    Returns (results, errors): results maps stage name to its value,
+    errors maps a failed or skipped stage name to its error message.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage {stage.name} depends on unknown stage {dep}")
+
+    results = {}
+    errors = {}
+    pending = dict(by_name)
+    running = {}
+    started = {}
+    executors = {
+        "io": ThreadPoolExecutor(max_workers=io_workers),
+        "compute": ThreadPoolExecutor(max_workers=compute_workers or os.cpu_count() or 1)
+    }
+    if process_pool is not None:
+        executors["process"] = process_pool
+
+    def finish(stage, value=NO_DEFAULT, error=None):
+        if error is None:
+            results[stage.name] = value
+        elif stage.default is not NO_DEFAULT:
+            results[stage.name] = stage.default
+            errors[stage.name] = error
+        else:
+            errors[stage.name] = error
+        if verbose:
+            mark = "✓" if error is None else "✗"
+            detail = f": {error}" if error else ""
+            print(f"   {mark} {stage.name} ({time.perf_counter() - started[stage.name]:.2f}s){detail}")
+
+    try:
+        while pending or running:
+            # Submit every stage whose dependencies are resolved
+            waiting = len(pending)
+            for name, stage in list(pending.items()):
+                if any(dep in pending or dep in running.values() for dep in stage.deps):
+                    continue
+                del pending[name]
+                started[name] = time.perf_counter()
+                failed_deps = [dep for dep in stage.deps if dep not in results]
+                if failed_deps:
+                    finish(stage, error=f"skipped, upstream failed: {', '.join(failed_deps)}")
+                    continue
+                executor = executors.get(stage.kind)
+                if executor is None:
+                    raise ValueError(f"No executor for stage kind {stage.kind}")
+                future = executor.submit(stage.func, *(results[dep] for dep in stage.deps))
+                running[future] = name
+
+            if not running:
+                if pending and len(pending) == waiting:
+                    raise ValueError(f"Dependency cycle among stages: {', '.join(pending)}")
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = by_name[running.pop(future)]
+                try:
+                    finish(stage, value=future.result())
+                except Exception as e:
+                    finish(stage, error=f"{type(e).__name__}: {e}")
+    finally:
+        for kind in ("io", "compute"):
+            executors[kind].shutdown(wait=True)
+
+    return results, errors
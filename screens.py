@@ -0,0 +1,215 @@
+import ast
+import json
+import operator
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+from peer_ranks import read_metrics
+
+SCREENS_DB = "screens.db"
+SCREENS_PATH = "screens.json"
+
+# Written to screens.json the first time the engine runs without one
+DEFAULT_SCREENS = {
+    "Liquid_Low_Drawdown": "Current_Ratio > 2 and Max_Drawdown > -30%",
+    "Quality_Growth": "ROE > 15% and Revenue_YoY_Growth > 10%",
+    "Cheap_Profitable": "PE_Ratio > 0 and PE_Ratio < 15 and Net_Profit_Margin > 10%"
+}
+
+_COMPARE = {ast.Gt: operator.gt, ast.GtE: operator.ge, ast.Lt: operator.lt, ast.LtE: operator.le,
+            ast.Eq: operator.eq, ast.NotEq: operator.ne}
+_ARITHMETIC = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+
+def compile_rule(expression):
+    """
+    Compile a screen expression into a function of {metric: array} -> bool array.
+
+    Expressions use metric names, numbers (a trailing % divides by 100),
+    + - * /, abs(), comparisons (chains allowed) and and/or/not. A metric
+    a ticker lacks is NaN, so any comparison on it is False.
+    """
+    source = re.sub(r"(\d+(?:\.\d+)?)%", r"(\1/100)", expression)
+    tree = ast.parse(source, mode="eval").body
+
+    def build(node):
+        if isinstance(node, ast.BoolOp):
+            parts = [build(value) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return lambda cols: combine.reduce([part(cols) for part in parts])
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            inner = build(node.operand)
+            return lambda cols: np.logical_not(inner(cols))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            inner = build(node.operand)
+            return lambda cols: -inner(cols)
+        if isinstance(node, ast.Compare):
+            terms = [build(node.left)] + [build(c) for c in node.comparators]
+            ops = [_COMPARE[type(op)] for op in node.ops]
+            return lambda cols: np.logical_and.reduce(
+                [op(terms[i](cols), terms[i + 1](cols)) for i, op in enumerate(ops)])
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+            left, right, op = build(node.left), build(node.right), _ARITHMETIC[type(node.op)]
+            return lambda cols: op(left(cols), right(cols))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "abs" \
+                and len(node.args) == 1:
+            inner = build(node.args[0])
+            return lambda cols: np.abs(inner(cols))
+        if isinstance(node, ast.Name):
+            return lambda cols: cols.get(node.id, cols["__nan__"])
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return lambda cols: node.value
+        raise ValueError(f"Unsupported syntax in screen {expression!r}: {ast.dump(node)}")
+
+    predicate = build(tree)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        predicate({"__nan__": np.full(1, np.nan)})  # reject bad rules before they are stored
+    return predicate
+
+
+def load_screens(path=SCREENS_PATH):
+    if not os.path.exists(path):
+        with open(path, "w") as f:
+            json.dump(DEFAULT_SCREENS, f, indent=2)
+    with open(path) as f:
+        return json.load(f)
+
+
+class ScreenEngine:
+    """
+    Standing screens over every ticker's ratio, growth and risk metrics.
+
+    Metrics live in memory as one float column per metric (NaN where a
+    ticker lacks it), with a boolean membership column per screen, and
+    are persisted in SQLite. refresh() writes only the refreshed rows,
+    evaluates every screen on just those rows, and records an enter or
+    exit event wherever membership changed. A screen that is new or
+    whose expression changed is evaluated once over all rows without
+    emitting events.
+    """
+
+    def __init__(self, screens=None, path=SCREENS_DB):
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS metrics (ticker TEXT PRIMARY KEY, data TEXT);
+            CREATE TABLE IF NOT EXISTS screens (name TEXT PRIMARY KEY, expression TEXT);
+            CREATE TABLE IF NOT EXISTS members (screen TEXT, ticker TEXT, PRIMARY KEY (screen, ticker));
+            CREATE TABLE IF NOT EXISTS events (
+                at REAL, screen TEXT, ticker TEXT, event TEXT
+            );
+            CREATE INDEX IF NOT EXISTS events_at ON events (at);
+        """)
+        self.screens = load_screens() if screens is None else screens
+        self.predicates = {name: compile_rule(expr) for name, expr in self.screens.items()}
+
+        self.tickers = []
+        self.row = {}
+        self.columns = {}
+        self._set_rows({ticker: json.loads(data) for ticker, data in
+                        self.conn.execute("SELECT ticker, data FROM metrics ORDER BY ticker")})
+
+        self.members = {name: np.zeros(len(self.tickers), dtype=bool) for name in self.screens}
+        for screen, ticker in self.conn.execute("SELECT screen, ticker FROM members"):
+            if screen in self.members and ticker in self.row:
+                self.members[screen][self.row[ticker]] = True
+        self._sync_screens()
+
+    def close(self):
+        self.conn.close()
+
+    def _set_rows(self, updates):
+        """Write metric values for updated tickers into the columns; returns their row indices"""
+        new = [ticker for ticker in updates if ticker not in self.row]
+        if new:
+            for ticker in new:
+                self.row[ticker] = len(self.tickers)
+                self.tickers.append(ticker)
+            grow = np.full(len(new), np.nan)
+            for metric in self.columns:
+                self.columns[metric] = np.concatenate([self.columns[metric], grow])
+            for screen in getattr(self, "members", {}):
+                self.members[screen] = np.concatenate([self.members[screen], np.zeros(len(new), dtype=bool)])
+
+        rows = np.array([self.row[ticker] for ticker in updates], dtype=np.int64)
+        for metric in self.columns:
+            self.columns[metric][rows] = np.nan
+        for ticker, metrics in updates.items():
+            for metric, value in metrics.items():
+                if metric not in self.columns:
+                    self.columns[metric] = np.full(len(self.tickers), np.nan)
+                self.columns[metric][self.row[ticker]] = value
+        return rows
+
+    def _evaluate(self, name, rows=None):
+        cols = dict(self.columns) if rows is None else {metric: col[rows] for metric, col in self.columns.items()}
+        size = len(self.tickers) if rows is None else len(rows)
+        cols["__nan__"] = np.full(size, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = self.predicates[name](cols)
+        return np.broadcast_to(np.asarray(result, dtype=bool), (size,))
+
+    def _sync_screens(self):
+        """Evaluate new or edited screens over every row and store their membership"""
+        stored = dict(self.conn.execute("SELECT name, expression FROM screens"))
+        for name, expression in self.screens.items():
+            if stored.get(name) == expression:
+                continue
+            self.members[name] = self._evaluate(name).copy()
+            self.conn.execute("DELETE FROM members WHERE screen = ?", (name,))
+            self.conn.executemany("INSERT INTO members VALUES (?, ?)",
+                                  ((name, self.tickers[i]) for i in np.flatnonzero(self.members[name])))
+            self.conn.execute("INSERT OR REPLACE INTO screens VALUES (?, ?)", (name, expression))
+        for name in set(stored) - set(self.screens):
+            self.conn.execute("DELETE FROM screens WHERE name = ?", (name,))
+            self.conn.execute("DELETE FROM members WHERE screen = ?", (name,))
+        self.conn.commit()
+
+    def refresh(self, updates):
+        """
+        Apply {ticker: metrics} and re-evaluate only those rows.
+
+        Returns the events as dicts with screen, ticker and event
+        ("enter" or "exit").
+        """
+        if not updates:
+            return []
+        rows = self._set_rows(updates)
+        now = time.time()
+        events = []
+        for name in self.screens:
+            before = self.members[name][rows]
+            after = self._evaluate(name, rows)
+            self.members[name][rows] = after
+            for i in np.flatnonzero(before != after):
+                events.append({"screen": name, "ticker": self.tickers[rows[i]],
+                               "event": "enter" if after[i] else "exit"})
+
+        self.conn.executemany("INSERT OR REPLACE INTO metrics VALUES (?, ?)",
+                              ((ticker, json.dumps(metrics)) for ticker, metrics in updates.items()))
+        for event in events:
+            if event["event"] == "enter":
+                self.conn.execute("INSERT OR IGNORE INTO members VALUES (?, ?)", (event["screen"], event["ticker"]))
+            else:
+                self.conn.execute("DELETE FROM members WHERE screen = ? AND ticker = ?",
+                                  (event["screen"], event["ticker"]))
+        self.conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?)",
+                              ((now, e["screen"], e["ticker"], e["event"]) for e in events))
+        self.conn.commit()
+        return events
+
+    def refresh_from_dirs(self, tickers, data_root="."):
+        """Reload the saved metrics of tickers and refresh them"""
+        return self.refresh({ticker: read_metrics(os.path.join(data_root, f"{ticker}_COMPLETE_DATA"))
+                             for ticker in tickers})
+
+    def matches(self, name):
+        return [self.tickers[i] for i in np.flatnonzero(self.members[name])]
+
+    def recent_events(self, limit=20):
+        return [dict(zip(("at", "screen", "ticker", "event"), row)) for row in self.conn.execute(
+            "SELECT at, screen, ticker, event FROM events ORDER BY at DESC LIMIT ?", (limit,))]
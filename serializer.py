@@ -0,0 +1,146 @@
+import gzip
+import json
+import time
+from datetime import date, datetime
+
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+# Nesting depth at which pandas objects are still written through their
+# own C encoders. Deeper values go to orjson in one call.
+PANDAS_DEPTH = 2
+
+
+def _default(obj):
+    """Convert values neither orjson nor json handle natively"""
+    if obj is pd.NaT or obj is None:
+        return None
+    if isinstance(obj, (pd.Timestamp, datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict(orient="records")
+    if isinstance(obj, pd.Series):
+        return obj.to_dict()
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return None if np.isnan(obj) else float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+
+if orjson:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def _dumps(obj):
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+else:
+    def _dumps(obj):
+        return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def _key(key):
+    return _dumps(key if isinstance(key, str) else str(key))
+
+
+def _write(obj, fh, depth=0):
+    """Stream obj to fh, handing DataFrames and Series to pandas' encoder"""
+    if isinstance(obj, pd.DataFrame):
+        fh.write(obj.to_json(orient="records", date_format="iso", default_handler=str).encode("utf-8"))
+    elif isinstance(obj, pd.Series):
+        if obj.index.is_unique:
+            fh.write(obj.to_json(orient="index", date_format="iso", default_handler=str).encode("utf-8"))
+        else:
+            fh.write(_dumps(obj.tolist()))
+    elif isinstance(obj, dict) and depth < PANDAS_DEPTH:
+        fh.write(b"{")
+        for i, (key, value) in enumerate(obj.items()):
+            if i:
+                fh.write(b",")
+            fh.write(_key(key))
+            fh.write(b":")
+            _write(value, fh, depth + 1)
+        fh.write(b"}")
+    else:
+        fh.write(_dumps(obj))
+
+
+def write_json(obj, path, compress=False, compresslevel=6):
+    """
+    Write obj as compact JSON, gzip-compressed when compress is True.
+
+    DataFrames are written in the same records layout as
+    _make_serializable, but straight from pandas without building Python
+    dicts first. Returns the path actually written.
+    """
+    if compress:
+        if not path.endswith(".gz"):
+            path += ".gz"
+        fh = gzip.open(path, "wb", compresslevel=compresslevel)
+    else:
+        fh = open(path, "wb")
+    with fh:
+        _write(obj, fh)
+    return path
+
+
+def read_json(path):
+    """Read a file written by write_json"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as fh:
+        data = fh.read()
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def benchmark(fetcher, output_dir="serializer_benchmark", keys=("XBRL_Raw", "Yahoo_Finance")):
+    """Time the current _make_serializable + json.dump(indent=2) path against write_json"""
+    import os
+
+    os.makedirs(output_dir, exist_ok=True)
+    results = {}
+
+    for key in keys:
+        if key not in fetcher.company_data:
+            continue
+        obj = fetcher.company_data[key]
+
+        start = time.perf_counter()
+        old_path = os.path.join(output_dir, f"{key}_old.json")
+        with open(old_path, "w") as f:
+            json.dump(fetcher._make_serializable(obj), f, indent=2, default=str)
+        old_time = time.perf_counter() - start
+
+        row = {"old_s": old_time, "old_mb": os.path.getsize(old_path) / 1e6}
+        for label, compress in [("compact", False), ("gzip", True)]:
+            start = time.perf_counter()
+            path = write_json(obj, os.path.join(output_dir, f"{key}_{label}.json"), compress=compress)
+            row[f"{label}_s"] = time.perf_counter() - start
+            row[f"{label}_mb"] = os.path.getsize(path) / 1e6
+        results[key] = row
+
+        print(f"{key}:")
+        print(f"  json.dump(indent=2): {row['old_s']:.2f}s  {row['old_mb']:.1f} MB")
+        print(f"  write_json:          {row['compact_s']:.2f}s  {row['compact_mb']:.1f} MB")
+        print(f"  write_json (gzip):   {row['gzip_s']:.2f}s  {row['gzip_mb']:.1f} MB")
+
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    from main import ComprehensiveDataFetcher
+
+    fetcher = ComprehensiveDataFetcher()
+    fetcher.set_ticker(sys.argv[1] if len(sys.argv) > 1 else "AAPL")
+    fetcher.fetch_all_data()
+    benchmark(fetcher)
@@ -0,0 +1,181 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from instrumentation import Histogram
+
+CACHE_TTL = 6 * 60 * 60  # seconds
+
+# Ticker -> CIK map, loaded once per worker process
+_CIK_MAP = None
+
+
+def _plain(values):
+    """Metric dicts hold NumPy scalars; turn them into JSON-safe Python values"""
+    out = {}
+    for key, value in values.items():
+        if hasattr(value, "item"):
+            value = value.item()
+        if isinstance(value, float) and value != value:
+            value = None
+        out[key] = value
+    return out
+
+
+def compute_metrics(ticker):
+    """Fetch and compute ratios, growth and risk for one ticker (worker-process entry point)"""
+    global _CIK_MAP
+    from main import ComprehensiveDataFetcher
+
+    fetcher = ComprehensiveDataFetcher()
+    if _CIK_MAP is None:
+        data = fetcher._get("https://www.sec.gov/files/company_tickers.json").json()
+        _CIK_MAP = {item["ticker"].upper(): str(item["cik_str"]).zfill(10) for item in data.values()}
+
+    fetcher.ticker = ticker
+    fetcher.cik = _CIK_MAP.get(ticker)
+    if fetcher.cik is None:
+        raise KeyError(f"Ticker {ticker} not found in SEC database")
+
+    financials = fetcher.parse_financial_statements(fetcher.get_xbrl_facts())
+    yf_data = fetcher.get_yfinance_data()
+    return {
+        "ticker": ticker,
+        "ratios": _plain(fetcher.calculate_financial_ratios(financials, yf_data)),
+        "growth": _plain(fetcher.calculate_growth_metrics(financials)),
+        "risk": _plain(fetcher.calculate_risk_metrics(yf_data)),
+        "computed_at": time.time()
+    }
+
+
+class MetricsService:
+    """
+    Shared metrics cache in front of ComprehensiveDataFetcher.
+
+    Concurrent requests for the same ticker wait on a single in-flight
+    computation (single-flight) instead of each starting a fetch, and
+    the fetch plus calculations run in a process pool so the event loop
+    stays responsive.
+    """
+
+    def __init__(self, workers=4, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.cache = {}
+        self.inflight = {}
+        self.latency = {}
+        self.counters = {"requests": 0, "cache_hits": 0, "coalesced": 0, "computed": 0, "errors": 0}
+
+    async def get(self, ticker, refresh=False):
+        ticker = ticker.upper()
+        cached = self.cache.get(ticker)
+        if cached and not refresh and time.time() - cached["computed_at"] < self.ttl:
+            self.counters["cache_hits"] += 1
+            return cached
+
+        if ticker in self.inflight:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(self.inflight[ticker])
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, compute_metrics, ticker)
+        self.inflight[ticker] = future
+        try:
+            result = await asyncio.shield(future)
+            self.cache[ticker] = result
+            self.counters["computed"] += 1
+            return result
+        finally:
+            self.inflight.pop(ticker, None)
+
+    def record(self, route, seconds):
+        self.latency.setdefault(route, Histogram()).add(seconds)
+
+    def stats(self):
+        return {
+            "counters": self.counters,
+            "cached_tickers": len(self.cache),
+            "inflight": sorted(self.inflight),
+            "latency_s": {route: hist.summary() for route, hist in self.latency.items()}
+        }
+
+    async def route(self, path, query):
+        """Return (status, body) for a request path"""
+        parts = [part for part in path.split("/") if part]
+        if parts == ["health"]:
+            return 200, {"status": "ok"}
+        if parts == ["stats"]:
+            return 200, self.stats()
+        if len(parts) == 2 and parts[0] in ("metrics", "ratios", "growth", "risk"):
+            refresh = query.get("refresh", ["0"])[0] in ("1", "true")
+            result = await self.get(parts[1], refresh=refresh)
+            if parts[0] == "metrics":
+                return 200, result
+            return 200, {"ticker": result["ticker"], parts[0]: result[parts[0]],
+                         "computed_at": result["computed_at"]}
+        return 404, {"error": f"Unknown path {path}"}
+
+    async def handle(self, reader, writer):
+        start = time.perf_counter()
+        route_name = "invalid"
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            # Drain headers; only GET without a body is supported
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            method, target, _ = request_line.split(" ", 2)
+            url = urlsplit(target)
+            route_name = "/" + (url.path.strip("/").split("/")[0] or "")
+            self.counters["requests"] += 1
+            if method != "GET":
+                status, body = 405, {"error": "Only GET is supported"}
+            else:
+                try:
+                    status, body = await self.route(url.path, parse_qs(url.query))
+                except KeyError as e:
+                    status, body = 404, {"error": str(e).strip("'\"")}
+                except Exception as e:
+                    self.counters["errors"] += 1
+                    status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+        except ValueError:
+            status, body = 400, {"error": "Malformed request"}
+
+        payload = json.dumps(body, default=str).encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found",
+                  405: "Method Not Allowed", 500: "Internal Server Error"}[status]
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nAccess-Control-Allow-Origin: *\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + payload
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+        self.record(route_name, time.perf_counter() - start)
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"🚀 Metrics service on http://{host}:{port}  (GET /metrics|/ratios|/growth|/risk/<ticker>, /stats)")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Async metrics service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--ttl", type=int, default=CACHE_TTL)
+    args = parser.parse_args()
+
+    service = MetricsService(workers=args.workers, ttl=args.ttl)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.pool.shutdown(cancel_futures=True)
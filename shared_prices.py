@@ -0,0 +1,228 @@
+import os
+import pickle
+import resource
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+# What a worker needs to map one array: shared memory block name, shape and dtype string
+ArraySpec = namedtuple("ArraySpec", ["name", "shape", "dtype"])
+
+PriceViews = namedtuple("PriceViews", ["dates", "tickers", "close", "returns"])
+
+# Blocks this process has mapped, by name, so repeated tasks in a worker map each block once
+_ATTACHED = {}
+
+
+class SharedArrays:
+    """
+    Arrays copied once into named shared memory blocks.
+
+    The creating process owns the blocks and unlinks them on close() (or
+    when the with block ends). specs holds a small picklable ArraySpec per
+    array; send those to workers instead of the arrays and call attach()
+    there to get read-only views of the same pages, with no pickling and
+    no copy per worker.
+    """
+
+    def __init__(self, arrays):
+        self._blocks = []
+        self.specs = {}
+        try:
+            for key, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                block = SharedMemory(create=True, size=max(1, array.nbytes))
+                self._blocks.append(block)
+                np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+                self.specs[key] = ArraySpec(block.name, array.shape, array.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def nbytes(self):
+        return sum(block.size for block in self._blocks)
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(spec):
+    """Read-only view of a shared array; the mapping lives until the process exits"""
+    if spec.name not in _ATTACHED:
+        try:
+            block = SharedMemory(name=spec.name, track=False)
+        except TypeError:  # Python < 3.13 always registers with the resource tracker
+            # Pool workers (fork, spawn or forkserver) inherit the owner's tracker, where registering
+            # again is a no-op and unregistering would drop the owner's entry. Only a process that
+            # starts its own tracker here must unregister, so that tracker does not unlink the block.
+            own_tracker = getattr(resource_tracker._resource_tracker, "_fd", None) is None
+            block = SharedMemory(name=spec.name)
+            if own_tracker:
+                resource_tracker.unregister(block._name, "shared_memory")
+        view = np.ndarray(spec.shape, np.dtype(spec.dtype), buffer=block.buf)
+        view.flags.writeable = False
+        _ATTACHED[spec.name] = (block, view)
+    return _ATTACHED[spec.name][1]
+
+
+class SharedPrices(SharedArrays):
+    """
+    Universe Close and daily-return matrices (days x tickers) in shared memory.
+
+    prices is a dates x tickers Close frame; by default every saved
+    Price_History.csv (or just tickers) is loaded. Pass handle to worker
+    functions and call attach_prices(handle) there.
+    """
+
+    def __init__(self, tickers=None, data_root=".", prices=None):
+        if prices is None:
+            from backtest import load_prices
+            from covariance import price_files
+            prices = load_prices(tickers or list(price_files(data_root)), data_root)["Close"]
+        self.tickers = list(prices.columns)
+        close = prices.to_numpy(dtype=np.float64)
+        returns = prices.pct_change(fill_method=None).to_numpy(dtype=np.float64, copy=True)
+        returns[~np.isfinite(returns)] = np.nan
+        days = pd.DatetimeIndex(prices.index).to_numpy().astype("datetime64[D]").astype(np.int64)
+        super().__init__({"close": close, "returns": returns, "dates": days})
+
+    @property
+    def handle(self):
+        return {"tickers": self.tickers, **self.specs}
+
+
+def attach_prices(handle):
+    """PriceViews with dates as datetime64[D] and read-only close/returns matrices"""
+    dates = attach(handle["dates"]).view("datetime64[D]")
+    return PriceViews(dates, handle["tickers"], attach(handle["close"]), attach(handle["returns"]))
+
+
+def map_blocks(func, shared, block_size=64, workers=None, mp_context=None, args=()):
+    """
+    Run func(handle, lo, hi, *args) over column blocks of a SharedPrices on a process pool.
+
+    func must be a module-level function; it attaches the views itself,
+    so each task ships only the handle, two integers and args. Returns
+    the results in block order.
+    """
+    n = len(shared.tickers)
+    jobs = [(shared.handle, lo, min(n, lo + block_size), *args) for lo in range(0, n, block_size)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        return list(pool.map(_call, [(func, *job) for job in jobs]))
+
+
+def _call(args):
+    func, *rest = args
+    return func(*rest)
+
+
+# =====================================
+# BENCHMARK
+# =====================================
+
+def _memory_kb():
+    """(peak RSS, proportional set size or None where /proc has no smaps_rollup) of this process in kB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":  # bytes there, kB on Linux
+        peak //= 1024
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return peak, int(line.split()[1])
+    except OSError:
+        pass
+    return peak, None
+
+
+_PICKLED = None
+
+
+def _receive(standardized):
+    global _PICKLED
+    _PICKLED = standardized
+
+
+def _correlate_block(spec, lo, hi):
+    """Correlations of a block of tickers against the universe, read in place from standardized returns"""
+    standardized = _PICKLED if spec is None else attach(spec)
+    corr = standardized[:, lo:hi].T @ standardized / len(standardized)
+    return os.getpid(), _memory_kb(), float(np.abs(corr).mean())
+
+
+def benchmark(days=5040, tickers=1000, workers=4, block_size=50, seed=2022):
+    """
+    Worker memory and time with the returns matrix pickled to each worker vs shared.
+
+    The returns are standardized once in the parent and each task
+    multiplies its block against the whole matrix without copying it.
+    Workers are spawned, so nothing is inherited by fork. The pickled
+    side sends the matrix once per worker through the pool initializer
+    (the cheapest pickling can do); the shared side sends only specs.
+    Both sides report each worker's peak RSS and, where /proc provides
+    it, proportional set size (shared pages split between the processes
+    mapping them), summed over workers.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2000-01-03", periods=days)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (days, tickers)), axis=0)),
+                          index=index, columns=[f"T{i}" for i in range(tickers)])
+    filled = np.nan_to_num(prices.pct_change(fill_method=None).to_numpy())
+    standardized = (filled - filled.mean(axis=0)) / np.maximum(filled.std(axis=0), 1e-12)
+    del filled
+    blocks = [(lo, min(tickers, lo + block_size)) for lo in range(0, tickers, block_size)]
+    context = get_context("spawn")
+    results = {}
+
+    for mode in ("pickled", "shared"):
+        start = time.perf_counter()
+        if mode == "pickled":
+            sent = len(pickle.dumps(standardized, protocol=pickle.HIGHEST_PROTOCOL)) * workers
+            with ProcessPoolExecutor(workers, mp_context=context, initializer=_receive,
+                                     initargs=(standardized,)) as pool:
+                out = list(pool.map(_call, [(_correlate_block, None, lo, hi) for lo, hi in blocks]))
+        else:
+            with SharedArrays({"standardized": standardized}) as shared:
+                spec = shared.specs["standardized"]
+                sent = len(pickle.dumps(spec)) * len(blocks)
+                with ProcessPoolExecutor(workers, mp_context=context) as pool:
+                    out = list(pool.map(_call, [(_correlate_block, spec, lo, hi) for lo, hi in blocks]))
+        elapsed = time.perf_counter() - start
+
+        peak, pss = {}, {}
+        for pid, (peak_kb, pss_kb), _ in out:
+            peak[pid] = max(peak.get(pid, 0), peak_kb)
+            if pss_kb is not None:
+                pss[pid] = max(pss.get(pid, 0), pss_kb)
+        results[mode] = {"seconds": elapsed, "bytes_sent": sent, "peak_rss_mb": sum(peak.values()) / 1024,
+                         "pss_mb": sum(pss.values()) / 1024 if pss else None}
+
+    matrix_mb = standardized.nbytes / 1e6
+    print(f"Returns matrix: {days} days x {tickers} tickers ({matrix_mb:.0f} MB), {workers} workers")
+    print(f"{'Mode':<10}{'Seconds':>9}{'Sent MB':>10}{'Peak RSS MB':>13}{'PSS MB':>9}")
+    for mode, result in results.items():
+        pss = f"{result['pss_mb']:.0f}" if result["pss_mb"] is not None else "n/a"
+        print(f"{mode:<10}{result['seconds']:>9.2f}{result['bytes_sent'] / 1e6:>10.2f}"
+              f"{result['peak_rss_mb']:>13.0f}{pss:>9}")
+    # Peak RSS counts shared pages in every worker that touched them; PSS splits them
+    if results["shared"]["pss_mb"] is not None:
+        print(f"Worker memory saved (PSS): {results['pickled']['pss_mb'] - results['shared']['pss_mb']:.0f} MB")
+    print(f"Worker memory saved (peak RSS): "
+          f"{results['pickled']['peak_rss_mb'] - results['shared']['peak_rss_mb']:.0f} MB")
+    return results
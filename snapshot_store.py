@@ -0,0 +1,208 @@
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+import numpy as np
+
+SNAPSHOTS_PATH = "snapshots.db"
+
+# Raw payloads saved by save_all_data, under 01_Raw_JSON
+SNAPSHOT_PAYLOADS = ("SEC_Company_Info", "XBRL_Raw", "Yahoo_Finance")
+
+# Chunk sizes: a boundary is cut where the rolling hash has AVG_BITS zero
+# bits (about every 2**AVG_BITS bytes), but never inside MIN_CHUNK bytes
+# of the previous cut and never further than MAX_CHUNK from it
+MIN_CHUNK = 2 * 1024
+AVG_BITS = 13
+MAX_CHUNK = 64 * 1024
+
+# The hash covers the last WINDOW bytes, so a cut depends only on nearby content
+WINDOW = 32
+_BLOCK = 1 << 20
+
+# Gear table: one fixed pseudo-random 64-bit value per byte value
+_GEAR = np.array([int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], "little") for i in range(256)],
+                 dtype=np.uint64)
+
+
+def chunk_boundaries(data, min_size=MIN_CHUNK, avg_bits=AVG_BITS, max_size=MAX_CHUNK):
+    """
+    End offsets of content-defined chunks of data.
+
+    The hash at each byte is sum(GEAR[byte[i - j]] << j) over the last
+    WINDOW bytes (a gear hash truncated to its window), computed for all
+    positions at once in blocks of about a megabyte. Because a boundary
+    depends only on the WINDOW bytes before it, inserting or deleting
+    bytes moves the cuts near the edit and leaves the rest of the chunks,
+    and their hashes, unchanged.
+    """
+    n = len(data)
+    if n <= min_size:
+        return [n] if n else []
+    raw = np.frombuffer(data, dtype=np.uint8)
+    mask = np.uint64(((1 << avg_bits) - 1) << (WINDOW - avg_bits))
+    candidates = []
+    for start in range(0, n, _BLOCK):
+        lo = max(0, start - WINDOW + 1)
+        gear = _GEAR[raw[lo:start + _BLOCK]]
+        h = gear.copy()
+        for j in range(1, WINDOW):
+            h[j:] += gear[:-j] << np.uint64(j)
+        hits = np.flatnonzero((h[start - lo:] & mask) == 0)
+        candidates.append(hits + start + 1)
+    candidates = np.concatenate(candidates)
+
+    ends = []
+    last = 0
+    while n - last > min_size:
+        i = np.searchsorted(candidates, last + min_size)
+        cut = int(candidates[i]) if i < len(candidates) else n
+        cut = min(cut, last + max_size, n)
+        ends.append(cut)
+        last = cut
+    if last < n:
+        ends.append(n)
+    return ends
+
+
+def _digest(chunk):
+    return hashlib.blake2b(chunk, digest_size=16).digest()
+
+
+class SnapshotStore:
+    """
+    Versioned raw payloads, deduplicated by content-defined chunking.
+
+    Each put() splits a payload into chunks (see chunk_boundaries), stores
+    every chunk not already present once, zlib-compressed and keyed by its
+    hash, and records the snapshot as the ordered list of chunk hashes.
+    Chunks are shared across dates, tickers and payload names, so a daily
+    snapshot of an XBRL or price history that grew by a few facts or rows
+    only adds the chunks around the change.
+
+    get(ticker, name, as_of) returns the bytes of the latest snapshot
+    taken on or before as_of, exactly as they were saved.
+    """
+
+    def __init__(self, path=SNAPSHOTS_PATH):
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (hash BLOB PRIMARY KEY, size INTEGER, data BLOB);
+            CREATE TABLE IF NOT EXISTS snapshots (
+                ticker TEXT, name TEXT, taken TEXT, size INTEGER, digest BLOB, chunks BLOB,
+                PRIMARY KEY (ticker, name, taken)
+            );
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def put(self, ticker, name, data, taken=None):
+        """Store one payload; returns sizes and how much of it was new"""
+        taken = taken or time.strftime("%Y-%m-%dT%H:%M:%S")
+        hashes = []
+        new_chunks = new_bytes = stored_bytes = 0
+        last = 0
+        for end in chunk_boundaries(data):
+            chunk = data[last:end]
+            last = end
+            key = _digest(chunk)
+            hashes.append(key)
+            if self.conn.execute("SELECT 1 FROM chunks WHERE hash = ?", (key,)).fetchone():
+                continue
+            packed = zlib.compress(chunk, 6)
+            # OR IGNORE: another process may have stored the same chunk meanwhile
+            self.conn.execute("INSERT OR IGNORE INTO chunks VALUES (?, ?, ?)", (key, len(chunk), packed))
+            new_chunks += 1
+            new_bytes += len(chunk)
+            stored_bytes += len(packed)
+        self.conn.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?)",
+                          (ticker, name, taken, len(data), _digest(data), b"".join(hashes)))
+        self.conn.commit()
+        return {"name": name, "bytes": len(data), "chunks": len(hashes), "new_chunks": new_chunks,
+                "new_bytes": new_bytes, "stored_bytes": stored_bytes}
+
+    def put_dir(self, ticker, data_dir=None, taken=None, names=SNAPSHOT_PAYLOADS):
+        """Snapshot the raw payloads save_all_data wrote (gzip files are stored decompressed)"""
+        data_dir = data_dir or f"{ticker}_COMPLETE_DATA"
+        taken = taken or time.strftime("%Y-%m-%dT%H:%M:%S")
+        results = []
+        for name in names:
+            path = os.path.join(data_dir, "01_Raw_JSON", f"{name}.json")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    data = f.read()
+            elif os.path.exists(path + ".gz"):
+                with gzip.open(path + ".gz", "rb") as f:
+                    data = f.read()
+            else:
+                continue
+            results.append(self.put(ticker, name, data, taken))
+        return results
+
+    def _snapshot(self, ticker, name, as_of=None):
+        # A bare date includes every snapshot taken during that day
+        bound = "9999" if as_of is None else (as_of + "T23:59:59" if len(as_of) == 10 else as_of)
+        return self.conn.execute(
+            "SELECT taken, size, digest, chunks FROM snapshots WHERE ticker = ? AND name = ? AND taken <= ? "
+            "ORDER BY taken DESC LIMIT 1", (ticker, name, bound)).fetchone()
+
+    def get(self, ticker, name, as_of=None):
+        """Bytes of the latest snapshot on or before as_of (default: latest); None if there is none"""
+        row = self._snapshot(ticker, name, as_of)
+        if row is None:
+            return None
+        _, size, digest, chunk_list = row
+        keys = [chunk_list[i:i + 16] for i in range(0, len(chunk_list), 16)]
+        found = {}
+        # Fetch in batches under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            found.update(self.conn.execute(
+                f"SELECT hash, data FROM chunks WHERE hash IN ({','.join('?' * len(batch))})", batch))
+        data = b"".join(zlib.decompress(found[key]) for key in keys)
+        if len(data) != size or _digest(data) != digest:
+            raise ValueError(f"Snapshot {ticker}/{name} at {row[0]} failed verification")
+        return data
+
+    def get_json(self, ticker, name, as_of=None):
+        data = self.get(ticker, name, as_of)
+        return None if data is None else json.loads(data)
+
+    def restore(self, ticker, as_of=None, output_dir=None, names=SNAPSHOT_PAYLOADS):
+        """Write the payloads as of a date into output_dir/01_Raw_JSON; returns the paths written"""
+        output_dir = output_dir or f"{ticker}_AS_OF_{(as_of or 'latest')[:10]}"
+        json_dir = os.path.join(output_dir, "01_Raw_JSON")
+        os.makedirs(json_dir, exist_ok=True)
+        paths = []
+        for name in names:
+            data = self.get(ticker, name, as_of)
+            if data is None:
+                continue
+            path = os.path.join(json_dir, f"{name}.json")
+            with open(path, "wb") as f:
+                f.write(data)
+            paths.append(path)
+        return paths
+
+    def history(self, ticker, name=None):
+        """(name, taken, size) for every snapshot of a ticker, oldest first"""
+        query = "SELECT name, taken, size FROM snapshots WHERE ticker = ?"
+        params = [ticker]
+        if name:
+            query += " AND name = ?"
+            params.append(name)
+        return self.conn.execute(query + " ORDER BY taken, name", params).fetchall()
+
+    def stats(self):
+        """Logical bytes of every snapshot against bytes actually stored"""
+        snapshots, logical = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM snapshots").fetchone()
+        chunks, unique, stored = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM chunks").fetchone()
+        return {"snapshots": snapshots, "logical_bytes": logical, "chunks": chunks, "unique_bytes": unique,
+                "stored_bytes": stored, "ratio": logical / stored if stored else None}
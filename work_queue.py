@@ -0,0 +1,383 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date
+
+from filing_archive import RateLimiter, SEC_REQUESTS_PER_SECOND
+
+QUEUE_PATH = "work_queue.db"
+
+BROKER_PORT = 8765
+
+
+class WorkQueue:
+    """
+    Shared ticker queue in a SQLite file that worker processes on one host pull from.
+
+    Workers lease one ticker at a time. A lease that is not renewed by
+    heartbeat() before it expires is handed to the next worker that asks,
+    so tickers held by a crashed or stuck worker are reassigned.
+
+    The file uses WAL, which needs shared memory on a single host: never
+    open it over NFS/SMB. Workers on other nodes go through a broker
+    (serve() on the host with the file, RemoteQueue on the nodes).
+    """
+
+    def __init__(self, path=QUEUE_PATH, run=None, max_attempts=3):
+        self.path = path
+        self.run = run or date.today().isoformat()
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                run TEXT, ticker TEXT, cik TEXT,
+                status TEXT DEFAULT 'pending',
+                worker TEXT, lease_expires REAL,
+                attempts INTEGER DEFAULT 0, error TEXT,
+                PRIMARY KEY (run, ticker)
+            );
+            CREATE INDEX IF NOT EXISTS tasks_status ON tasks (run, status, lease_expires);
+            CREATE TABLE IF NOT EXISTS workers (
+                run TEXT, worker TEXT, last_heartbeat REAL, ticker TEXT,
+                PRIMARY KEY (run, worker)
+            );
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, items):
+        """Add (ticker, cik) pairs not already queued for this run"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO tasks (run, ticker, cik) VALUES (?, ?, ?)",
+            ((self.run, ticker.upper(), cik) for ticker, cik in items)
+        )
+        self.conn.execute("COMMIT")
+
+    def lease(self, worker, lease_seconds=300):
+        """Claim the next pending or expired ticker; returns (ticker, cik) or None when drained"""
+        now = time.time()
+        # IMMEDIATE takes the write lock up front so two workers can't claim the same row
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases that have used every attempt will not be handed out again
+            self.conn.execute(
+                "UPDATE tasks SET status = 'failed', lease_expires = NULL, "
+                "error = COALESCE(error, 'lease expired') WHERE run = ? AND status = 'leased' "
+                "AND lease_expires < ? AND attempts >= ?",
+                (self.run, now, self.max_attempts)
+            )
+            row = self.conn.execute(
+                "SELECT ticker, cik FROM tasks WHERE run = ? AND attempts < ? AND "
+                "(status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                "ORDER BY status = 'leased', ticker LIMIT 1",
+                (self.run, self.max_attempts, now)
+            ).fetchone()
+            if row:
+                self.conn.execute(
+                    "UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, "
+                    "attempts = attempts + 1 WHERE run = ? AND ticker = ?",
+                    (worker, now + lease_seconds, self.run, row[0])
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def heartbeat(self, worker, ticker=None, lease_seconds=300):
+        """Record that worker is alive and extend its lease on ticker"""
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO workers (run, worker, last_heartbeat, ticker) VALUES (?, ?, ?, ?)",
+            (self.run, worker, now, ticker)
+        )
+        if ticker:
+            self.conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE run = ? AND ticker = ? AND worker = ? "
+                "AND status = 'leased'",
+                (now + lease_seconds, self.run, ticker, worker)
+            )
+
+    def complete(self, worker, ticker):
+        self.conn.execute(
+            "UPDATE tasks SET status = 'done', lease_expires = NULL, error = NULL "
+            "WHERE run = ? AND ticker = ? AND worker = ?",
+            (self.run, ticker, worker)
+        )
+
+    def fail(self, worker, ticker, error):
+        """Put the ticker back for another attempt, or mark it failed once out of attempts"""
+        self.conn.execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "lease_expires = NULL, error = ? WHERE run = ? AND ticker = ? AND worker = ?",
+            (self.max_attempts, str(error), self.run, ticker, worker)
+        )
+
+    def leave(self, worker):
+        self.conn.execute("DELETE FROM workers WHERE run = ? AND worker = ?", (self.run, worker))
+
+    def active_workers(self, window=90):
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM workers WHERE run = ? AND last_heartbeat > ?",
+            (self.run, time.time() - window)
+        ).fetchone()
+        return max(1, row[0])
+
+    def status(self):
+        rows = self.conn.execute(
+            "SELECT status, COUNT(*) FROM tasks WHERE run = ? GROUP BY status", (self.run,)
+        ).fetchall()
+        counts = dict(rows)
+        counts["workers"] = self.active_workers()
+        return counts
+
+
+# =====================================
+# BROKER
+# =====================================
+# One JSON object per line each way: {"op", "run", "max_attempts", "args"}
+# in, {"ok": true, "result"} or {"ok": false, "error"} out.
+
+BROKER_OPS = ("enqueue", "lease", "heartbeat", "complete", "fail", "leave", "active_workers", "status")
+
+
+class _BrokerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # SQLite connections are per thread, and each connection gets its own thread
+        queues = {}
+        try:
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                    if request["op"] not in BROKER_OPS:
+                        raise ValueError(f"Unknown queue operation {request['op']!r}")
+                    key = (request["run"], request.get("max_attempts", 3))
+                    if key not in queues:
+                        queues[key] = WorkQueue(self.server.queue_path, run=key[0], max_attempts=key[1])
+                    result = getattr(queues[key], request["op"])(*request.get("args", []))
+                    response = {"ok": True, "result": result}
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+        finally:
+            for queue in queues.values():
+                queue.close()
+
+
+class _BrokerServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def serve(queue_path=QUEUE_PATH, host="127.0.0.1", port=BROKER_PORT):
+    """
+    Serve the queue file to workers on other nodes over TCP.
+
+    Only this process touches the SQLite file, so it can stay on a local
+    disk. There is no authentication: bind to a trusted network only.
+    """
+    with _BrokerServer((host, port), _BrokerHandler) as server:
+        server.queue_path = queue_path
+        print(f"📡 Work queue broker for {queue_path} on {host}:{port}")
+        server.serve_forever()
+
+
+class RemoteQueue:
+    """WorkQueue interface over a broker connection; one per thread, like WorkQueue"""
+
+    def __init__(self, address, run=None, max_attempts=3):
+        host, _, port = address.rpartition(":")
+        self.run = run or date.today().isoformat()
+        self.max_attempts = max_attempts
+        self.sock = socket.create_connection((host or "127.0.0.1", int(port or BROKER_PORT)))
+        self.stream = self.sock.makefile("rwb")
+
+    def _call(self, op, *args):
+        request = {"op": op, "run": self.run, "max_attempts": self.max_attempts, "args": list(args)}
+        self.stream.write(json.dumps(request).encode() + b"\n")
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("Work queue broker closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise RuntimeError(f"Work queue broker: {response['error']}")
+        return response["result"]
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+    def enqueue(self, items):
+        self._call("enqueue", [list(item) for item in items])
+
+    def lease(self, worker, lease_seconds=300):
+        row = self._call("lease", worker, lease_seconds)
+        return tuple(row) if row else None
+
+    def heartbeat(self, worker, ticker=None, lease_seconds=300):
+        self._call("heartbeat", worker, ticker, lease_seconds)
+
+    def complete(self, worker, ticker):
+        self._call("complete", worker, ticker)
+
+    def fail(self, worker, ticker, error):
+        self._call("fail", worker, ticker, str(error))
+
+    def leave(self, worker):
+        self._call("leave", worker)
+
+    def active_workers(self, window=90):
+        return self._call("active_workers", window)
+
+    def status(self):
+        return self._call("status")
+
+
+def open_queue(queue_path=QUEUE_PATH, run=None, broker=None):
+    """RemoteQueue when a broker address (host:port) is given, else the local SQLite file"""
+    return RemoteQueue(broker, run=run) if broker else WorkQueue(queue_path, run=run)
+
+
+class SharedRateLimiter(RateLimiter):
+    """RateLimiter whose rate is a global budget divided by the number of live workers"""
+
+    def __init__(self, budget=SEC_REQUESTS_PER_SECOND):
+        super().__init__(budget)
+        self.budget = budget
+
+    def rebalance(self, workers):
+        with self._lock:
+            self.interval = workers / self.budget
+
+
+def use_root(root):
+    """
+    Resolve every relative data path (queue, peer/screen/snapshot DBs, caches,
+    <TICKER>_COMPLETE_DATA outputs) against root instead of the launch directory.
+    """
+    if root:
+        os.makedirs(root, exist_ok=True)
+        os.chdir(root)
+
+
+def run_worker(queue_path=QUEUE_PATH, run=None, worker=None, lease_seconds=300,
+               heartbeat_interval=30, budget=SEC_REQUESTS_PER_SECOND, task_seconds=1800,
+               broker=None, root=None, **fetcher_kwargs):
+    """
+    Pull tickers from the queue and run the full pipeline until it is drained.
+
+    With broker="host:port" the queue is reached through a broker instead
+    of the local file. Outputs and the per-node databases go under root.
+
+    A background thread heartbeats every heartbeat_interval seconds,
+    extending the current lease and re-splitting the SEC request budget
+    across however many workers are alive. A ticker's lease is extended
+    for at most task_seconds; after that the lease is left to expire, so
+    a ticker the worker is stuck on goes to another worker.
+    """
+    from main import ComprehensiveDataFetcher
+
+    use_root(root)
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    queue = open_queue(queue_path, run=run, broker=broker)
+    limiter = SharedRateLimiter(budget)
+    fetcher = ComprehensiveDataFetcher(**fetcher_kwargs)
+    fetcher.rate_limiter = limiter
+
+    current = {"ticker": None, "deadline": None}
+    stop = threading.Event()
+
+    def beat():
+        # SQLite and broker connections are per thread
+        beat_queue = open_queue(queue_path, run=queue.run, broker=broker)
+        while not stop.is_set():
+            ticker, deadline = current["ticker"], current["deadline"]
+            beat_queue.heartbeat(worker, ticker if deadline and time.time() < deadline else None,
+                                 lease_seconds)
+            limiter.rebalance(beat_queue.active_workers(window=heartbeat_interval * 3))
+            stop.wait(heartbeat_interval)
+        beat_queue.leave(worker)
+        beat_queue.close()
+
+    queue.heartbeat(worker)
+    heartbeat_thread = threading.Thread(target=beat, daemon=True)
+    heartbeat_thread.start()
+    print(f"👷 Worker {worker} joined run {queue.run}")
+
+    processed = 0
+    try:
+        while True:
+            task = queue.lease(worker, lease_seconds)
+            if task is None:
+                break
+            ticker, cik = task
+            current["deadline"] = time.time() + task_seconds
+            current["ticker"] = ticker
+            try:
+                fetcher.run_all(ticker, cik=cik)
+                queue.complete(worker, ticker)
+            except Exception as e:
+                print(f"   ✗ {ticker} failed: {e}")
+                queue.fail(worker, ticker, e)
+            finally:
+                current["ticker"] = current["deadline"] = None
+            processed += 1
+    finally:
+        stop.set()
+        heartbeat_thread.join()
+        queue.close()
+        fetcher.close()
+        fetcher.save_peer_ranks()
+
+    print(f"👷 Worker {worker} finished after {processed} tickers")
+    return processed
+
+
+def enqueue_universe(queue_path=QUEUE_PATH, run=None, broker=None):
+    """Queue every ticker in SEC company_tickers.json"""
+    import requests
+    from main import HEADERS
+
+    data = requests.get("https://www.sec.gov/files/company_tickers.json", headers=HEADERS).json()
+    queue = open_queue(queue_path, run=run, broker=broker)
+    queue.enqueue((item["ticker"], str(item["cik_str"]).zfill(10)) for item in data.values())
+    print(f"📥 Queued {len(data)} tickers for run {queue.run}")
+    queue.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared work queue for universe runs")
+    parser.add_argument("command", choices=["enqueue", "work", "status", "serve"])
+    parser.add_argument("--root", help="Directory for the queue file, databases and outputs (default: cwd)")
+    parser.add_argument("--queue", default=QUEUE_PATH)
+    parser.add_argument("--broker", help="host:port of a queue broker, for workers on other nodes")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface for serve to bind")
+    parser.add_argument("--port", type=int, default=BROKER_PORT)
+    parser.add_argument("--run")
+    parser.add_argument("--budget", type=float, default=SEC_REQUESTS_PER_SECOND,
+                        help="SEC requests/second shared by all workers")
+    parser.add_argument("--parallel", action="store_true")
+    parser.add_argument("--archive", action="store_true", help="also archive every 10-K/10-Q for the filing index")
+    args = parser.parse_args()
+    use_root(args.root)
+
+    if args.command == "serve":
+        serve(args.queue, args.host, args.port)
+    elif args.command == "enqueue":
+        enqueue_universe(args.queue, args.run, broker=args.broker)
+    elif args.command == "work":
+        run_worker(args.queue, args.run, budget=args.budget, broker=args.broker, parallel=args.parallel,
+                   archive=args.archive)
+    else:
+        print(open_queue(args.queue, run=args.run, broker=args.broker).status())